@@ -0,0 +1,258 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import CASCADE, SET_NULL, Exists, OuterRef, Q
+from django.utils import timezone
+
+from . import search, stats
+from .cache import bump_version
+from .deletes import NAMES, plan, soft_deletes
+from .models import (
+    ArchivedClient,
+    ArchivedPet,
+    ArchivedTreatment,
+    ArchivedWeightMeasurement,
+    Client,
+    Pet,
+    Treatment,
+    WeightMeasurement,
+)
+
+ARCHIVES = {
+    Client: ArchivedClient,
+    Pet: ArchivedPet,
+    Treatment: ArchivedTreatment,
+    WeightMeasurement: ArchivedWeightMeasurement,
+}
+
+# Los modelos con borrado lógico. Primero las mascotas borradas por separado;
+# las que se borraron con su dueño se archivan después, junto con él.
+ROOTS = [Pet, Client]
+
+RESTORES = {
+    "clients": Client,
+    "pets": Pet,
+}
+
+
+def columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def live(queryset):
+    # Lo que todavía suma en los contadores y está en el índice de búsqueda.
+    return queryset.filter(deleted_at=None) if soft_deletes(queryset.model) else queryset
+
+
+def archivable(model, cutoff):
+    rows = model._base_manager.filter(deleted_at__lt=cutoff)
+
+    for field in model._meta.concrete_fields:
+        if field.is_relation and soft_deletes(field.related_model):
+            # Las borradas junto con el padre esperan a que se archive él.
+            rows = rows.exclude(
+                Exists(
+                    field.related_model._base_manager.filter(
+                        pk=OuterRef(field.attname), deleted_at=OuterRef("deleted_at")
+                    )
+                )
+            )
+
+    for relation in model._meta.related_objects:
+        if relation.on_delete is CASCADE and soft_deletes(relation.related_model):
+            # Un cliente con mascotas activas (o borradas en otro momento) no
+            # se archiva: el DELETE se las llevaría y no se podrían restaurar.
+            rows = rows.exclude(
+                Exists(
+                    relation.related_model._base_manager.filter(
+                        **{relation.field.attname: OuterRef("pk")}
+                    ).exclude(deleted_at=OuterRef("deleted_at"))
+                )
+            )
+
+    return rows
+
+
+def archive_batch(queryset, archived_at):
+    deletes, updates = plan(queryset.model, queryset)
+    moved = Counter()
+
+    with transaction.atomic():
+        for related, field in updates:
+            related.update(**{field: None})
+
+        for related in deletes:
+            if related.model not in ARCHIVES:
+                raise ValueError(f"{related.model._meta.label} no tiene tabla de archivo")
+
+            search.remove_many(live(related))
+            stats.record_deleted(live(related))
+
+            archive = ARCHIVES[related.model]
+            archive.objects.bulk_create(
+                archive(**row, archived_at=archived_at)
+                for row in related.values(*columns(related.model))
+            )
+            moved[related.model] += related._raw_delete(related.db)
+
+    return moved
+
+
+def archive(days, batch_size):
+    """
+    Mueve a las tablas de archivo los clientes y las mascotas borrados hace
+    más de `days` días, con todo lo que depende de ellos, de a `batch_size`
+    filas por transacción. Los clientes que todavía tienen mascotas activas
+    quedan sin archivar. Devuelve un Counter con las filas movidas por modelo.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(days=days)
+    moved = Counter()
+
+    for model in ROOTS:
+        deleted = archivable(model, cutoff).order_by("pk")
+
+        while ids := list(deleted.values_list("pk", flat=True)[:batch_size]):
+            moved.update(archive_batch(model._base_manager.filter(pk__in=ids), now))
+
+    for model in moved:
+        bump_version(model)
+
+    return +moved
+
+
+def unarchive(model, lookup):
+    """
+    Vuelve a poner en la tabla de `model` las filas archivadas que cumplen
+    `lookup` y, detrás, sus dependientes. Las que siguen con deleted_at las
+    activa después undelete().
+    """
+    archived = ARCHIVES[model].objects.filter(lookup)
+    rows = list(archived.values(*columns(model)))
+    restored = Counter()
+    if not rows:
+        return restored
+
+    # Las claves SET_NULL hacia filas que ya no existen quedan en NULL, como
+    # habría hecho el borrado (p. ej. el veterinario de un tratamiento).
+    for field in model._meta.concrete_fields:
+        if field.is_relation and field.remote_field.on_delete is SET_NULL:
+            values = {row[field.attname] for row in rows} - {None}
+            existing = set(
+                field.related_model._base_manager.filter(pk__in=values).values_list("pk", flat=True)
+            )
+            for row in rows:
+                if row[field.attname] not in existing:
+                    row[field.attname] = None
+
+    instances = model._base_manager.bulk_create(model(**row) for row in rows)
+    archived._raw_delete(archived.db)
+
+    active = [instance for instance in instances if getattr(instance, "deleted_at", None) is None]
+    search.index_many(active)
+    stats.record_created(active)
+    restored[model] += len(active)
+
+    for relation in model._meta.related_objects:
+        if relation.on_delete is not CASCADE or relation.related_model not in ARCHIVES:
+            continue
+
+        if soft_deletes(relation.related_model):
+            # Solo las que se borraron junto con el padre.
+            lookup = Q(pk__in=[])
+            for instance in instances:
+                lookup |= Q(
+                    **{relation.field.attname: instance.pk, "deleted_at": instance.deleted_at}
+                )
+        else:
+            lookup = Q(**{f"{relation.field.attname}__in": [instance.pk for instance in instances]})
+
+        restored.update(unarchive(relation.related_model, lookup))
+
+    return restored
+
+
+def undelete(model, queryset):
+    # Quita deleted_at a las filas y a los dependientes borrados con ellas.
+    rows = list(queryset.exclude(deleted_at=None))
+    restored = Counter()
+    if not rows:
+        return restored
+
+    deleted_at = {row.pk: row.deleted_at for row in rows}
+    undeleted = model._base_manager.filter(pk__in=deleted_at)
+    undeleted.update(deleted_at=None)
+    for row in rows:
+        row.deleted_at = None
+
+    search.index_many(rows)
+    stats.record_restored(undeleted)
+    restored[model] += len(rows)
+
+    for relation in model._meta.related_objects:
+        if relation.on_delete is CASCADE and soft_deletes(relation.related_model):
+            lookup = Q(pk__in=[])
+            for pk, moment in deleted_at.items():
+                lookup |= Q(**{relation.field.attname: pk, "deleted_at": moment})
+
+            restored.update(
+                undelete(relation.related_model, relation.related_model._base_manager.filter(lookup))
+            )
+
+    return restored
+
+
+def restore_one(model, id):
+    row = (
+        ARCHIVES[model].objects.filter(pk=id).values(*columns(model)).first()
+        or model._base_manager.filter(pk=id).values(*columns(model)).first()
+    )
+
+    if row is None:
+        return None, "no existe"
+    if row["deleted_at"] is None:
+        return None, "no hay nada que restaurar"
+
+    for field in model._meta.concrete_fields:
+        parent = row[field.attname] if field.is_relation else None
+        if parent is not None and soft_deletes(field.related_model):
+            if not field.related_model.objects.filter(pk=parent).exists():
+                owner = NAMES[field.related_model._meta.model_name][0]
+                return None, f"primero hay que restaurar el {owner} {parent}"
+
+    if model is Client and Client.objects.with_email(row["email"]).exists():
+        return None, "ya existe un cliente con ese email"
+
+    restored = unarchive(model, Q(pk=id))
+    restored.update(undelete(model, model._base_manager.filter(pk=id)))
+    return restored, None
+
+
+def restore(model, ids):
+    """
+    Vuelve a activar los clientes o las mascotas con esos ids, estén solo
+    borrados o ya archivados, junto con lo que se borró con ellos (las
+    mascotas con la misma deleted_at que su dueño, sus tratamientos y
+    pesajes). Devuelve `(restaurados, errores)`: un Counter por modelo y
+    `{id: mensaje}` con los que no se pudieron restaurar.
+    """
+    restored = Counter()
+    errors = {}
+
+    for id in sorted(set(ids)):
+        try:
+            with transaction.atomic():
+                rows, error = restore_one(model, id)
+        except IntegrityError as integrity_error:
+            rows, error = None, str(integrity_error)
+
+        if error:
+            errors[id] = error
+        else:
+            restored.update(rows)
+
+    for related in restored:
+        bump_version(related)
+
+    return +restored, errors
@@ -0,0 +1,134 @@
+import threading
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ModelVersion
+
+from .routers import reading_from_replica
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+# Versiones ya leídas en el request actual: una sola consulta aunque la vista
+# use varias entradas de cache y el ETag. Se vacía al empezar cada request y
+# con cada bump_version.
+_versions = ContextVar("model_versions", default=None)
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats():
+    with _stats_lock:
+        return {"hits": _stats["hits"], "misses": _stats["misses"]}
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def forget_versions(**kwargs):
+    _versions.set(None)
+
+
+def model_states(models):
+    """
+    Devuelve `{label: (version, updated_at)}` de cada modelo. Los modelos que
+    nunca cambiaron tienen versión 0 y fecha None.
+    """
+    known = _versions.get()
+
+    if known is None:
+        # Es una fila por modelo: se leen todas de una vez.
+        rows = ModelVersion.objects.values_list("label", "version", "updated_at")
+        known = {label: (version, updated_at) for label, version, updated_at in rows}
+        _versions.set(known)
+
+    return {
+        model._meta.label_lower: known.get(model._meta.label_lower, (0, None))
+        for model in models
+    }
+
+
+def model_versions(models):
+    states = model_states(models)
+    return [states[model._meta.label_lower][0] for model in models]
+
+
+def last_modified(models):
+    dates = [updated_at for _, updated_at in model_states(models).values() if updated_at]
+    return max(dates, default=None)
+
+
+def bump_version(model):
+    # Guardada en la base (y no en la cache) para que todos los procesos vean
+    # el mismo valor: con locmem cada worker tiene su propia cache.
+    label = model._meta.label_lower
+    now = timezone.now()
+
+    updated = ModelVersion.objects.filter(label=label).update(
+        version=F("version") + 1, updated_at=now
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                ModelVersion.objects.create(label=label, version=1, updated_at=now)
+        except IntegrityError:
+            # Otro proceso creó la fila entre el UPDATE y el INSERT.
+            ModelVersion.objects.filter(label=label).update(
+                version=F("version") + 1, updated_at=now
+            )
+
+    forget_versions()
+
+
+def version_key(name, models):
+    # La clave incluye la versión de cada modelo: al cambiar una fila, las
+    # entradas viejas simplemente dejan de leerse.
+    versions = model_versions(models)
+    labels = [model._meta.label_lower for model in models]
+    return "querycache:{}:{}".format(
+        name, ":".join(f"{label}={version}" for label, version in zip(labels, versions))
+    )
+
+
+def get_or_build(key, build):
+    value = cache.get(key)
+    if value is not None:
+        _count("hits")
+        return value
+
+    _count("misses")
+    value = build()
+
+    # Leído de una réplica atrasada, el resultado puede no incluir la última
+    # escritura aunque la versión ya sea la nueva: se guarda por poco tiempo.
+    timeout = settings.QUERY_CACHE_TIMEOUT
+    if reading_from_replica():
+        timeout = min(timeout, settings.REPLICA_LAG_SECONDS)
+
+    cache.set(key, value, timeout)
+    return value
+
+
+def cached(name, models, build):
+    """
+    Devuelve el resultado de `build()` guardado en la cache de Django. La
+    clave incluye la versión de cada modelo en `models`, que las señales
+    incrementan al guardar o borrar filas, así que los resultados viejos
+    nunca se vuelven a leer.
+    """
+    return get_or_build(version_key(name, models), build)
+
+
+def cached_queryset(name, queryset, depends_on=()):
+    return cached(name, [queryset.model, *depends_on], lambda: list(queryset))
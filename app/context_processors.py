@@ -1,4 +1,7 @@
+from functools import lru_cache
+
 from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
 
 links = [
     {"label": "Home", "href": reverse("home"), "icon": "bi bi-house-door"},
@@ -8,19 +11,33 @@ links = [
     {"label": "Productos", "href": reverse("products_repo"), "icon": "bi bi-box"},
     {"label": "Proveedores", "href": reverse("providers_repo"), "icon": "bi bi-briefcase"},
     {"label": "Veterinarios", "href": reverse("vets_repo"), "icon": "bi bi-hospital"},
+    {"label": "Importar", "href": reverse("imports_form"), "icon": "bi bi-upload"},
 
 ]
 
 
-def navbar(request):
+def path_prefix(path):
+    # "/clientes/editar/3/" -> "/clientes/": los links son todos de un nivel,
+    # así que el link activo depende solo del primer segmento.
+    end = path.find("/", 1)
+    return path if end == -1 else path[: end + 1]
+
+
+@lru_cache(maxsize=64)
+def links_for(prefix):
     def add_active(link):
         copy = link.copy()
 
         if copy["href"] == "/":
-            copy["active"] = request.path == "/"
+            copy["active"] = prefix == "/"
         else:
-            copy["active"] = request.path.startswith(copy.get("href", ""))
+            copy["active"] = prefix.startswith(copy.get("href", ""))
 
         return copy
 
-    return {"links": map(add_active, links)}
+    return tuple(map(add_active, links))
+
+
+def navbar(request):
+    # Se resuelve recién si el template usa los links.
+    return {"links": SimpleLazyObject(lambda: links_for(path_prefix(request.path)))}
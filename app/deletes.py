@@ -0,0 +1,166 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import CASCADE, DO_NOTHING, SET_NULL, F
+from django.utils import timezone
+
+from . import search, stats
+from .cache import bump_version
+from .models import Client, Medicine, Pet, Product, Provider, Vet
+
+# modelo y listado al que se vuelve después de borrar
+DELETES = {
+    "clients": (Client, "clients_repo"),
+    "medicines": (Medicine, "medicines_repo"),
+    "pets": (Pet, "pets_repo"),
+    "products": (Product, "products_repo"),
+    "providers": (Provider, "providers_repo"),
+    "vets": (Vet, "vets_repo"),
+}
+
+# Para el mensaje con lo que se borró.
+NAMES = {
+    "client": ("cliente", "clientes"),
+    "medicine": ("medicamento", "medicamentos"),
+    "pet": ("mascota", "mascotas"),
+    "product": ("producto", "productos"),
+    "provider": ("proveedor", "proveedores"),
+    "stockmovement": ("movimiento de stock", "movimientos de stock"),
+    "treatment": ("tratamiento", "tratamientos"),
+    "vet": ("veterinario", "veterinarios"),
+    "weightmeasurement": ("pesaje", "pesajes"),
+}
+
+
+def soft_deletes(model):
+    return any(field.name == "deleted_at" for field in model._meta.concrete_fields)
+
+
+def plan(model, queryset):
+    """
+    Sigue los on_delete de las claves foráneas hacia `model` sin cargar filas:
+    devuelve `(borrados, actualizados)`, con las tablas dependientes antes que
+    la de su padre. Cada elemento es un queryset con una subconsulta sobre el
+    padre, así que tienen que correr antes de borrarlo. Entre modelos con
+    borrado lógico solo se siguen los dependientes borrados junto con el padre
+    (la misma deleted_at); el que llama se asegura de que no queden otros.
+    """
+    deletes, updates = [], []
+
+    for relation in model._meta.related_objects:
+        related = relation.related_model._base_manager.filter(
+            **{f"{relation.field.name}__in": queryset}
+        )
+        if soft_deletes(model) and soft_deletes(relation.related_model):
+            related = related.filter(deleted_at=F(f"{relation.field.name}__deleted_at"))
+
+        if relation.on_delete is CASCADE:
+            child_deletes, child_updates = plan(relation.related_model, related)
+            deletes += child_deletes
+            updates += child_updates
+        elif relation.on_delete is SET_NULL:
+            updates.append((related, relation.field.name))
+        elif relation.on_delete is not DO_NOTHING:
+            raise ValueError(f"on_delete no soportado en {relation.field}")
+
+    deletes.append(queryset)
+    return deletes, updates
+
+
+def delete_batch(queryset):
+    deletes, updates = plan(queryset.model, queryset)
+    deleted = Counter()
+    changed = set()
+
+    with transaction.atomic():
+        for related, field in updates:
+            if related.update(**{field: None}):
+                changed.add(related.model)
+
+        for related in deletes:
+            # Las señales de post_delete no corren: el índice de búsqueda y
+            # los contadores del inicio se actualizan acá, antes del DELETE.
+            search.remove_many(related)
+            stats.record_deleted(related)
+            deleted[related.model] += related._raw_delete(related.db)
+
+    return deleted, changed
+
+
+def soft_plan(model, queryset):
+    """
+    Como plan(), para los modelos con borrado lógico: los dependientes que
+    también lo tienen (las mascotas de un cliente) se marcan junto con el
+    padre, y el resto (tratamientos, pesajes) queda en su tabla hasta que
+    archive_deleted los mueve.
+    """
+    querysets = []
+
+    for relation in model._meta.related_objects:
+        if relation.on_delete is CASCADE and soft_deletes(relation.related_model):
+            related = relation.related_model.objects.filter(
+                **{f"{relation.field.name}__in": queryset}
+            )
+            querysets += soft_plan(relation.related_model, related)
+
+    querysets.append(queryset)
+    return querysets
+
+
+def soft_delete_batch(queryset, deleted_at):
+    deleted = Counter()
+
+    with transaction.atomic():
+        for related in soft_plan(queryset.model, queryset):
+            search.remove_many(related)
+            stats.record_deleted(related)
+            deleted[related.model] += related.update(deleted_at=deleted_at)
+
+    return deleted, set()
+
+
+def delete_rows(model, ids, batch_size):
+    """
+    Borra las filas de `model` con esos ids y todo lo que depende de ellas,
+    un lote por transacción, con un solo DELETE por tabla en cada lote. Los
+    clientes y las mascotas solo se marcan con deleted_at, todos con la misma
+    fecha para poder restaurarlos juntos. Devuelve un Counter con las filas
+    borradas por modelo.
+    """
+    ids = sorted(set(ids))
+    deleted = Counter()
+    changed = set()
+    deleted_at = timezone.now()
+
+    for start in range(0, len(ids), batch_size):
+        batch = model.objects.filter(pk__in=ids[start : start + batch_size])
+        if soft_deletes(model):
+            batch_deleted, batch_changed = soft_delete_batch(batch, deleted_at)
+        else:
+            batch_deleted, batch_changed = delete_batch(batch)
+        deleted.update(batch_deleted)
+        changed |= batch_changed
+
+    for related in changed | {related for related, count in deleted.items() if count}:
+        bump_version(related)
+
+    return +deleted
+
+
+def describe(deleted):
+    # "Se eliminaron 2 clientes, 3 mascotas y 1 tratamiento": delete_rows
+    # cuenta primero los dependientes, así que se recorre al revés.
+    parts = []
+    for related in reversed(deleted):
+        singular, plural = NAMES.get(
+            related._meta.model_name,
+            (related._meta.verbose_name, related._meta.verbose_name_plural),
+        )
+        parts.append(f"{deleted[related]} {singular if deleted[related] == 1 else plural}")
+
+    if not parts:
+        return "No se eliminó ningún registro"
+
+    verb = "Se eliminó" if sum(deleted.values()) == 1 else "Se eliminaron"
+    listed = ", ".join(parts[:-1]) + " y " + parts[-1] if len(parts) > 1 else parts[0]
+    return f"{verb} {listed}"
@@ -0,0 +1,85 @@
+import csv
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Client, Medicine, Pet, Product, Provider, Vet
+
+EXPORTS = {
+    "clients": (Client, ["id", "name", "phone", "email", "address"]),
+    "medicines": (Medicine, ["id", "name", "description", "dose"]),
+    "pets": (Pet, ["id", "name", "breed", "birthday", "weight", "client_id"]),
+    "products": (Product, ["id", "name", "type", "price", "provider_id"]),
+    "providers": (Provider, ["id", "name", "email", "address"]),
+    "vets": (Vet, ["id", "name", "email", "phone"]),
+}
+
+FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+BUFFER_SIZE = 64 * 1024
+
+
+class Echo:
+    # csv.writer necesita un archivo; este devuelve la línea en vez de guardarla.
+    def write(self, value):
+        return value
+
+
+def export_rows(name, chunk_size):
+    model, fields = EXPORTS[name]
+    rows = model.objects.order_by("id").values_list(*fields)
+    return fields, rows.iterator(chunk_size=chunk_size)
+
+
+def csv_lines(fields, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(fields, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def buffered(lines, size=BUFFER_SIZE):
+    # Agrupa las líneas en bloques para no emitir un chunk HTTP por fila.
+    buffer = []
+    length = 0
+
+    for line in lines:
+        buffer.append(line)
+        length += len(line)
+
+        if length >= size:
+            yield "".join(buffer).encode()
+            buffer = []
+            length = 0
+
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(wbits=31)
+
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+
+    yield compressor.flush()
+
+
+def export_stream(name, format, chunk_size, compress=False):
+    fields, rows = export_rows(name, chunk_size)
+    lines = csv_lines(fields, rows) if format == "csv" else jsonl_lines(fields, rows)
+    chunks = buffered(lines)
+
+    return gzipped(chunks) if compress else chunks
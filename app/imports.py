@@ -0,0 +1,177 @@
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from . import search, stats
+from .cache import bump_version
+from .models import (
+    Client,
+    Medicine,
+    Pet,
+    Product,
+    Provider,
+    Vet,
+    WeightMeasurement,
+    validate_client,
+    validate_medicine,
+    validate_pet,
+    validate_product,
+    validate_provider,
+    validate_vet,
+)
+
+# modelo, validación, columnas propias y (columna, modelo) de la clave foránea
+IMPORTS = {
+    "clients": (Client, validate_client, ["name", "phone", "email", "address"], None),
+    "medicines": (Medicine, validate_medicine, ["name", "description", "dose"], None),
+    "pets": (Pet, validate_pet, ["name", "breed", "birthday", "weight"], ("client", Client)),
+    "products": (Product, validate_product, ["name", "type", "price"], ("provider", Provider)),
+    "providers": (Provider, validate_provider, ["name", "email", "address"], None),
+    "vets": (Vet, validate_vet, ["name", "email", "phone"], None),
+}
+
+# Modelos con email único: los duplicados se informan por fila en vez de
+# hacer fallar el lote completo en la base.
+UNIQUE_EMAIL = {"clients", "vets"}
+
+FORMATS = ["csv", "jsonl"]
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.errors.append((line, errors))
+
+
+def read_rows(stream, format):
+    """Genera `(número de línea, fila)`; la fila es None si no se pudo leer."""
+    if format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def reference_lookup(model):
+    # Las claves foráneas se pueden indicar por id o por email.
+    lookup = {}
+    for pk, email in model.objects.values_list("id", "email").iterator(chunk_size=5000):
+        lookup[str(pk)] = pk
+        lookup[email.lower()] = pk
+    return lookup
+
+
+def existing_emails(model):
+    emails = model.objects.values_list("email", flat=True).iterator(chunk_size=5000)
+    return {email.lower() for email in emails}
+
+
+def build_instance(model, validate, fields, reference, lookup, row):
+    data = {
+        key.strip(): "" if value is None else str(value).strip()
+        for key, value in row.items()
+        if key
+    }
+    for field in fields:
+        data.setdefault(field, "")
+
+    try:
+        errors = validate(data)
+    except ValidationError as error:
+        errors = {"row": " ".join(error.messages)}
+
+    values = {field: data.get(field, "") for field in fields}
+
+    if reference is not None:
+        field = reference[0]
+        value = data.get(field, "")
+        if value:
+            values[f"{field}_id"] = lookup.get(value.lower())
+            if values[f"{field}_id"] is None:
+                errors[field] = f"No existe el registro {value}"
+
+    if errors:
+        return None, errors
+
+    instance = model(**values)
+    try:
+        instance.clean_fields()
+    except ValidationError as error:
+        return None, {field: " ".join(messages) for field, messages in error.message_dict.items()}
+
+    return instance, None
+
+
+def flush(model, batch, report):
+    if not batch:
+        return
+
+    instances = [instance for _, instance in batch]
+
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(instances)
+            search.index_many(instances)
+            stats.record_created(instances)
+            if model is Pet:
+                WeightMeasurement.objects.bulk_create(
+                    WeightMeasurement(pet_id=pet.id, weight=pet.weight) for pet in instances
+                )
+    except DatabaseError as error:
+        for line, _ in batch:
+            report.add_error(line, {"row": str(error)})
+        return
+
+    report.created += len(instances)
+    bump_version(model)
+
+
+def import_rows(name, rows, batch_size):
+    """
+    Valida cada fila con las mismas funciones que los formularios y guarda
+    las válidas con bulk_create, un lote por transacción. Las filas con
+    errores se informan en el reporte sin frenar la importación.
+    """
+    model, validate, fields, reference = IMPORTS[name]
+    lookup = reference_lookup(reference[1]) if reference is not None else None
+    emails = existing_emails(model) if name in UNIQUE_EMAIL else None
+    report = ImportReport()
+    batch = []
+
+    for line, row in rows:
+        if row is None:
+            report.add_error(line, {"row": "La línea no es un registro válido"})
+            continue
+
+        instance, errors = build_instance(model, validate, fields, reference, lookup, row)
+        if errors:
+            report.add_error(line, errors)
+            continue
+
+        if emails is not None:
+            if instance.email.lower() in emails:
+                report.add_error(line, {"email": "Ya existe un registro con ese email"})
+                continue
+            emails.add(instance.email.lower())
+
+        batch.append((line, instance))
+        if len(batch) >= batch_size:
+            flush(model, batch, report)
+            batch = []
+
+    flush(model, batch, report)
+    return report
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.archive import archive
+from app.deletes import NAMES
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve a las tablas de archivo los clientes y las mascotas borrados hace más "
+        "de --days días, con sus mascotas, tratamientos y pesajes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        moved = archive(options["days"], options["batch_size"])
+
+        # Los dependientes se mueven primero: se listan después de su padre.
+        for model in reversed(moved):
+            self.stdout.write(f"{moved[model]} {NAMES[model._meta.model_name][1]}")
+
+        self.stdout.write(f"{sum(moved.values())} registros archivados")
@@ -0,0 +1,37 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.imports import FORMATS, IMPORTS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = "Importa registros desde un archivo CSV o JSON Lines en lotes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=sorted(IMPORTS))
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        format = options["format"] or os.path.splitext(options["path"])[1].lstrip(".")
+        if format not in FORMATS:
+            raise CommandError("Indique el formato con --format (csv o jsonl)")
+
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+                report = import_rows(
+                    options["name"], read_rows(stream, format), options["batch_size"]
+                )
+        except OSError as error:
+            raise CommandError(str(error))
+
+        for line, errors in report.errors:
+            for field, message in errors.items():
+                self.stderr.write(f"Línea {line}: {field}: {message}")
+
+        self.stdout.write(
+            f"{report.created} registros importados, {len(report.errors)} con errores"
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app import search
+from app.models import Client, Medicine, Pet, Vet
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de clientes, mascotas, veterinarios y medicamentos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        querysets = [
+            Client.objects.all(),
+            Pet.objects.select_related("client"),
+            Vet.objects.all(),
+            Medicine.objects.all(),
+        ]
+
+        with transaction.atomic():
+            search.clear_index()
+
+            for queryset in querysets:
+                total = 0
+                for instance in queryset.iterator(chunk_size=options["chunk_size"]):
+                    search.index_instance(instance)
+                    total += 1
+
+                self.stdout.write(f"{queryset.model.__name__}: {total} indexados")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.archive import RESTORES, restore
+from app.deletes import NAMES
+
+
+class Command(BaseCommand):
+    help = (
+        "Restaura clientes o mascotas borrados, estén archivados o no, junto con lo "
+        "que se borró con ellos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=sorted(RESTORES))
+        parser.add_argument("ids", nargs="+", type=int)
+
+    def handle(self, *args, **options):
+        model = RESTORES[options["name"]]
+        restored, errors = restore(model, options["ids"])
+
+        singular = NAMES[model._meta.model_name][0]
+        for id, message in errors.items():
+            self.stderr.write(f"{singular} {id}: {message}")
+
+        for related, count in restored.items():
+            self.stdout.write(f"{count} {NAMES[related._meta.model_name][1]}")
+
+        self.stdout.write(f"{sum(restored.values())} registros restaurados")
+        if errors:
+            raise CommandError(f"{len(errors)} no se pudieron restaurar")
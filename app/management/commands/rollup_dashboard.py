@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app import stats
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero los contadores de la página de inicio"
+
+    def handle(self, *args, **options):
+        rows = stats.rebuild()
+        self.stdout.write(f"{rows} contadores recalculados")
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from app.cache import bump_version
+from app.models import Product, StockMovement
+
+
+def ledger_total():
+    # Suma de los movimientos del producto de la fila externa (0 si no tiene).
+    total = (
+        StockMovement.objects.filter(product=OuterRef("pk"))
+        .order_by()
+        .values("product")
+        .annotate(total=Sum("quantity"))
+        .values("total")
+    )
+    return Coalesce(Subquery(total, output_field=IntegerField()), Value(0))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el stock de cada producto con la suma de sus movimientos y, con "
+        "--fix, lo recalcula desde el historial"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Corregir las diferencias")
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Product.objects.annotate(ledger=ledger_total())
+            .exclude(stock=ledger_total())
+            .values_list("id", "name", "stock", "ledger")
+        )
+
+        for product_id, name, stock, ledger in drifted:
+            self.stdout.write(f"{name} (#{product_id}): stock {stock}, movimientos {ledger}")
+
+        if drifted and options["fix"]:
+            # Un solo UPDATE que vuelve a sumar el historial: un movimiento
+            # registrado mientras tanto no se pierde.
+            Product.objects.filter(pk__in=[row[0] for row in drifted]).update(
+                stock=ledger_total()
+            )
+            bump_version(Product)
+
+        self.stdout.write(
+            f"{len(drifted)} productos con diferencias"
+            + (", corregidos" if drifted and options["fix"] else "")
+        )
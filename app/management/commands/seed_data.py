@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from app.seeds import seed
+
+
+class Command(BaseCommand):
+    help = "Carga datos sintéticos (clientes, mascotas, veterinarios, medicamentos, proveedores y productos)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=1000)
+        parser.add_argument("--pets-per-client", type=int, default=2)
+        parser.add_argument("--vets", type=int, default=20)
+        parser.add_argument("--medicines", type=int, default=8)
+        parser.add_argument("--providers", type=int, default=20)
+        parser.add_argument("--products-per-provider", type=int, default=10)
+        parser.add_argument("--treatments-per-pet", type=int, default=2)
+        parser.add_argument("--weights-per-pet", type=int, default=1, help="Pesajes semanales")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=0, help="Semilla para repetir los mismos datos")
+
+    def handle(self, *args, **options):
+        created = seed(
+            clients=options["clients"],
+            pets_per_client=options["pets_per_client"],
+            vets=options["vets"],
+            medicines=options["medicines"],
+            providers=options["providers"],
+            products_per_provider=options["products_per_provider"],
+            treatments_per_pet=options["treatments_per_pet"],
+            weights_per_pet=options["weights_per_pet"],
+            batch_size=options["batch_size"],
+            random_seed=options["seed"],
+        )
+
+        for name, count in created.items():
+            self.stdout.write(f"{count} {name}")
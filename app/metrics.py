@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# (nombre, ayuda, campo de RequestSample, factor para pasar a la unidad)
+METRICS = [
+    ("vetsoft_request_duration_seconds", "Tiempo total del request", "wall_ms", 1 / 1000),
+    ("vetsoft_request_db_queries", "Consultas a la base por request", "queries", 1),
+    ("vetsoft_request_db_seconds", "Tiempo en la base por request", "db_ms", 1 / 1000),
+    ("vetsoft_request_template_seconds", "Tiempo renderizando templates", "template_ms", 1 / 1000),
+    ("vetsoft_response_size_bytes", "Tamaño de la respuesta", "size", 1),
+]
+
+_current = ContextVar("request_sample", default=None)
+
+_lock = threading.Lock()
+_windows = defaultdict(lambda: deque(maxlen=settings.METRICS_WINDOW))
+_totals = defaultdict(lambda: defaultdict(float))
+_counts = defaultdict(int)
+
+
+class RequestSample:
+    def __init__(self):
+        self.wall_ms = 0.0
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.size = 0
+
+
+def record_query(execute, sql, params, many, context):
+    sample = _current.get()
+    start = time.perf_counter()
+
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if sample is not None:
+            sample.queries += 1
+            sample.db_ms += (time.perf_counter() - start) * 1000
+
+
+@contextmanager
+def collecting(sample):
+    # Las consultas de cualquier base se suman a `sample` mientras dure el bloque.
+    token = _current.set(sample)
+
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            yield sample
+    finally:
+        _current.reset(token)
+
+
+def record(view, sample):
+    with _lock:
+        _windows[view].append(sample)
+        _counts[view] += 1
+        for _, _, field, _ in METRICS:
+            _totals[view][field] += getattr(sample, field)
+
+
+def reset_metrics():
+    with _lock:
+        _windows.clear()
+        _totals.clear()
+        _counts.clear()
+
+
+def quantile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def prometheus_text():
+    """
+    Métricas por nombre de URL en el formato de texto de Prometheus. Los
+    cuantiles salen de las últimas METRICS_WINDOW muestras; `_sum` y `_count`
+    acumulan desde que arrancó el proceso.
+    """
+    with _lock:
+        windows = {view: list(samples) for view, samples in _windows.items()}
+        totals = {view: dict(values) for view, values in _totals.items()}
+        counts = dict(_counts)
+
+    lines = []
+    for name, help_text, field, factor in METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} summary")
+
+        for view in sorted(windows):
+            values = [getattr(sample, field) * factor for sample in windows[view]]
+            for fraction in QUANTILES:
+                lines.append(
+                    f'{name}{{view="{view}",quantile="{fraction}"}} {quantile(values, fraction):.6g}'
+                )
+            lines.append(f'{name}_sum{{view="{view}"}} {totals[view][field] * factor:.6g}')
+            lines.append(f'{name}_count{{view="{view}"}} {counts[view]}')
+
+    return "\n".join(lines) + "\n"
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        sample = _current.get()
+        if sample is None:
+            return super().render(context, request)
+
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            sample.template_ms += (time.perf_counter() - start) * 1000
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    # Igual al backend de Django, pero mide el tiempo de render para las métricas.
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
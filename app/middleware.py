@@ -0,0 +1,140 @@
+import logging
+import time
+from fnmatch import fnmatch
+
+from django.conf import settings
+
+from .metrics import RequestSample, collecting, record
+from .routers import read_from_replica, replica_configured
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = "read_primary"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def replica_view(view_func):
+    name = getattr(view_func, "__name__", "")
+    return any(fnmatch(name, pattern) for pattern in settings.REPLICA_VIEWS)
+
+
+def streaming_from_replica(content):
+    # Las respuestas en streaming leen la base mientras se envían, después
+    # de que la vista terminó.
+    with read_from_replica():
+        yield from content
+
+
+class ReplicaMiddleware:
+    """
+    Ejecuta las vistas de REPLICA_VIEWS leyendo de la réplica. Después de un
+    POST deja una cookie para que ese navegador lea del primario durante
+    REPLICA_LAG_SECONDS y vea sus propios cambios.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if request.method not in SAFE_METHODS and replica_configured():
+            response.set_cookie(
+                STICKY_COOKIE,
+                "1",
+                max_age=settings.REPLICA_LAG_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            or STICKY_COOKIE in request.COOKIES
+            or not replica_configured()
+            or not replica_view(view_func)
+        ):
+            return None
+
+        with read_from_replica():
+            response = view_func(request, *view_args, **view_kwargs)
+
+        if response.streaming:
+            response.streaming_content = streaming_from_replica(response.streaming_content)
+
+        return response
+
+
+def view_name(request):
+    match = request.resolver_match
+    return (match.url_name or match.view_name) if match else "sin_ruta"
+
+
+def server_timing(sample):
+    return ", ".join(
+        [
+            f"app;dur={sample.wall_ms:.1f}",
+            f'db;dur={sample.db_ms:.1f};desc="{sample.queries} consultas"',
+            f"tpl;dur={sample.template_ms:.1f}",
+        ]
+    )
+
+
+class MetricsMiddleware:
+    """
+    Mide cada request (tiempo total, consultas y tiempo en la base, render
+    de templates y tamaño de la respuesta). Se informa en el header
+    Server-Timing y se acumula por nombre de URL para /metricas/.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample = RequestSample()
+        start = time.perf_counter()
+
+        with collecting(sample):
+            response = self.get_response(request)
+
+        sample.wall_ms = (time.perf_counter() - start) * 1000
+
+        if response.streaming:
+            # El cuerpo se genera mientras se envía: se mide al terminar.
+            response.streaming_content = self.measure_stream(
+                request, response.streaming_content, sample, start
+            )
+        else:
+            sample.size = len(response.content)
+            self.finish(request, sample)
+
+        response["Server-Timing"] = server_timing(sample)
+        return response
+
+    def measure_stream(self, request, content, sample, start):
+        try:
+            with collecting(sample):
+                for chunk in content:
+                    sample.size += len(chunk)
+                    yield chunk
+        finally:
+            sample.wall_ms = (time.perf_counter() - start) * 1000
+            self.finish(request, sample)
+
+    def finish(self, request, sample):
+        view = view_name(request)
+        record(view, sample)
+
+        if sample.wall_ms >= settings.SLOW_REQUEST_MS:
+            logger.warning(
+                "Request lento: %s %s (%s) %.0f ms, %d consultas, %.0f ms en la base",
+                request.method,
+                request.path,
+                view,
+                sample.wall_ms,
+                sample.queries,
+                sample.db_ms,
+            )
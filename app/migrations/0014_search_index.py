@@ -0,0 +1,108 @@
+import unicodedata
+from itertools import islice
+
+from django.db import migrations
+
+SEARCH_TABLE = "app_search_index"
+# Los mismos slots que app.search.KINDS: rowid = id * 8 + slot.
+KINDS = {"client": 1, "pet": 2, "vet": 3, "medicine": 4}
+
+
+def normalize(text):
+    # La misma que app.search.normalize, copiada para no depender del código actual.
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            """
+            CREATE TABLE app_search_index (
+                id bigint PRIMARY KEY,
+                kind varchar(20) NOT NULL,
+                object_id bigint NOT NULL,
+                title text NOT NULL,
+                body text NOT NULL,
+                document tsvector NOT NULL
+            )
+            """
+        )
+        schema_editor.execute(
+            "CREATE INDEX app_search_index_document ON app_search_index USING GIN (document)"
+        )
+    else:
+        schema_editor.execute(
+            """
+            CREATE VIRTUAL TABLE app_search_index USING fts5(
+                kind UNINDEXED,
+                object_id UNINDEXED,
+                title,
+                body,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """
+        )
+
+
+def documents(apps, db):
+    # (kind, id, título, cuerpo), como app.search.build_document.
+    for client in apps.get_model("app", "Client").objects.using(db).iterator(chunk_size=2000):
+        body = " ".join([client.email, client.phone, client.address or ""])
+        yield "client", client.id, client.name, body
+
+    pets = apps.get_model("app", "Pet").objects.using(db).select_related("client")
+    for pet in pets.iterator(chunk_size=2000):
+        owner = pet.client.name if pet.client_id else ""
+        yield "pet", pet.id, pet.name, " ".join([pet.breed, owner])
+
+    for vet in apps.get_model("app", "Vet").objects.using(db).iterator(chunk_size=2000):
+        yield "vet", vet.id, vet.name, " ".join([vet.email, str(vet.phone)])
+
+    for medicine in apps.get_model("app", "Medicine").objects.using(db).iterator(chunk_size=2000):
+        yield "medicine", medicine.id, medicine.name, medicine.description
+
+
+def fill_search_index(apps, schema_editor):
+    # Para bases que ya tenían datos: sin esto la búsqueda queda vacía hasta
+    # correr rebuild_search_index.
+    postgresql = schema_editor.connection.vendor == "postgresql"
+    if postgresql:
+        sql = f"""
+            INSERT INTO {SEARCH_TABLE} (id, kind, object_id, title, body, document)
+            VALUES (
+                %s, %s, %s, %s, %s,
+                setweight(to_tsvector('spanish', %s), 'A')
+                || setweight(to_tsvector('spanish', %s), 'B')
+            )
+        """
+    else:
+        sql = f"INSERT INTO {SEARCH_TABLE} (rowid, kind, object_id, title, body) VALUES (%s, %s, %s, %s, %s)"
+
+    rows = documents(apps, schema_editor.connection.alias)
+    # De a lotes en una lista: la consulta de documents() usa la misma conexión
+    # y no puede avanzar mientras corre el executemany.
+    while batch := list(islice(rows, 2000)):
+        params = [
+            [id * 8 + KINDS[kind], kind, id, title, body]
+            + ([normalize(title), normalize(body)] if postgresql else [])
+            for kind, id, title, body in batch
+        ]
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+
+
+def drop_search_index(apps, schema_editor):
+    schema_editor.execute("DROP TABLE IF EXISTS app_search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_alter_provider_address'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
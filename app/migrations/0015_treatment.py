@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+# Treatment.LEGACY_APPLIED_AT: fuera de cualquier mes actual.
+LEGACY_APPLIED_AT = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def copy_history_to_treatments(apps, schema_editor):
+    Pet = apps.get_model("app", "Pet")
+    Treatment = apps.get_model("app", "Treatment")
+    db = schema_editor.connection.alias
+
+    # El historial anterior no guardaba fechas ni qué veterinario aplicó cada
+    # medicamento: cada vínculo pasa a ser un tratamiento propio, solo con el
+    # medicamento o solo con el veterinario, y sin fecha.
+    batch = []
+
+    pets = Pet.objects.using(db).prefetch_related("medicines", "vets").order_by("id")
+    for pet in pets.iterator(chunk_size=500):
+        for medicine in sorted(pet.medicines.all(), key=lambda medicine: medicine.id):
+            batch.append(
+                Treatment(pet=pet, medicine=medicine, dose=medicine.dose, applied_at=LEGACY_APPLIED_AT)
+            )
+        for vet in sorted(pet.vets.all(), key=lambda vet: vet.id):
+            batch.append(Treatment(pet=pet, vet=vet, applied_at=LEGACY_APPLIED_AT))
+
+        if len(batch) >= 1000:
+            Treatment.objects.using(db).bulk_create(batch)
+            batch = []
+
+    Treatment.objects.using(db).bulk_create(batch)
+
+
+def copy_treatments_to_history(apps, schema_editor):
+    Treatment = apps.get_model("app", "Treatment")
+
+    for treatment in Treatment.objects.using(schema_editor.connection.alias).select_related("pet").iterator(chunk_size=1000):
+        if treatment.medicine_id:
+            treatment.pet.medicines.add(treatment.medicine_id)
+        if treatment.vet_id:
+            treatment.pet.vets.add(treatment.vet_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Treatment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dose', models.IntegerField(blank=True, null=True)),
+                ('applied_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('medicine', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='app.medicine')),
+                ('pet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='treatments', to='app.pet')),
+                ('vet', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='app.vet')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['pet', 'applied_at'], name='treatment_pet_applied_idx')],
+            },
+        ),
+        migrations.RunPython(copy_history_to_treatments, copy_treatments_to_history),
+        migrations.RemoveField(
+            model_name='pet',
+            name='medicines',
+        ),
+        migrations.RemoveField(
+            model_name='pet',
+            name='vets',
+        ),
+    ]
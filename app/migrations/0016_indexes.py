@@ -0,0 +1,66 @@
+# Generated by Django 5.0.4 on 2026-10-17 01:44
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_duplicate_emails(apps, schema_editor):
+    # Antes no se exigía email único: si hay repetidos (sin distinguir
+    # mayúsculas) el índice fallaría con un IntegrityError poco claro.
+    db = schema_editor.connection.alias
+    problems = []
+    for model_name in ["Client", "Vet"]:
+        model = apps.get_model("app", model_name)
+        duplicated = (
+            model._base_manager.using(db).values(lower_email=Lower("email"))
+            .annotate(rows=Count("id"))
+            .filter(rows__gt=1)
+            .order_by("lower_email")
+        )
+        for row in duplicated:
+            ids = model._base_manager.using(db).annotate(lower_email=Lower("email")).filter(
+                lower_email=row["lower_email"]
+            ).order_by("id").values_list("id", flat=True)
+            problems.append(f"{model_name} {row['lower_email']}: ids {', '.join(map(str, ids))}")
+
+    if problems:
+        raise RuntimeError(
+            "Hay emails repetidos; corríjalos antes de migrar:\n" + "\n".join(problems)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_treatment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='client_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['client', 'name'], name='pet_client_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['type', 'name'], name='product_type_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='provider',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='provider_name_lower_idx'),
+        ),
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='client',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='client_email_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='vet',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='vet_email_unique'),
+        ),
+    ]
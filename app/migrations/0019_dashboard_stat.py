@@ -0,0 +1,68 @@
+# Generated by Django 5.0.4 on 2026-10-17 16:05
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def fill_stats(apps, schema_editor):
+    # Lo mismo que app.stats.rebuild con las tablas de este momento, copiado
+    # para no depender del código actual.
+    Client = apps.get_model("app", "Client")
+    Pet = apps.get_model("app", "Pet")
+    Product = apps.get_model("app", "Product")
+    Treatment = apps.get_model("app", "Treatment")
+    DashboardStat = apps.get_model("app", "DashboardStat")
+    db = schema_editor.connection.alias
+
+    rows = [("clients", "", Client.objects.using(db).count(), 0.0)]
+    rows += [
+        ("pets_by_breed", breed, count, float(total or 0))
+        for breed, count, total in Pet.objects.using(db).values("breed")
+        .annotate(count=Count("id"), total=Sum("weight"))
+        .values_list("breed", "count", "total")
+    ]
+    rows += [
+        ("products_by_provider", str(provider or ""), count, 0.0)
+        for provider, count in Product.objects.using(db).values("provider")
+        .annotate(count=Count("id"))
+        .values_list("provider", "count")
+    ]
+    rows += [
+        ("treatments_by_month", timezone.localtime(month).strftime("%Y-%m"), count, 0.0)
+        for month, count in Treatment.objects.using(db).annotate(month=TruncMonth("applied_at"))
+        .values("month")
+        .annotate(count=Count("id"))
+        .values_list("month", "count")
+    ]
+
+    DashboardStat.objects.using(db).bulk_create(
+        DashboardStat(metric=metric, key=key, count=count, total=total)
+        for metric, key, count, total in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=50)),
+                ('key', models.CharField(blank=True, max_length=100)),
+                ('count', models.BigIntegerField(default=0)),
+                ('total', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric', '-count'], name='dashboard_stat_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('metric', 'key'), name='dashboard_stat_unique')],
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
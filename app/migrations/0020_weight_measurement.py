@@ -0,0 +1,42 @@
+# Generated by Django 5.0.4 on 2026-10-17 17:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def record_current_weights(apps, schema_editor):
+    Pet = apps.get_model("app", "Pet")
+    WeightMeasurement = apps.get_model("app", "WeightMeasurement")
+    db = schema_editor.connection.alias
+
+    WeightMeasurement.objects.using(db).bulk_create(
+        (
+            WeightMeasurement(pet_id=pet_id, weight=weight)
+            for pet_id, weight in Pet.objects.using(db).exclude(weight=None).values_list("id", "weight").iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_dashboard_stat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeightMeasurement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weight', models.DecimalField(decimal_places=3, max_digits=8)),
+                ('measured_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('pet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weights', to='app.pet')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['pet', 'measured_at'], name='weight_pet_measured_idx')],
+            },
+        ),
+        migrations.RunPython(record_current_weights, migrations.RunPython.noop),
+    ]
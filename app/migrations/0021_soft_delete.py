@@ -0,0 +1,100 @@
+# Generated by Django 5.0.4 on 2026-10-17 19:10
+
+import django.db.models.functions.text
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_weight_measurement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pet',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='client_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='pet_deleted_idx'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='client',
+            name='client_email_unique',
+        ),
+        migrations.AddConstraint(
+            model_name='client',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), condition=models.Q(('deleted_at', None)), name='client_email_unique'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedClient',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('name', models.CharField(max_length=100)),
+                ('phone', models.CharField(max_length=15)),
+                ('email', models.EmailField(max_length=254)),
+                ('address', models.CharField(blank=True, max_length=100)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedPet',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('name', models.CharField(max_length=100)),
+                ('breed', models.CharField(max_length=50)),
+                ('birthday', models.DateField()),
+                ('weight', models.DecimalField(decimal_places=3, max_digits=8)),
+                ('client_id', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedWeightMeasurement',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('pet_id', models.BigIntegerField(db_index=True)),
+                ('weight', models.DecimalField(decimal_places=3, max_digits=8)),
+                ('measured_at', models.DateTimeField()),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTreatment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('pet_id', models.BigIntegerField(db_index=True)),
+                ('vet_id', models.BigIntegerField(blank=True, null=True)),
+                ('medicine_id', models.BigIntegerField(blank=True, null=True)),
+                ('dose', models.IntegerField(blank=True, null=True)),
+                ('applied_at', models.DateTimeField()),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
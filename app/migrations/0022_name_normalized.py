@@ -0,0 +1,70 @@
+# Generated by Django 5.0.4 on 2026-10-17 21:05
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalize(text):
+    # La misma que app.models.normalize, copiada para no depender del código actual.
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def fill_name_normalized(apps, schema_editor):
+    db = schema_editor.connection.alias
+    for model_name in ["Client", "Provider", "ArchivedClient"]:
+        model = apps.get_model("app", model_name)
+        rows = model._base_manager.using(db).only("id", "name").order_by("id")
+        batch = []
+
+        for row in rows.iterator(chunk_size=2000):
+            row.name_normalized = normalize(row.name)
+            batch.append(row)
+            if len(batch) == 2000:
+                model._base_manager.using(db).bulk_update(batch, ["name_normalized"])
+                batch = []
+
+        model._base_manager.using(db).bulk_update(batch, ["name_normalized"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='name_normalized',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='provider',
+            name='name_normalized',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='archivedclient',
+            name='name_normalized',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.RunPython(fill_name_normalized, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='client',
+            name='client_name_lower_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='provider',
+            name='provider_name_lower_idx',
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['name_normalized'], name='client_name_normalized_idx', opclasses=['text_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='provider',
+            index=models.Index(fields=['name_normalized'], name='provider_name_normalized_idx', opclasses=['text_pattern_ops']),
+        ),
+    ]
@@ -1,8 +1,22 @@
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Lower
 from django.core.exceptions import ValidationError
-from datetime import date
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
 
 import re
+import unicodedata
+
+
+def normalize(text):
+    # Sin tildes y en minúsculas, igual en SQLite y PostgreSQL: el lower() de
+    # SQLite solo pasa a minúsculas las letras ASCII.
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
 ##---------clients----------   
 def validate_client(data):
     errors = {}
@@ -27,11 +41,81 @@ def validate_client(data):
 
     return errors
 
-class Client(models.Model):
+class ContactQuerySet(models.QuerySet):
+    def name_prefix(self, prefix):
+        prefix = normalize(prefix)
+
+        if connections[self.db].vendor == "sqlite":
+            # SQLite no usa índices para LIKE, pero sí para un rango.
+            return self.filter(
+                name_normalized__gte=prefix, name_normalized__lt=prefix + "\U0010ffff"
+            )
+
+        # LIKE 'prefijo%' sobre el índice con text_pattern_ops.
+        return self.filter(name_normalized__startswith=prefix)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create no llama a save().
+        objs = list(objs)
+        if any(field.name == "name_normalized" for field in self.model._meta.concrete_fields):
+            for obj in objs:
+                obj.name_normalized = normalize(obj.name)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def with_email(self, email):
+        # Usa el índice único sobre lower(email).
+        return self.alias(email_lower=Lower("email")).filter(email_lower=email.lower())
+
+class NormalizedName(models.Model):
+    # Copia de name para el autocompletado (ContactQuerySet.name_prefix).
+    name_normalized = models.CharField(max_length=100, editable=False, default="")
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.name_normalized = normalize(self.name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "name_normalized"}
+        super().save(*args, **kwargs)
+
+class SoftDeleteManager(models.Manager):
+    # Oculta las filas borradas (deleted_at); `all_objects` las incluye. Las
+    # relaciones hacia el padre (pet.client) usan el manager base y las ven.
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at=None)
+
+class Client(NormalizedName):
     name = models.CharField(max_length=100)
     phone = models.CharField(max_length=15)
     email = models.EmailField()
     address = models.CharField(max_length=100, blank=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = SoftDeleteManager.from_queryset(ContactQuerySet)()
+    all_objects = ContactQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["name_normalized"],
+                opclasses=["text_pattern_ops"],
+                name="client_name_normalized_idx",
+            ),
+            # Solo las filas borradas, para archive_deleted.
+            models.Index(
+                fields=["deleted_at"],
+                condition=Q(deleted_at__isnull=False),
+                name="client_deleted_idx",
+            ),
+        ]
+        constraints = [
+            # Un cliente borrado no bloquea el email para uno nuevo.
+            models.UniqueConstraint(
+                Lower("email"), condition=Q(deleted_at=None), name="client_email_unique"
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -40,25 +124,33 @@ class Client(models.Model):
     def save_client(cls, client_data):
         errors = validate_client(client_data)
 
+        if "email" not in errors and Client.objects.with_email(client_data.get("email")).exists():
+            errors["email"] = "Ya existe un cliente con ese email"
+
         if len(errors.keys()) > 0:
             return False, errors
 
-        Client.objects.create(
+        client = Client.objects.create(
             name=client_data.get("name"),
             phone=client_data.get("phone"),
             email=client_data.get("email"),
             address=client_data.get("address"),
         )
 
-        return True, None
+        return client, None
 
     def update_client(self, client_data):
+        email = client_data.get("email", "")
+        if email and Client.objects.with_email(email).exclude(pk=self.pk).exists():
+            return {"email": "Ya existe un cliente con ese email"}
+
         self.name = client_data.get("name", "") or self.name
         self.email = client_data.get("email", "") or self.email
         self.phone = client_data.get("phone", "") or self.phone
         self.address = client_data.get("address", "") or self.address
 
         self.save()
+        return {}
 
  ##---------medicine----------   
 
@@ -102,13 +194,13 @@ class Medicine(models.Model):
         if len(errors.keys()) > 0:
             return False, errors
 
-        Medicine.objects.create(
+        medicine = Medicine.objects.create(
             name=medicine_data.get("name"),
             description=medicine_data.get("description"),
             dose=medicine_data.get("dose"),
         )
 
-        return True, None
+        return medicine, None
     def update_medicine(self, medicine_data):
         self.name = medicine_data.get("name", "") or self.name
         self.description = medicine_data.get("description", "") or self.description
@@ -155,15 +247,43 @@ def validate_pet(data):
         except ValueError:
             errors["weight"] = "El peso debe ser un número válido"
     return errors
-       
+
+def validate_pet_client(client_id):
+    # El dueño tiene que existir y no estar borrado.
+    if client_id in ("", None):
+        return {}
+    try:
+        exists = Client.objects.filter(pk=int(client_id)).exists()
+    except (TypeError, ValueError):
+        exists = False
+    return {} if exists else {"client": "El dueño seleccionado no existe"}
+
+class PetQuerySet(models.QuerySet):
+    def for_list(self):
+        return self.select_related("client").only(
+            "id", "name", "breed", "birthday", "weight", "client", "client__name"
+        )
+
 class Pet(models.Model):
     name = models.CharField(max_length=100)
     breed = models.CharField(max_length=50)
     birthday = models.DateField()
     weight = models.DecimalField(max_digits=8, decimal_places=3)  
     client = models.ForeignKey("Client", on_delete=models.CASCADE, null=True, blank=True)
-    medicines = models.ManyToManyField(Medicine)
-    vets = models.ManyToManyField("Vet", blank=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = SoftDeleteManager.from_queryset(PetQuerySet)()
+    all_objects = PetQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["client", "name"], name="pet_client_name_idx"),
+            models.Index(
+                fields=["deleted_at"],
+                condition=Q(deleted_at__isnull=False),
+                name="pet_deleted_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -171,25 +291,61 @@ class Pet(models.Model):
     @classmethod
     def save_pet(cls, pet_data):
         errors = validate_pet(pet_data)
+        errors.update(validate_pet_client(pet_data.get("client")))
 
         if len(errors.keys()) > 0:
             return False, errors
 
-        Pet.objects.create(
-            name=pet_data.get("name"),
-            breed=pet_data.get("breed", ""),
-            birthday=pet_data.get("birthday"),
-            weight=pet_data.get("weight"),
-        )
-
-        return True, None
+        with transaction.atomic():
+            pet = Pet.objects.create(
+                name=pet_data.get("name"),
+                breed=pet_data.get("breed", ""),
+                birthday=pet_data.get("birthday"),
+                weight=pet_data.get("weight"),
+                client_id=pet_data.get("client") or None,
+            )
+            WeightMeasurement.objects.create(pet=pet, weight=pet.weight)
+
+        return pet, None
     
     def update_pet(self, pet_data):
+        errors = validate_pet_client(pet_data.get("client"))
+        if errors:
+            return errors
+
+        previous_weight = self.weight
+
         self.name = pet_data.get("name", "") or self.name
         self.breed = pet_data.get("breed", 0) or self.breed
         self.birthday = pet_data.get("birthday", "") or self.birthday
         self.weight = pet_data.get("weight", "") or self.weight
-        self.save()
+        self.client_id = pet_data.get("client", "") or self.client_id
+
+        with transaction.atomic():
+            self.save()
+            if weight_changed(previous_weight, self.weight):
+                WeightMeasurement.objects.create(pet=self, weight=self.weight)
+        return {}
+
+def weight_changed(previous, current):
+    try:
+        return Decimal(str(previous)) != Decimal(str(current))
+    except InvalidOperation:
+        return True
+
+class WeightMeasurement(models.Model):
+    # Cada peso registrado de la mascota; Pet.weight es el último.
+    pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name="weights")
+    weight = models.DecimalField(max_digits=8, decimal_places=3)
+    measured_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["pet", "measured_at"], name="weight_pet_measured_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.pet_id} {self.weight} kg ({self.measured_at:%Y-%m-%d})"
 
 
 
@@ -218,12 +374,37 @@ def validate_product(data):
             errors["price"] = "El precio debe ser un número válido"
     return errors
 
+def validate_product_provider(provider_id):
+    # El proveedor tiene que seguir existiendo (pudo borrarse después del autocompletado).
+    if provider_id in ("", None):
+        return {}
+    try:
+        exists = Provider.objects.filter(pk=int(provider_id)).exists()
+    except (TypeError, ValueError):
+        exists = False
+    return {} if exists else {"provider": "El proveedor seleccionado no existe"}
+
+class ProductQuerySet(models.QuerySet):
+    def for_list(self):
+        return self.select_related("provider").only(
+            "id", "name", "type", "price", "stock", "provider", "provider__name"
+        )
+
 class Product(models.Model):
     name = models.CharField(max_length=50)
     type = models.CharField(max_length=50)
     price = models.FloatField()
     provider = models.ForeignKey("Provider", on_delete=models.CASCADE, null=True, blank=True)
+    # Suma de los movimientos de StockMovement, actualizada en la misma
+    # transacción que cada movimiento: leer el stock no recorre el historial.
+    stock = models.PositiveIntegerField(default=0)
+
+    objects = ProductQuerySet.as_manager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["type", "name"], name="product_type_name_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -231,24 +412,32 @@ class Product(models.Model):
     @classmethod
     def save_product(cls, product_data):
         errors = validate_product(product_data)
+        errors.update(validate_product_provider(product_data.get("provider")))
 
         if len(errors.keys()) > 0:
             return False, errors
 
-        Product.objects.create(
+        product = Product.objects.create(
             name=product_data.get("name"),
             type=product_data.get("type"),
             price=product_data.get("price"),
+            provider_id=product_data.get("provider") or None,
         )
 
-        return True, None
+        return product, None
     
     def update_product(self, product_data):
+        errors = validate_product_provider(product_data.get("provider"))
+        if errors:
+            return errors
+
         self.name = product_data.get("name", "") or self.name
         self.type = product_data.get("type", "") or self.type
         self.price = product_data.get("price", "") or self.price
+        self.provider_id = product_data.get("provider", "") or self.provider_id
 
         self.save()
+        return {}
         
 ##---------providers----------   
 
@@ -273,11 +462,22 @@ def validate_provider(data):
     return errors
 
 
-class Provider(models.Model):
+class Provider(NormalizedName):
     name = models.CharField(max_length=100)
     email = models.EmailField(max_length=254)
     address = models.CharField(max_length=100)
 
+    objects = ContactQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["name_normalized"],
+                opclasses=["text_pattern_ops"],
+                name="provider_name_normalized_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -288,13 +488,13 @@ class Provider(models.Model):
         if len(errors.keys()) > 0:
             return False, errors
 
-        Provider.objects.create(
+        provider = Provider.objects.create(
             name=provider_data.get("name"),
             email=provider_data.get("email"),
             address=provider_data.get("address"),
         )
 
-        return True, None
+        return provider, None
 
     def update_provider(self, provider_data):
         self.name = provider_data.get("name", "") or self.name
@@ -338,6 +538,13 @@ class Vet(models.Model):
     email = models.EmailField(max_length=254)
     phone = models.IntegerField()
 
+    objects = ContactQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower("email"), name="vet_email_unique"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -345,24 +552,283 @@ class Vet(models.Model):
     def save_vet(cls, vet_data):
         errors = validate_vet(vet_data)
 
+        if "email" not in errors and Vet.objects.with_email(vet_data.get("email")).exists():
+            errors["email"] = "Ya existe un veterinario con ese email"
+
         if len(errors.keys()) > 0:
             return False, errors
 
-        Vet.objects.create(
+        vet = Vet.objects.create(
             name=vet_data.get("name"),
             email=vet_data.get("email"),
             phone=vet_data.get("phone"),
         )
 
-        return True, None
+        return vet, None
 
     def update_vet(self, vet_data):
+        email = vet_data.get("email", "")
+        if email and Vet.objects.with_email(email).exclude(pk=self.pk).exists():
+            return {"email": "Ya existe un veterinario con ese email"}
+
         self.name = vet_data.get("name", "") or self.name
-        self.email = vet_data.get("email", "") or self.email
+        self.email = email or self.email
         self.phone = vet_data.get("phone", "") or self.phone
 
         self.save()
+        return {}
+
+
+##---------treatments----------
+def parse_applied_at(value):
+    applied_at = parse_datetime(value)
+
+    if applied_at is not None and timezone.is_naive(applied_at):
+        applied_at = timezone.make_aware(applied_at)
+
+    return applied_at
+
+def validate_treatment(data):
+    errors = {}
+
+    medicine = data.get("medicines", "")
+    vet = data.get("vet", "")
+    dose = data.get("dose", "")
+    applied_at = data.get("applied_at", "")
+
+    if medicine == "":
+        errors["medicines"] = "Por favor seleccione un medicamento"
+
+    if vet == "":
+        errors["vet"] = "Por favor seleccione un veterinario"
+
+    if dose != "":
+        try:
+            int_dose = int(dose)
+            if int_dose < 1 or int_dose > 10:
+                errors["dose"] = "La dosis debe estar en un rango de 1 a 10"
+        except ValueError:
+            errors["dose"] = "La dosis debe ser un número entero válido"
+
+    if applied_at != "":
+        try:
+            parsed = parse_applied_at(applied_at)
+        except ValueError:
+            parsed = None
+
+        if parsed is None:
+            errors["applied_at"] = "Formato de fecha inválido"
+        elif parsed > timezone.now():
+            errors["applied_at"] = "La fecha del tratamiento no puede ser futura"
+
+    return errors
+
+class Treatment(models.Model):
+    pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name="treatments")
+    vet = models.ForeignKey(Vet, on_delete=models.SET_NULL, null=True, blank=True)
+    medicine = models.ForeignKey(Medicine, on_delete=models.SET_NULL, null=True, blank=True)
+    dose = models.IntegerField(null=True, blank=True)
+    applied_at = models.DateTimeField(default=timezone.now)
+
+    # Fecha de los tratamientos migrados del historial anterior, que no
+    # guardaba cuándo se aplicaron (ver 0015_treatment).
+    LEGACY_APPLIED_AT = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["pet", "applied_at"], name="treatment_pet_applied_idx"),
+        ]
+
+    def __str__(self):
+        applied = "sin fecha" if self.is_legacy else f"{self.applied_at:%Y-%m-%d}"
+        return f"{self.pet} - {self.medicine} ({applied})"
+
+    @property
+    def is_legacy(self):
+        return self.applied_at == self.LEGACY_APPLIED_AT
+
+    @classmethod
+    def save_treatment(cls, pet, treatment_data):
+        errors = validate_treatment(treatment_data)
+
+        if len(errors.keys()) > 0:
+            return False, errors
+
+        medicine = Medicine.objects.filter(pk=treatment_data.get("medicines")).first()
+        if medicine is None:
+            return False, {"medicines": "El medicamento seleccionado no existe"}
+
+        vet_id = treatment_data.get("vet")
+        if not Vet.objects.filter(pk=vet_id).exists():
+            return False, {"vet": "El veterinario seleccionado no existe"}
+
+        applied_at = treatment_data.get("applied_at", "")
+
+        treatment = Treatment.objects.create(
+            pet=pet,
+            vet_id=vet_id,
+            medicine=medicine,
+            dose=treatment_data.get("dose", "") or medicine.dose,
+            applied_at=parse_applied_at(applied_at) if applied_at else timezone.now(),
+        )
+
+        return treatment, None
+
+
+##---------stock----------
+def validate_stock_movement(data):
+    errors = {}
+
+    kind = data.get("kind", "")
+    quantity = data.get("quantity", "")
+
+    if kind not in StockMovement.Kind.values:
+        errors["kind"] = "Por favor seleccione un tipo de movimiento"
+
+    if quantity == "":
+        errors["quantity"] = "Por favor ingrese una cantidad"
+    else:
+        try:
+            int_quantity = int(quantity)
+            if int_quantity == 0:
+                errors["quantity"] = "La cantidad no puede ser cero"
+            elif int_quantity < 0 and kind != StockMovement.Kind.ADJUSTMENT:
+                errors["quantity"] = "La cantidad debe ser mayor que cero"
+        except ValueError:
+            errors["quantity"] = "La cantidad debe ser un número entero válido"
+
+    return errors
+
+class StockMovement(models.Model):
+    # Historial de entradas y salidas de cada producto. Los movimientos no se
+    # editan ni se borran: una corrección es un nuevo ajuste.
+    class Kind(models.TextChoices):
+        PURCHASE = "purchase", "Compra"
+        SALE = "sale", "Venta"
+        ADJUSTMENT = "adjustment", "Ajuste"
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="stock_movements")
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    # Con signo: las ventas y los ajustes negativos restan.
+    quantity = models.IntegerField()
+    note = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["product", "created_at"], name="stock_product_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.get_kind_display()} {self.quantity:+d}"
+
+    @classmethod
+    def save_movement(cls, product_id, movement_data):
+        errors = validate_stock_movement(movement_data)
+
+        if len(errors.keys()) > 0:
+            return False, errors
+
+        kind = movement_data.get("kind")
+        quantity = int(movement_data.get("quantity"))
+        if kind == cls.Kind.SALE:
+            quantity = -quantity
+
+        with transaction.atomic():
+            # El control de stock y el descuento son un solo UPDATE: dos ventas
+            # simultáneas no pueden leer el mismo stock y vender de más.
+            products = Product.objects.filter(pk=product_id)
+            if quantity < 0:
+                products = products.filter(stock__gte=-quantity)
+
+            if not products.update(stock=F("stock") + quantity):
+                if Product.objects.filter(pk=product_id).exists():
+                    return False, {"quantity": "No hay stock suficiente"}
+                return False, {"product": "El producto no existe"}
+
+            movement = StockMovement.objects.create(
+                product_id=product_id,
+                kind=kind,
+                quantity=quantity,
+                note=movement_data.get("note", ""),
+            )
+
+        return movement, None
+
+
+##---------dashboard----------
+class DashboardStat(models.Model):
+    # Contadores del inicio, actualizados de a un alta o baja (ver app.stats):
+    # la página lee unas pocas filas en vez de contar las tablas completas.
+    metric = models.CharField(max_length=50)
+    key = models.CharField(max_length=100, blank=True)
+    count = models.BigIntegerField(default=0)
+    total = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["metric", "key"], name="dashboard_stat_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["metric", "-count"], name="dashboard_stat_top_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.metric}[{self.key}] = {self.count}"
+
+
+##---------versions----------
+class ModelVersion(models.Model):
+    # Una fila por modelo: `version` sube con cada alta, cambio o baja
+    # (ver app.cache.bump_version). Lo usan la cache de consultas y los
+    # ETag/Last-Modified de los listados.
+    label = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.label} v{self.version}"
+
+
+##---------archive----------
+class ArchivedRow(models.Model):
+    # Copia de una fila borrada hace más de ARCHIVE_AFTER_DAYS días (ver
+    # app.archive): mismas columnas y mismo id, sin claves foráneas, para que
+    # las tablas de uso diario queden chicas y los datos se puedan restaurar.
+    id = models.BigIntegerField(primary_key=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        abstract = True
+
+
+class ArchivedClient(ArchivedRow):
+    name = models.CharField(max_length=100)
+    name_normalized = models.CharField(max_length=100, default="")
+    phone = models.CharField(max_length=15)
+    email = models.EmailField()
+    address = models.CharField(max_length=100, blank=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+
+class ArchivedPet(ArchivedRow):
+    name = models.CharField(max_length=100)
+    breed = models.CharField(max_length=50)
+    birthday = models.DateField()
+    weight = models.DecimalField(max_digits=8, decimal_places=3)
+    client_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
 
+class ArchivedWeightMeasurement(ArchivedRow):
+    pet_id = models.BigIntegerField(db_index=True)
+    weight = models.DecimalField(max_digits=8, decimal_places=3)
+    measured_at = models.DateTimeField()
 
 
-    
\ No newline at end of file
+class ArchivedTreatment(ArchivedRow):
+    pet_id = models.BigIntegerField(db_index=True)
+    vet_id = models.BigIntegerField(null=True, blank=True)
+    medicine_id = models.BigIntegerField(null=True, blank=True)
+    dose = models.IntegerField(null=True, blank=True)
+    applied_at = models.DateTimeField()
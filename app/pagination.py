@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.db.models import Q
+
+
+class KeysetPage:
+    def __init__(self, items, page_size, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.page_size = page_size
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def parse_cursor(value):
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+
+    return cursor if cursor >= 0 else None
+
+
+def get_page_size(request):
+    default = settings.REPOSITORY_PAGE_SIZE
+
+    try:
+        page_size = int(request.GET.get("page_size", default))
+    except ValueError:
+        page_size = default
+
+    return max(1, min(page_size, settings.REPOSITORY_MAX_PAGE_SIZE))
+
+
+def cursor_key(request):
+    # Identifica la página pedida, p. ej. para usarla en claves de cache.
+    after = parse_cursor(request.GET.get("after"))
+    before = parse_cursor(request.GET.get("before"))
+    return f"{after}:{before}:{get_page_size(request)}"
+
+
+def seek(queryset, cursor, sort_field, lower):
+    op = "lt" if lower else "gt"
+
+    if sort_field is None:
+        return queryset.filter(**{f"id__{op}": cursor})
+
+    value = queryset.filter(pk=cursor).values_list(sort_field, flat=True).first()
+    if value is None:
+        return queryset
+
+    return queryset.filter(
+        Q(**{f"{sort_field}__{op}": value}) | Q(**{sort_field: value, f"id__{op}": cursor})
+    )
+
+
+def keyset_paginate(request, queryset, page_size=None, sort_field=None, descending=False):
+    """
+    Pagina usando los cursores `after`/`before` de la query string, sin OFFSET
+    ni COUNT, para que el costo no dependa del tamaño de la tabla.
+
+    Las filas se ordenan por `id`, o por `sort_field` y luego `id` para
+    desempatar. El cursor siempre es el `id` de la fila límite.
+    """
+    page_size = page_size or get_page_size(request)
+    after = parse_cursor(request.GET.get("after"))
+    before = parse_cursor(request.GET.get("before"))
+
+    keys = [sort_field, "id"] if sort_field else ["id"]
+    ordering = [f"-{key}" if descending else key for key in keys]
+    reverse_ordering = [key if descending else f"-{key}" for key in keys]
+
+    if before is not None:
+        queryset = seek(queryset, before, sort_field, lower=not descending)
+        rows = list(queryset.order_by(*reverse_ordering)[: page_size + 1])
+        has_previous = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        has_next = True
+    else:
+        if after is not None:
+            queryset = seek(queryset, after, sort_field, lower=descending)
+        rows = list(queryset.order_by(*ordering)[: page_size + 1])
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        has_previous = after is not None
+
+    next_cursor = rows[-1].id if rows and has_next else None
+    previous_cursor = rows[0].id if rows and has_previous else None
+
+    return KeysetPage(rows, page_size, next_cursor, previous_cursor)
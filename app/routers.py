@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICA = "replica"
+
+# Alias del que lee el request en curso; lo fija app.middleware.ReplicaMiddleware.
+_read_database = ContextVar("read_database", default=None)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def reading_from_replica():
+    return _read_database.get() == REPLICA and replica_configured()
+
+
+@contextmanager
+def read_from_replica():
+    token = _read_database.set(REPLICA)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Las lecturas van a la réplica solo dentro de `read_from_replica()`, y
+    únicamente si hay una configurada. Las escrituras siempre van al primario.
+    """
+
+    def db_for_read(self, model, **hints):
+        return REPLICA if reading_from_replica() else "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las dos bases tienen los mismos datos.
+        return True
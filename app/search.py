@@ -0,0 +1,168 @@
+import re
+
+from django.db import connection
+from django.db.models import F
+
+from .models import Client, normalize
+
+SEARCH_TABLE = "app_search_index"
+
+# Cada modelo indexado ocupa un "slot" del rowid para que la fila del índice
+# se pueda reemplazar o borrar por clave primaria: rowid = id * 8 + slot.
+KINDS = {
+    "client": 1,
+    "pet": 2,
+    "vet": 3,
+    "medicine": 4,
+}
+KIND_SLOTS = 8
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(query):
+    return TOKEN_PATTERN.findall(normalize(query))
+
+
+def search_row_id(kind, object_id):
+    return object_id * KIND_SLOTS + KINDS[kind]
+
+
+def build_document(instance):
+    kind = instance._meta.model_name
+
+    if kind == "client":
+        fields = [instance.email, instance.phone, instance.address or ""]
+        return instance.name, " ".join(fields)
+    if kind == "pet":
+        owner = instance.client.name if instance.client_id else ""
+        return instance.name, " ".join([instance.breed, owner])
+    if kind == "vet":
+        return instance.name, " ".join([instance.email, str(instance.phone)])
+    if kind == "medicine":
+        return instance.name, instance.description
+
+    raise ValueError(f"{kind} no es un modelo indexable")
+
+
+def index_instance(instance):
+    kind = instance._meta.model_name
+    row_id = search_row_id(kind, instance.pk)
+    title, body = build_document(instance)
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f"""
+                INSERT INTO {SEARCH_TABLE} (id, kind, object_id, title, body, document)
+                VALUES (
+                    %s, %s, %s, %s, %s,
+                    setweight(to_tsvector('spanish', %s), 'A')
+                    || setweight(to_tsvector('spanish', %s), 'B')
+                )
+                ON CONFLICT (id) DO UPDATE SET
+                    title = EXCLUDED.title,
+                    body = EXCLUDED.body,
+                    document = EXCLUDED.document
+                """,
+                [row_id, kind, instance.pk, title, body, normalize(title), normalize(body)],
+            )
+        else:
+            # En un solo INSERT OR REPLACE: con DELETE + INSERT, dos requests
+            # que reindexan la misma fila a la vez chocan con el rowid.
+            cursor.execute(
+                f"""
+                INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, kind, object_id, title, body)
+                VALUES (%s, %s, %s, %s, %s)
+                """,
+                [row_id, kind, instance.pk, title, body],
+            )
+
+
+def index_many(instances):
+    # Para altas masivas (bulk_create no emite señales). Los dueños de las
+    # mascotas se cargan en una sola consulta, aunque estén borrados.
+    instances = [i for i in instances if i._meta.model_name in KINDS]
+    client_ids = {i.client_id for i in instances if i._meta.model_name == "pet" and i.client_id}
+
+    if client_ids:
+        clients = Client.all_objects.in_bulk(client_ids)
+        for instance in instances:
+            if instance._meta.model_name == "pet" and instance.client_id:
+                instance.client = clients[instance.client_id]
+
+    for instance in instances:
+        index_instance(instance)
+
+
+def remove_instance(instance):
+    row_id = search_row_id(instance._meta.model_name, instance.pk)
+    column = "id" if connection.vendor == "postgresql" else "rowid"
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE {column} = %s", [row_id])
+
+
+def remove_many(queryset):
+    # Para borrados masivos sin señales: un solo DELETE con los rowid
+    # calculados en la base, antes de borrar las filas de `queryset`.
+    kind = queryset.model._meta.model_name
+    if kind not in KINDS:
+        return
+
+    row_ids = queryset.order_by().annotate(
+        search_row_id=F("pk") * KIND_SLOTS + KINDS[kind]
+    ).values("search_row_id")
+    sql, params = row_ids.query.sql_with_params()
+    column = "id" if connection.vendor == "postgresql" else "rowid"
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE {column} IN ({sql})", params)
+
+
+def clear_index():
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+
+def search(query, page=1, page_size=20):
+    """
+    Devuelve `(resultados, hay_mas)` ordenados por relevancia. Todos los
+    términos son obligatorios y se buscan como prefijo.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return [], False
+
+    offset = (max(page, 1) - 1) * page_size
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f"""
+                SELECT kind, object_id, title, body
+                FROM {SEARCH_TABLE}, to_tsquery('spanish', %s) AS query
+                WHERE document @@ query
+                ORDER BY ts_rank(document, query) DESC, id
+                LIMIT %s OFFSET %s
+                """,
+                [" & ".join(f"{token}:*" for token in tokens), page_size + 1, offset],
+            )
+        else:
+            cursor.execute(
+                f"""
+                SELECT kind, object_id, title, body
+                FROM {SEARCH_TABLE}
+                WHERE {SEARCH_TABLE} MATCH %s
+                ORDER BY bm25({SEARCH_TABLE}, 0, 0, 10.0, 1.0), rowid
+                LIMIT %s OFFSET %s
+                """,
+                [" ".join(f'"{token}"*' for token in tokens), page_size + 1, offset],
+            )
+        rows = cursor.fetchall()
+
+    results = [
+        {"kind": kind, "id": object_id, "title": title, "body": body}
+        for kind, object_id, title, body in rows[:page_size]
+    ]
+    return results, len(rows) > page_size
@@ -0,0 +1,209 @@
+import random
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import search, stats
+from .cache import bump_version
+from .models import Client, Medicine, Pet, Product, Provider, Treatment, Vet, WeightMeasurement
+
+FIRST_NAMES = [
+    "Juan", "María", "Lucía", "Sofía", "Martín", "Ramón", "Guido", "Valentina",
+    "Camila", "Mateo", "Nicolás", "Julieta", "Agustina", "Tomás", "Florencia",
+    "Joaquín", "Milagros", "Nuria", "Sebastián", "Ignacio",
+]
+LAST_NAMES = [
+    "Pérez", "González", "Rodríguez", "Fernández", "López", "Martínez", "Gómez",
+    "Díaz", "Sosa", "Romero", "Álvarez", "Torres", "Ruiz", "Ramírez", "Flores",
+    "Acosta", "Benítez", "Medina", "Herrera", "Carrillo",
+]
+STREETS = ["7", "13", "44", "51", "60", "122", "Diagonal 74", "Camino Belgrano"]
+PET_NAMES = [
+    "Toby", "Luna", "Simón", "Mora", "Rocco", "Lola", "Milo", "Kira", "Tom",
+    "Nina", "Bruno", "Frida", "Coco", "Olivia", "Thor", "Canela",
+]
+BREEDS = [
+    "Labrador", "Caniche", "Ovejero Alemán", "Golden Retriever", "Bulldog Francés",
+    "Mestizo", "Siamés", "Persa", "Beagle", "Dogo Argentino",
+]
+MEDICINES = [
+    ("Amoxicilina", "Antibiótico de amplio espectro"),
+    ("Meloxicam", "Antiinflamatorio no esteroide"),
+    ("Ivermectina", "Antiparasitario interno y externo"),
+    ("Prednisolona", "Corticoide"),
+    ("Metronidazol", "Antibiótico y antiprotozoario"),
+    ("Tramadol", "Analgésico"),
+    ("Enrofloxacina", "Antibiótico"),
+    ("Praziquantel", "Antiparasitario interno"),
+]
+PRODUCT_TYPES = ["Alimento", "Antibiótico", "Antiparasitario", "Accesorio", "Higiene"]
+
+
+def person_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def email_for(name, number, domain="mail.com"):
+    user = search.normalize(name).replace(" ", ".")
+    return f"{user}{number}@{domain}"
+
+
+def next_number(model):
+    # Para que los emails no choquen con los de una carga anterior.
+    return (model.objects.order_by("-id").values_list("id", flat=True).first() or 0) + 1
+
+
+def seed(
+    clients,
+    pets_per_client=2,
+    vets=20,
+    medicines=len(MEDICINES),
+    providers=20,
+    products_per_provider=10,
+    treatments_per_pet=2,
+    weights_per_pet=1,
+    batch_size=1000,
+    random_seed=0,
+):
+    """
+    Carga datos sintéticos con bulk_create. Con el mismo `random_seed` los
+    datos generados son siempre los mismos. Devuelve las filas creadas por
+    modelo.
+    """
+    rng = random.Random(random_seed)
+    today = date.today()
+    now = timezone.now()
+    created = {}
+
+    with transaction.atomic():
+        names = [person_name(rng) for _ in range(clients)]
+        first = next_number(Client)
+        client_rows = Client.objects.bulk_create(
+            (
+                Client(
+                    name=name,
+                    phone=f"221{rng.randrange(10**7):07d}",
+                    email=email_for(name, first + i),
+                    address=f"{rng.choice(STREETS)} n° {rng.randrange(1, 2000)}",
+                )
+                for i, name in enumerate(names)
+            ),
+            batch_size=batch_size,
+        )
+
+        pet_rows = Pet.objects.bulk_create(
+            (
+                Pet(
+                    name=rng.choice(PET_NAMES),
+                    breed=rng.choice(BREEDS),
+                    birthday=today - timedelta(days=rng.randrange(60, 15 * 365)),
+                    weight=round(rng.uniform(1.5, 45), 3),
+                    client_id=client.id,
+                )
+                for client in client_rows
+                for _ in range(pets_per_client)
+            ),
+            batch_size=batch_size,
+        )
+
+        # Un pesaje por semana hasta hoy; el último es el peso actual.
+        weight_rows = WeightMeasurement.objects.bulk_create(
+            (
+                WeightMeasurement(
+                    pet_id=pet.id,
+                    weight=round(max(float(pet.weight) * (1 + rng.uniform(-0.15, 0.15)), 0.5), 3)
+                    if week
+                    else pet.weight,
+                    measured_at=now - timedelta(weeks=week),
+                )
+                for pet in pet_rows
+                for week in range(weights_per_pet)
+            ),
+            batch_size=batch_size,
+        )
+
+        vet_names = [f"Dr. {person_name(rng)}" for _ in range(vets)]
+        first = next_number(Vet)
+        vet_rows = Vet.objects.bulk_create(
+            Vet(
+                name=name,
+                email=email_for(name, first + i, "vetsoft.com"),
+                phone=221400000 + first + i,
+            )
+            for i, name in enumerate(vet_names)
+        )
+
+        # Si se piden más medicamentos que los de la lista, se numeran.
+        medicine_data = [
+            MEDICINES[i % len(MEDICINES)] + (i // len(MEDICINES),) for i in range(medicines)
+        ]
+        medicine_rows = Medicine.objects.bulk_create(
+            Medicine(
+                name=f"{name} {copy + 1}" if copy else name,
+                description=description,
+                dose=rng.randrange(1, 11),
+            )
+            for name, description, copy in medicine_data
+        )
+
+        first = next_number(Provider)
+        provider_rows = Provider.objects.bulk_create(
+            Provider(
+                name=f"Distribuidora {rng.choice(LAST_NAMES)} {first + i}",
+                email=f"ventas{first + i}@proveedor.com",
+                address=f"{rng.choice(STREETS)} n° {rng.randrange(1, 2000)}",
+            )
+            for i in range(providers)
+        )
+
+        product_rows = Product.objects.bulk_create(
+            (
+                Product(
+                    name=f"{rng.choice(PRODUCT_TYPES)} {provider.id}-{i}",
+                    type=rng.choice(PRODUCT_TYPES),
+                    price=round(rng.uniform(500, 50000), 2),
+                    provider_id=provider.id,
+                )
+                for provider in provider_rows
+                for i in range(products_per_provider)
+            ),
+            batch_size=batch_size,
+        )
+
+        treatment_rows = []
+        if vet_rows and medicine_rows:
+            treatment_rows = Treatment.objects.bulk_create(
+                (
+                    Treatment(
+                        pet_id=pet.id,
+                        vet_id=rng.choice(vet_rows).id,
+                        medicine_id=medicine.id,
+                        dose=medicine.dose,
+                        applied_at=now - timedelta(minutes=rng.randrange(60, 3 * 365 * 24 * 60)),
+                    )
+                    for pet in pet_rows
+                    for medicine in rng.choices(medicine_rows, k=treatments_per_pet)
+                ),
+                batch_size=batch_size,
+            )
+
+        # bulk_create no emite señales: el índice de búsqueda, los contadores
+        # del inicio y las versiones de la cache se actualizan acá.
+        search.index_many([*client_rows, *pet_rows, *vet_rows, *medicine_rows])
+        stats.record_created([*client_rows, *pet_rows, *product_rows, *treatment_rows])
+
+    for model, rows in [
+        (Client, client_rows),
+        (Pet, pet_rows),
+        (Vet, vet_rows),
+        (Medicine, medicine_rows),
+        (Provider, provider_rows),
+        (Product, product_rows),
+        (Treatment, treatment_rows),
+        (WeightMeasurement, weight_rows),
+    ]:
+        bump_version(model)
+        created[model._meta.verbose_name_plural] = len(rows)
+
+    return created
@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import search, stats
+from .cache import bump_version, forget_versions
+from .models import (
+    Client,
+    DashboardStat,
+    Medicine,
+    ModelVersion,
+    Pet,
+    Product,
+    StockMovement,
+    Treatment,
+    Vet,
+)
+
+
+@receiver(post_save, sender=Client)
+def index_client(sender, instance, **kwargs):
+    search.index_instance(instance)
+
+    # El documento de cada mascota incluye el nombre del dueño.
+    for pet in instance.pet_set.all():
+        pet.client = instance
+        search.index_instance(pet)
+
+
+@receiver(post_save, sender=Pet)
+@receiver(post_save, sender=Vet)
+@receiver(post_save, sender=Medicine)
+def index_on_save(sender, instance, **kwargs):
+    search.index_instance(instance)
+
+
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Pet)
+@receiver(post_delete, sender=Vet)
+@receiver(post_delete, sender=Medicine)
+def remove_from_index(sender, instance, **kwargs):
+    search.remove_instance(instance)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_query_cache(sender, **kwargs):
+    if sender._meta.app_label == "app" and sender not in (ModelVersion, DashboardStat):
+        bump_version(sender)
+
+
+@receiver(pre_save, sender=Pet)
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=Treatment)
+def remember_stats(sender, instance, **kwargs):
+    # Al editar, los contadores restan lo que sumaba la fila antes del cambio
+    # (p. ej. la raza y el peso anteriores de una mascota).
+    if not instance._state.adding:
+        previous = sender.objects.filter(pk=instance.pk).first()
+        instance._previous_stats = stats.contributions(previous) if previous else []
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Pet)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Treatment)
+def update_stats(sender, instance, created, **kwargs):
+    current = stats.contributions(instance)
+
+    if created:
+        stats.apply(added=current)
+    else:
+        # Los clientes suman lo mismo antes y después de editarlos.
+        stats.apply(added=current, removed=instance.__dict__.pop("_previous_stats", current))
+
+
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Pet)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Treatment)
+def remove_from_stats(sender, instance, **kwargs):
+    stats.apply(removed=stats.contributions(instance))
+
+
+@receiver(post_save, sender=StockMovement)
+def invalidate_product_stock(sender, **kwargs):
+    # StockMovement.save_movement cambia Product.stock con update(), que no
+    # emite señales.
+    bump_version(Product)
+
+
+request_started.connect(forget_versions, dispatch_uid="forget_model_versions")
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
@@ -0,0 +1,53 @@
+// Campo con sugerencias: busca por prefijo en `data-autocomplete-url` y
+// guarda el id elegido en el input oculto `data-autocomplete-target`.
+document.querySelectorAll("[data-autocomplete-url]").forEach((input) => {
+    const target = document.getElementById(input.dataset.autocompleteTarget);
+    const options = document.getElementById(input.getAttribute("list"));
+    let timer = null;
+    let controller = null;
+
+    const select = () => {
+        // Si el texto no es una de las sugerencias no queda ningún id elegido.
+        const option = Array.from(options.options).find((o) => o.value === input.value);
+        target.value = option ? option.dataset.id : "";
+    };
+
+    const search = () => {
+        const query = input.value.trim();
+        if (query === "") {
+            options.replaceChildren();
+            return;
+        }
+
+        if (controller) {
+            controller.abort();
+        }
+        controller = new AbortController();
+
+        const url = `${input.dataset.autocompleteUrl}?q=${encodeURIComponent(query)}`;
+        fetch(url, { signal: controller.signal })
+            .then((response) => response.json())
+            .then((data) => {
+                options.replaceChildren(
+                    ...data.results.map((result) => {
+                        const option = document.createElement("option");
+                        option.value = `${result.name} #${result.id}`;
+                        option.dataset.id = result.id;
+                        return option;
+                    })
+                );
+                select();
+            })
+            .catch((error) => {
+                if (error.name !== "AbortError") {
+                    throw error;
+                }
+            });
+    };
+
+    input.addEventListener("input", () => {
+        select();
+        clearTimeout(timer);
+        timer = setTimeout(search, 200);
+    });
+});
@@ -0,0 +1,38 @@
+// Selección múltiple en los listados: el checkbox del encabezado marca todas
+// las filas de la página y el botón muestra cuántas hay elegidas. Los checkbox
+// de las filas no tienen datos del request, así que el HTML cacheado sirve igual.
+document.querySelectorAll("form[data-delete-selected]").forEach((form) => {
+    const button = form.querySelector("button");
+    const label = button.textContent.trim();
+    const selectAll = document.querySelector(`[data-select-all="${form.id}"]`);
+    const boxes = () => [...document.querySelectorAll(`input[name="ids"][form="${form.id}"]`)];
+
+    const refresh = () => {
+        const all = boxes();
+        const selected = all.filter((box) => box.checked).length;
+
+        button.disabled = selected === 0;
+        button.lastChild.textContent = selected ? ` ${label} (${selected})` : ` ${label}`;
+        if (selectAll) {
+            selectAll.checked = all.length > 0 && selected === all.length;
+            selectAll.indeterminate = selected > 0 && selected < all.length;
+        }
+    };
+
+    selectAll?.addEventListener("change", () => {
+        boxes().forEach((box) => {
+            box.checked = selectAll.checked;
+        });
+        refresh();
+    });
+    boxes().forEach((box) => box.addEventListener("change", refresh));
+
+    form.addEventListener("submit", (event) => {
+        const selected = boxes().filter((box) => box.checked).length;
+        if (!window.confirm(`¿Eliminar ${selected} registros y todo lo que depende de ellos?`)) {
+            event.preventDefault();
+        }
+    });
+
+    refresh();
+});
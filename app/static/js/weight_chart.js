@@ -0,0 +1,42 @@
+// Gráfico de peso: pide la serie ya reducida a `data-weight-url` y la dibuja
+// como una línea SVG dentro del contenedor.
+document.querySelectorAll("[data-weight-url]").forEach((container) => {
+    const width = container.clientWidth || 600;
+    const height = 160;
+    const padding = 8;
+
+    const url = `${container.dataset.weightUrl}?points=${Math.max(3, Math.floor(width / 4))}`;
+
+    fetch(url, { headers: { Accept: "application/json" } })
+        .then((response) => response.json())
+        .then(({ points }) => {
+            if (points.length < 2) {
+                container.textContent = "Todavía no hay suficientes pesos registrados";
+                return;
+            }
+
+            const xs = points.map(([measuredAt]) => Date.parse(measuredAt));
+            const ys = points.map(([, weight]) => weight);
+            const [minX, maxX] = [Math.min(...xs), Math.max(...xs)];
+            const [minY, maxY] = [Math.min(...ys), Math.max(...ys)];
+            const scaleX = (x) => padding + ((x - minX) / (maxX - minX || 1)) * (width - 2 * padding);
+            const scaleY = (y) => height - padding - ((y - minY) / (maxY - minY || 1)) * (height - 2 * padding);
+
+            const svg = document.createElementNS("http://www.w3.org/2000/svg", "svg");
+            svg.setAttribute("viewBox", `0 0 ${width} ${height}`);
+            svg.setAttribute("role", "img");
+            svg.setAttribute("aria-label", `Peso entre ${minY} y ${maxY} kg`);
+
+            const line = document.createElementNS("http://www.w3.org/2000/svg", "polyline");
+            line.setAttribute("points", xs.map((x, i) => `${scaleX(x)},${scaleY(ys[i])}`).join(" "));
+            line.setAttribute("fill", "none");
+            line.setAttribute("stroke", "currentColor");
+            line.setAttribute("stroke-width", "2");
+
+            svg.appendChild(line);
+            container.replaceChildren(svg);
+        })
+        .catch(() => {
+            container.textContent = "No se pudo cargar el historial de peso";
+        });
+});
@@ -0,0 +1,170 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+CLIENTS = "clients"
+PETS_BY_BREED = "pets_by_breed"
+PRODUCTS_BY_PROVIDER = "products_by_provider"
+TREATMENTS_BY_MONTH = "treatments_by_month"
+
+TOP = 5
+
+
+def month_key(moment):
+    return timezone.localtime(moment).strftime("%Y-%m")
+
+
+def contributions(instance):
+    """
+    Lo que suma una fila a los contadores: `[(métrica, clave, cantidad, total)]`.
+    Un alta suma estos valores y una baja los resta.
+    """
+    name = instance._meta.model_name
+
+    if name == "client":
+        return [(CLIENTS, "", 1, 0.0)]
+    if name == "pet":
+        return [(PETS_BY_BREED, instance.breed, 1, float(instance.weight or 0))]
+    if name == "product":
+        return [(PRODUCTS_BY_PROVIDER, str(instance.provider_id or ""), 1, 0.0)]
+    if name == "treatment":
+        return [(TREATMENTS_BY_MONTH, month_key(instance.applied_at), 1, 0.0)]
+    return []
+
+
+def apply(added=(), removed=()):
+    from .models import DashboardStat
+
+    changes = defaultdict(lambda: [0, 0.0])
+    for sign, rows in ((1, added), (-1, removed)):
+        for metric, key, count, total in rows:
+            changes[metric, key][0] += sign * count
+            changes[metric, key][1] += sign * total
+
+    for (metric, key), (count, total) in changes.items():
+        if count == 0 and total == 0:
+            continue
+
+        # Igual que bump_version: UPDATE atómico y, si la fila no existe, INSERT.
+        rows = DashboardStat.objects.filter(metric=metric, key=key)
+        delta = {"count": F("count") + count, "total": F("total") + total}
+        if rows.update(**delta):
+            continue
+
+        try:
+            with transaction.atomic():
+                DashboardStat.objects.create(metric=metric, key=key, count=count, total=total)
+        except IntegrityError:
+            rows.update(**delta)
+
+
+def record_created(instances):
+    # Para bulk_create, que no emite señales.
+    apply(added=[row for instance in instances for row in contributions(instance)])
+
+
+def totals(queryset):
+    """
+    Lo mismo que sumar contributions() de cada fila de `queryset`, pero
+    agrupado en la base.
+    """
+    name = queryset.model._meta.model_name
+
+    if name == "client":
+        return [(CLIENTS, "", queryset.count(), 0.0)]
+    if name == "pet":
+        return [
+            (PETS_BY_BREED, breed, count, float(total or 0))
+            for breed, count, total in queryset.values("breed")
+            .annotate(count=Count("id"), total=Sum("weight"))
+            .values_list("breed", "count", "total")
+        ]
+    if name == "product":
+        return [
+            (PRODUCTS_BY_PROVIDER, str(provider or ""), count, 0.0)
+            for provider, count in queryset.values("provider")
+            .annotate(count=Count("id"))
+            .values_list("provider", "count")
+        ]
+    if name == "treatment":
+        return [
+            (TREATMENTS_BY_MONTH, month_key(month), count, 0.0)
+            for month, count in queryset.annotate(month=TruncMonth("applied_at"))
+            .values("month")
+            .annotate(count=Count("id"))
+            .values_list("month", "count")
+        ]
+    return []
+
+
+def record_deleted(queryset):
+    # Para borrados masivos sin señales; se llama antes de borrar las filas.
+    apply(removed=totals(queryset))
+
+
+def record_restored(queryset):
+    # Para filas que vuelven sin señales (app.archive.restore).
+    apply(added=totals(queryset))
+
+
+def rebuild():
+    """Recalcula todos los contadores desde las tablas."""
+    from .models import Client, DashboardStat, Pet, Product, Treatment
+
+    # Client.objects y Pet.objects ya dejan afuera las filas borradas.
+    rows = [
+        row
+        for model in [Client, Pet, Product, Treatment]
+        for row in totals(model.objects.all())
+    ]
+
+    with transaction.atomic():
+        DashboardStat.objects.all().delete()
+        DashboardStat.objects.bulk_create(
+            DashboardStat(metric=metric, key=key, count=count, total=total)
+            for metric, key, count, total in rows
+        )
+
+    return len(rows)
+
+
+def dashboard():
+    from .models import DashboardStat, Provider
+
+    stats = DashboardStat.objects.filter(count__gt=0)
+    totals = dict(
+        stats.filter(
+            Q(metric=CLIENTS) | Q(metric=TREATMENTS_BY_MONTH, key=month_key(timezone.now()))
+        ).values_list("metric", "count")
+    )
+
+    breeds = [
+        {"breed": key or "Sin raza", "count": count, "average_weight": total / count}
+        for key, count, total in stats.filter(metric=PETS_BY_BREED)
+        .order_by("-count", "key")
+        .values_list("key", "count", "total")[:TOP]
+    ]
+
+    providers = list(
+        stats.filter(metric=PRODUCTS_BY_PROVIDER)
+        .order_by("-count", "key")
+        .values_list("key", "count")[:TOP]
+    )
+    names = dict(
+        Provider.objects.filter(id__in=[key for key, _ in providers if key]).values_list(
+            "id", "name"
+        )
+    )
+
+    return {
+        "clients": totals.get(CLIENTS, 0),
+        "treatments_this_month": totals.get(TREATMENTS_BY_MONTH, 0),
+        "breeds": breeds,
+        "providers": [
+            {"name": names.get(int(key), "-") if key else "Sin proveedor", "count": count}
+            for key, count in providers
+        ],
+    }
@@ -0,0 +1,50 @@
+import secrets
+
+from django import template
+from django.utils.safestring import mark_safe
+
+from app.cache import get_or_build
+
+register = template.Library()
+
+
+class CachedRowsNode(template.Node):
+    def __init__(self, nodelist, key_parts):
+        self.nodelist = nodelist
+        self.key_parts = key_parts
+
+    def render(self, context):
+        key = ":".join(str(part.resolve(context)) for part in self.key_parts)
+        nonce, html = get_or_build(f"fragment:{key}", lambda: self.render_fragment(context))
+
+        # El HTML guardado tiene un marcador en lugar del token CSRF, que es
+        # distinto para cada navegador: se reemplaza por el de este request.
+        if nonce in html:
+            html = html.replace(nonce, str(context.get("csrf_token", "")))
+
+        return mark_safe(html)
+
+    def render_fragment(self, context):
+        nonce = secrets.token_hex(16)
+        with context.push(csrf_token=nonce):
+            return nonce, self.nodelist.render(context)
+
+
+@register.tag
+def cached_rows(parser, token):
+    """
+    Guarda en la cache el HTML del bloque, p. ej. el <tbody> de un listado:
+
+        {% cached_rows rows_key "tbody" %} ... {% endcached_rows %}
+
+    `rows_key` viene de app.cache.version_key, así que cambia con las
+    versiones de los modelos y la página pedida. Los {% csrf_token %} del
+    bloque siguen funcionando.
+    """
+    key_parts = [parser.compile_filter(part) for part in token.split_contents()[1:]]
+    if not key_parts:
+        raise template.TemplateSyntaxError("cached_rows necesita una clave")
+
+    nodelist = parser.parse(("endcached_rows",))
+    parser.delete_first_token()
+    return CachedRowsNode(nodelist, key_parts)
@@ -1,12 +1,161 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import re
+import tempfile
+import time
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import OperationalError, connection, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import F
+from django import test
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.shortcuts import reverse
-from app.models import Client, Provider, Pet
+from django.utils.timezone import now as timezone_now
+from datetime import datetime, timedelta, timezone
+
+from app import search, stats, views
+from app.cache import reset_cache_stats
+from app.metrics import reset_metrics
+from app.middleware import STICKY_COOKIE, replica_view
+from app.imports import import_rows
+from app.models import (
+    ArchivedClient,
+    ArchivedPet,
+    ArchivedTreatment,
+    ArchivedWeightMeasurement,
+    Client,
+    DashboardStat,
+    Medicine,
+    Provider,
+    Pet,
+    Product,
+    StockMovement,
+    Treatment,
+    Vet,
+    WeightMeasurement,
+)
+
+
+class TestCase(test.TestCase):
+    # Los tests usan la cache configurada. La base (con las versiones de
+    # app.cache) vuelve atrás después de cada test y la cache no: se vacía
+    # antes, para no servir páginas guardadas por otro test.
+    def run(self, result=None):
+        cache.clear()
+        return super().run(result)
+
+
+class TransactionTestCase(test.TransactionTestCase):
+    def run(self, result=None):
+        cache.clear()
+        return super().run(result)
+
+
+class QueryCountTestMixin:
+    # Las vistas de listado deben resolver cada página con una cantidad fija
+    # de consultas, sin importar cuántas filas (y relaciones) se muestren.
+    # La primera consulta siempre es la de ModelVersion (ETag y cache).
+    def assertListViewQueries(self, url_name, expected, data=None):
+        with self.assertNumQueries(expected):
+            response = self.client.get(reverse(url_name), data)
+
+        self.assertEqual(response.status_code, 200)
+        return response
 
 class HomePageTest(TestCase):
     def test_use_home_template(self):
         response = self.client.get(reverse("home"))
         self.assertTemplateUsed(response, "home.html")
 
+    def test_assets_are_served_by_the_app(self):
+        response = self.client.get(reverse("home"))
+        self.assertNotContains(response, "cdn.jsdelivr.net")
+        self.assertContains(response, "/static/vendor/bootstrap/css/bootstrap.min.css")
+
+        for path in [
+            "vendor/bootstrap/css/bootstrap.min.css",
+            "vendor/bootstrap/js/bootstrap.bundle.min.js",
+            "vendor/bootstrap-icons/bootstrap-icons.min.css",
+            "vendor/bootstrap-icons/fonts/bootstrap-icons.woff2",
+        ]:
+            response = self.client.get(f"/static/{path}")
+            self.assertEqual(response.status_code, 200, path)
+            self.assertTrue(b"".join(response.streaming_content))
+
+
+class DashboardStatsTest(TestCase):
+    def setUp(self):
+        self.owner = Client.objects.create(name="Ramón Pérez", phone="221555232", email="rp@mail.com")
+        self.provider = Provider.objects.create(name="Droguería Sur", email="sur@mail.com", address="Calle 1")
+
+    def create_pet(self, breed, weight):
+        return Pet.objects.create(
+            name="Toby", breed=breed, birthday="2020-01-01", weight=weight, client=self.owner
+        )
+
+    def stored_stats(self):
+        return sorted(
+            DashboardStat.objects.filter(count__gt=0).values_list("metric", "key", "count", "total")
+        )
+
+    def test_home_reads_precomputed_stats(self):
+        self.create_pet("Labrador", 30)
+        self.create_pet("Labrador", 20)
+        self.create_pet("Caniche", 5)
+        Product.objects.create(name="Alimento", type="Alimento", price=100, provider=self.provider)
+        vet = Vet.objects.create(name="Dra. Gómez", email="vet@mail.com", phone=221555)
+        medicine = Medicine.objects.create(name="Amoxicilina", description="Antibiótico", dose=3)
+        Treatment.save_treatment(self.create_pet("Beagle", 12), {"medicines": medicine.id, "vet": vet.id})
+
+        # Totales, razas, proveedores y sus nombres: sin COUNT sobre las tablas.
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("home"))
+
+        stats = response.context["stats"]
+        self.assertEqual(stats["clients"], 1)
+        self.assertEqual(stats["treatments_this_month"], 1)
+        self.assertEqual(stats["breeds"][0], {"breed": "Labrador", "count": 2, "average_weight": 25})
+        self.assertEqual(stats["providers"], [{"name": "Droguería Sur", "count": 1}])
+
+    def test_updates_and_deletes_adjust_the_counters(self):
+        pet = self.create_pet("Labrador", 30)
+        pet.update_pet({"breed": "Caniche", "weight": "6"})
+
+        self.assertEqual(
+            self.stored_stats(),
+            [("clients", "", 1, 0), ("pets_by_breed", "Caniche", 1, 6)],
+        )
+
+        # Borrar al dueño borra sus mascotas en cascada.
+        self.owner.delete()
+        self.assertEqual(self.stored_stats(), [])
+
+    def test_rollup_matches_incremental_counters(self):
+        self.create_pet("Labrador", 30)
+        self.create_pet("Caniche", 5).delete()
+        Client.objects.create(name="Guido Carrillo", phone="221232555", email="gc@mail.com")
+        import_rows(
+            "clients",
+            [(1, {"name": "Lucía Díaz", "phone": "221232555", "email": "ld@mail.com"})],
+            batch_size=10,
+        )
+        incremental = self.stored_stats()
+
+        call_command("rollup_dashboard", stdout=io.StringIO())
+
+        self.assertEqual(self.stored_stats(), incremental)
+        self.assertEqual(self.client.get(reverse("home")).context["stats"]["clients"], 3)
+
 
 class ClientsTest(TestCase):
     def test_repo_use_repo_template(self):
@@ -68,6 +217,26 @@ class ClientsTest(TestCase):
 
         self.assertContains(response, "Por favor ingrese un email valido")
 
+    def test_validation_duplicated_email(self):
+        Client.objects.create(
+            name="Juan Sebastián Veron", phone="221555232", email="brujita75@hotmail.com"
+        )
+        other = Client.objects.create(
+            name="Guido Carrillo", phone="221232555", email="goleador@gmail.com"
+        )
+
+        response = self.client.post(
+            reverse("clients_form"),
+            data={"name": "Otro", "phone": "221555232", "email": "Brujita75@Hotmail.com"},
+        )
+        self.assertContains(response, "Ya existe un cliente con ese email")
+
+        response = self.client.post(
+            reverse("clients_form"), data={"id": other.id, "email": "brujita75@hotmail.com"}
+        )
+        self.assertContains(response, "Ya existe un cliente con ese email")
+        self.assertEqual(Client.objects.get(pk=other.id).email, "goleador@gmail.com")
+
     def test_edit_user_with_valid_data(self):
         client = Client.objects.create(
             name="Juan Sebastián Veron",
@@ -94,6 +263,61 @@ class ClientsTest(TestCase):
         self.assertEqual(editedClient.email, client.email)
 
 
+    @override_settings(REPOSITORY_PAGE_SIZE=2)
+    def test_repo_paginates_clients_with_cursor(self):
+        clients = [
+            Client.objects.create(
+                name=f"Cliente {i}",
+                phone="221555232",
+                email=f"cliente{i}@hotmail.com",
+            )
+            for i in range(5)
+        ]
+
+        response = self.client.get(reverse("clients_repo"))
+        page = response.context["page"]
+
+        self.assertEqual([c.id for c in page], [clients[0].id, clients[1].id])
+        self.assertFalse(page.has_previous)
+        self.assertEqual(page.next_cursor, clients[1].id)
+        self.assertContains(response, f"?after={clients[1].id}")
+
+        response = self.client.get(reverse("clients_repo"), {"after": page.next_cursor})
+        page = response.context["page"]
+
+        self.assertEqual([c.id for c in page], [clients[2].id, clients[3].id])
+        self.assertEqual(page.previous_cursor, clients[2].id)
+        self.assertEqual(page.next_cursor, clients[3].id)
+
+        response = self.client.get(
+            reverse("clients_repo"), {"before": page.previous_cursor}
+        )
+        page = response.context["page"]
+
+        self.assertEqual([c.id for c in page], [clients[0].id, clients[1].id])
+        self.assertFalse(page.has_previous)
+        self.assertTrue(page.has_next)
+
+    def test_repo_page_size_is_configurable_and_bounded(self):
+        for i in range(3):
+            Client.objects.create(
+                name=f"Cliente {i}",
+                phone="221555232",
+                email=f"cliente{i}@hotmail.com",
+            )
+
+        response = self.client.get(reverse("clients_repo"), {"page_size": 1})
+        self.assertEqual(len(response.context["clients"]), 1)
+        self.assertTrue(response.context["page"].has_next)
+
+        response = self.client.get(reverse("clients_repo"), {"page_size": 0})
+        self.assertEqual(len(response.context["clients"]), 1)
+
+        response = self.client.get(reverse("clients_repo"), {"after": "abc"})
+        self.assertEqual(len(response.context["clients"]), 3)
+        self.assertFalse(response.context["page"].has_next)
+
+
 
 class ProvidersTest(TestCase):
 
@@ -179,7 +403,7 @@ class ProvidersTest(TestCase):
         self.assertEqual(edited_provider.address, provider.address)
 
 # TEST DE PET
-class PetsTest(TestCase):
+class PetsTest(QueryCountTestMixin, TestCase):
     
     # creacion de mascota
     def test_can_create_pet(self):
@@ -236,8 +460,245 @@ class PetsTest(TestCase):
 
         self.assertContains(response, "La fecha de nacimiento no puede ser mayor o igual a la fecha actual")
 
+    def test_edit_pet_changes_owner(self):
+        old_owner = Client.objects.create(name="Viejo", phone="221555232", email="v@mail.com")
+        new_owner = Client.objects.create(name="Nuevo", phone="221555232", email="n@mail.com")
+        pet = Pet.objects.create(
+            name="Toby", breed="Labrador", birthday="2020-01-01", weight=10, client=old_owner
+        )
+
+        response = self.client.post(
+            reverse("pets_form"), data={"id": pet.id, "client": new_owner.id}
+        )
+
+        self.assertRedirects(response, reverse("pets_repo"))
+        self.assertEqual(Pet.objects.get(pk=pet.id).client, new_owner)
+
+    def test_repo_loads_owners_without_extra_queries(self):
+        for i in range(5):
+            client = Client.objects.create(
+                name=f"Dueño {i}", phone="221555232", email=f"duenio{i}@mail.com"
+            )
+            Pet.objects.create(
+                name=f"Mascota {i}",
+                breed="Labrador",
+                birthday="2020-01-01",
+                weight=10,
+                client=client,
+            )
+
+        response = self.assertListViewQueries("pets_repo", 2)
+
+        self.assertContains(response, "Dueño 0")
+        self.assertContains(response, "Dueño 4")
+
+
+class PetWeightTest(TestCase):
+    def setUp(self):
+        self.pet, _ = Pet.save_pet(
+            {"name": "Toby", "breed": "Labrador", "birthday": "2020-01-01", "weight": "10"}
+        )
+
+    def test_every_weight_change_is_recorded(self):
+        self.pet.update_pet({"name": "Toby"})
+        self.pet.update_pet({"weight": "10.000"})
+        self.pet.update_pet({"weight": "11.5"})
+
+        weights = list(self.pet.weights.order_by("measured_at").values_list("weight", flat=True))
+        self.assertEqual([float(weight) for weight in weights], [10, 11.5])
+
+    def test_endpoint_downsamples_the_requested_range(self):
+        now = timezone_now()
+        WeightMeasurement.objects.bulk_create(
+            WeightMeasurement(pet=self.pet, weight=10 + week % 5, measured_at=now - timedelta(weeks=week))
+            for week in range(1, 300)
+        )
+        url = reverse("pets_weight", args=(self.pet.id,))
+
+        data = self.client.get(url, {"points": 50}).json()
+        self.assertEqual(data["total"], 300)
+        self.assertEqual(len(data["points"]), 50)
+        self.assertEqual(data["points"][-1][1], 10)
+
+        start = (now - timedelta(weeks=10)).date().isoformat()
+        data = self.client.get(url, {"start": start, "points": 50}).json()
+        self.assertIn(data["total"], (10, 11))
+        self.assertEqual(len(data["points"]), data["total"])
+
+    def test_endpoint_rejects_invalid_parameters(self):
+        url = reverse("pets_weight", args=(self.pet.id,))
+
+        response = self.client.get(url, {"start": "ayer", "points": "muchos"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            set(response.json()["errors"]), {"start", "points"}
+        )
+
+        response = self.client.get(reverse("pets_weight", args=(self.pet.id + 1,)))
+        self.assertEqual(response.status_code, 404)
+
+
+class PetOwnerConcurrencyTest(TransactionTestCase):
+    def save_with_retry(self, pet_data):
+        # La base de tests en memoria de SQLite no espera a que se libere un
+        # lock (responde "table is locked"), así que se reintenta la transacción.
+        while True:
+            try:
+                with transaction.atomic():
+                    pet, errors = Pet.save_pet(pet_data)
+                return pet
+            except OperationalError as error:
+                if "locked" not in str(error):
+                    raise
+                time.sleep(0.001)
+
+    def test_parallel_creates_never_cross_link_owners(self):
+        owners = [
+            Client.objects.create(name=f"Dueño {i}", phone="221555232", email=f"d{i}@mail.com")
+            for i in range(8)
+        ]
+
+        def create_pets(owner):
+            try:
+                created = []
+                for n in range(5):
+                    pet = self.save_with_retry(
+                        {
+                            "name": f"{owner.name} - {n}",
+                            "breed": "Labrador",
+                            "birthday": "2020-01-01",
+                            "weight": "10",
+                            "client": str(owner.id),
+                        }
+                    )
+                    created.append(pet.id)
+                return owner.id, created
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=len(owners)) as executor:
+            results = list(executor.map(create_pets, owners))
+
+        for owner_id, pet_ids in results:
+            pets = Pet.objects.filter(id__in=pet_ids).select_related("client")
+            self.assertEqual(len(pets), 5)
+            for pet in pets:
+                self.assertEqual(pet.client_id, owner_id)
+                self.assertTrue(pet.name.startswith(pet.client.name))
+
+
+class AutocompleteTest(TestCase):
+    def setUp(self):
+        for name in ["Ramón Pérez", "ramiro Gómez", "Raúl Díaz", "Guido Carrillo"]:
+            Client.objects.create(name=name, phone="221555232", email=f"{name[:5]}@mail.com")
+
+    def test_clients_prefix_search_is_case_insensitive_and_sorted(self):
+        response = self.client.get(reverse("clients_autocomplete"), {"q": "RAM"})
+
+        self.assertEqual(
+            [result["name"] for result in response.json()["results"]],
+            ["ramiro Gómez", "Ramón Pérez"],
+        )
+
+    def test_prefix_search_ignores_accents_and_case_of_non_ascii_letters(self):
+        angel = Client.objects.create(name="Ángel Ruiz", phone="221555232", email="angel@mail.com")
+        nandu = Client.objects.create(name="Ñandú SA", phone="221555232", email="nandu@mail.com")
+
+        for query, expected in [("Án", angel), ("án", angel), ("ÁN", angel), ("an", angel), ("ñ", nandu), ("Ñ", nandu)]:
+            response = self.client.get(reverse("clients_autocomplete"), {"q": query})
+            self.assertEqual(response.json()["results"], [{"id": expected.id, "name": expected.name}], query)
+
+        nandu.update_client({"name": "Ñoño Pérez"})
+        self.assertEqual(list(Client.objects.name_prefix("ÑOÑ").values_list("id", flat=True)), [nandu.id])
+
+    @override_settings(AUTOCOMPLETE_LIMIT=2)
+    def test_results_are_limited(self):
+        response = self.client.get(reverse("clients_autocomplete"), {"q": "r"})
+        self.assertEqual(len(response.json()["results"]), 2)
+
+        response = self.client.get(reverse("clients_autocomplete"), {"q": ""})
+        self.assertEqual(response.json()["results"], [])
+
+    def test_providers_prefix_search(self):
+        provider = Provider.objects.create(name="Droguería Sur", email="sur@mail.com", address="Calle 1")
+
+        response = self.client.get(reverse("providers_autocomplete"), {"q": "drog"})
+
+        self.assertEqual(response.json()["results"], [{"id": provider.id, "name": "Droguería Sur"}])
+
+    def test_pet_form_does_not_load_clients(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("pets_form"))
+
+        self.assertContains(response, reverse("clients_autocomplete"))
+        self.assertNotContains(response, "Ramón Pérez")
+
+
+class PetHistoryTest(QueryCountTestMixin, TestCase):
+    def setUp(self):
+        self.pet = Pet.objects.create(
+            name="Toby", breed="Labrador", birthday="2020-01-01", weight=10
+        )
+        self.vet = Vet.objects.create(name="Dra. Gómez", email="vet@mail.com", phone=221555)
+        self.medicine = Medicine.objects.create(
+            name="Amoxicilina", description="Antibiótico", dose=3
+        )
+
+    def create_treatment(self, day):
+        return Treatment.objects.create(
+            pet=self.pet,
+            vet=self.vet,
+            medicine=self.medicine,
+            dose=2,
+            applied_at=datetime(2024, 1, day, tzinfo=timezone.utc),
+        )
+
+    def test_history_is_reverse_chronological_and_paginated(self):
+        middle = self.create_treatment(15)
+        newest = self.create_treatment(20)
+        oldest = self.create_treatment(1)
+        url = reverse("pets_history", args=(self.pet.id,))
+
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {"page_size": 2})
+        page = response.context["page"]
+
+        self.assertEqual([t.id for t in page], [newest.id, middle.id])
+        self.assertTrue(page.has_next)
+
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {"page_size": 2, "after": page.next_cursor})
+        page = response.context["page"]
+
+        self.assertEqual([t.id for t in page], [oldest.id])
+        self.assertFalse(page.has_next)
+        self.assertContains(response, "Amoxicilina")
+        self.assertContains(response, "Dra. Gómez")
+
+    def test_can_add_treatment_with_medicine_dose_by_default(self):
+        response = self.client.post(
+            reverse("pets_form_history", args=(self.pet.id,)),
+            data={"medicines": self.medicine.id, "vet": self.vet.id},
+        )
+
+        self.assertRedirects(response, reverse("pets_history", args=(self.pet.id,)))
 
-class ProductsTest(TestCase):
+        treatment = Treatment.objects.get(pet=self.pet)
+        self.assertEqual(treatment.vet, self.vet)
+        self.assertEqual(treatment.medicine, self.medicine)
+        self.assertEqual(treatment.dose, 3)
+
+    def test_treatment_validation_errors(self):
+        response = self.client.post(
+            reverse("pets_form_history", args=(self.pet.id,)),
+            data={"medicines": self.medicine.id, "vet": self.vet.id, "dose": 20},
+        )
+
+        self.assertContains(response, "La dosis debe estar en un rango de 1 a 10")
+        self.assertFalse(Treatment.objects.exists())
+
+
+class ProductsTest(QueryCountTestMixin, TestCase):
     def test_validation_invalid_price(self):
         # client es un objeto que proporciona Django para simular solicitudes HTTP en tus tests.
         response = self.client.post(
@@ -250,7 +711,134 @@ class ProductsTest(TestCase):
         )
 
         self.assertContains(response, "El precio debe ser mayor que cero")
+
+    def test_can_create_product_with_provider(self):
+        provider = Provider.objects.create(
+            name="Droguería Sur", email="sur@mail.com", address="Calle 1"
+        )
+
+        response = self.client.post(
+            reverse("products_form"),
+            data={"name": "Amoxicilina", "type": "Antibiótico", "price": 100, "provider": provider.id},
+        )
+
+        self.assertRedirects(response, reverse("products_repo"))
+        self.assertEqual(Product.objects.get(name="Amoxicilina").provider, provider)
+
+    def test_product_provider_must_exist(self):
+        provider = Provider.objects.create(
+            name="Droguería Sur", email="sur@mail.com", address="Calle 1"
+        )
+
+        for value in ["abc", "999999"]:
+            response = self.client.post(
+                reverse("products_form"),
+                data={"name": "Amoxicilina", "type": "Antibiótico", "price": 100, "provider": value},
+            )
+            self.assertContains(response, "El proveedor seleccionado no existe")
+        self.assertFalse(Product.objects.exists())
+
+        product = Product.objects.create(name="Amoxicilina", type="Antibiótico", price=100, provider=provider)
+        response = self.client.post(
+            reverse("products_form"),
+            data={"id": product.id, "name": "Amoxicilina", "type": "Antibiótico", "price": 100, "provider": "999999"},
+        )
+        self.assertContains(response, "El proveedor seleccionado no existe")
+        product.refresh_from_db()
+        self.assertEqual(product.provider, provider)
+
+    def test_repo_loads_providers_without_extra_queries(self):
+        for i in range(5):
+            provider = Provider.objects.create(
+                name=f"Proveedor {i}", email=f"proveedor{i}@mail.com", address="Calle 1"
+            )
+            Product.objects.create(
+                name=f"Producto {i}", type="Alimento", price=100, provider=provider
+            )
+
+        response = self.assertListViewQueries("products_repo", 2)
+
+        self.assertContains(response, "Proveedor 0")
+        self.assertContains(response, "Proveedor 4")
         
+class StockTest(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="Amoxicilina", type="Antibiótico", price=100)
+        self.url = reverse("products_stock", args=(self.product.id,))
+
+    def test_can_register_movements(self):
+        response = self.client.post(self.url, {"kind": "purchase", "quantity": "12", "note": "Remito 44"})
+        self.assertRedirects(response, self.url)
+
+        self.client.post(self.url, {"kind": "sale", "quantity": "5"})
+
+        response = self.client.get(self.url)
+        self.assertContains(response, "Remito 44")
+        self.assertContains(response, "-5")
+        self.assertEqual(response.context["product"].stock, 7)
+
+        response = self.client.get(reverse("products_repo"))
+        self.assertContains(response, "<td>7</td>", html=True)
+
+    def test_sale_over_stock_shows_error(self):
+        response = self.client.post(self.url, {"kind": "sale", "quantity": "1"})
+
+        self.assertContains(response, "No hay stock suficiente")
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_rollup_fixes_stock_that_drifted_from_the_ledger(self):
+        StockMovement.save_movement(self.product.id, {"kind": "purchase", "quantity": "8"})
+        Product.objects.filter(pk=self.product.id).update(stock=3)
+
+        stdout = io.StringIO()
+        call_command("rollup_stock", stdout=stdout)
+        self.assertIn("stock 3, movimientos 8", stdout.getvalue())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+
+        call_command("rollup_stock", "--fix", stdout=stdout)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 8)
+
+        stdout = io.StringIO()
+        call_command("rollup_stock", stdout=stdout)
+        self.assertIn("0 productos con diferencias", stdout.getvalue())
+
+
+class StockConcurrencyTest(TransactionTestCase):
+    def sell_with_retry(self, product_id):
+        # Igual que en PetOwnerConcurrencyTest: la base en memoria responde
+        # "table is locked" en vez de esperar.
+        while True:
+            try:
+                movement, errors = StockMovement.save_movement(
+                    product_id, {"kind": "sale", "quantity": "1"}
+                )
+                return bool(movement)
+            except OperationalError as error:
+                if "locked" not in str(error):
+                    raise
+                time.sleep(0.001)
+
+    def test_parallel_sales_never_oversell(self):
+        product = Product.objects.create(name="Amoxicilina", type="Antibiótico", price=100)
+        StockMovement.save_movement(product.id, {"kind": "purchase", "quantity": "25"})
+
+        def sell(_):
+            try:
+                return [self.sell_with_retry(product.id) for _ in range(10)]
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = [sold for batch in executor.map(sell, range(8)) for sold in batch]
+
+        product.refresh_from_db()
+        self.assertEqual(results.count(True), 25)
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(product.stock_movements.filter(kind="sale").count(), 25)
+
+
 class MedicinesTest(TestCase):
     def test_validation_invalid_dose(self):
         # client es un objeto que proporciona Django para simular solicitudes HTTP en tus tests.
@@ -265,3 +853,942 @@ class MedicinesTest(TestCase):
 
         self.assertContains(response, "La dosis debe estar en un rango de 1 a 10")
 
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.owner = Client.objects.create(
+            name="Ramón Pérez", phone="221555232", email="rp@mail.com"
+        )
+        self.pet = Pet.objects.create(
+            name="Toby",
+            breed="Labrador",
+            birthday="2020-01-01",
+            weight=10,
+            client=self.owner,
+        )
+
+    def test_finds_pet_by_breed_and_owner_ignoring_accents(self):
+        response = self.client.get(reverse("search"), {"q": "labrador perez"})
+
+        self.assertTemplateUsed(response, "search/results.html")
+        self.assertEqual(
+            [(r["kind"], r["id"]) for r in response.context["results"]],
+            [("pet", self.pet.id)],
+        )
+
+    def test_ranks_name_matches_first(self):
+        Pet.objects.create(
+            name="Luna", breed="Caniche", birthday="2020-01-01", weight=5, client=self.owner
+        )
+
+        response = self.client.get(reverse("search"), {"q": "Ramon"})
+        kinds = [r["kind"] for r in response.context["results"]]
+
+        self.assertEqual(kinds, ["client", "pet", "pet"])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.owner.update_client({"name": "Ramón Gómez"})
+
+        response = self.client.get(reverse("search"), {"q": "perez"})
+        self.assertEqual(response.context["results"], [])
+
+        response = self.client.get(reverse("search"), {"q": "toby gomez"})
+        self.assertEqual(len(response.context["results"]), 1)
+
+        self.owner.delete()
+
+        response = self.client.get(reverse("search"), {"q": "toby"})
+        self.assertEqual(response.context["results"], [])
+
+    @override_settings(SEARCH_PAGE_SIZE=1)
+    def test_results_are_paginated(self):
+        response = self.client.get(reverse("search"), {"q": "ramon"})
+        self.assertEqual(len(response.context["results"]), 1)
+        self.assertTrue(response.context["has_next"])
+
+        response = self.client.get(reverse("search"), {"q": "ramon", "page": 2})
+        self.assertEqual(len(response.context["results"]), 1)
+        self.assertFalse(response.context["has_next"])
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.owner = Client.objects.create(
+            name="Ramón Pérez", phone="221555232", email="rp@mail.com", address="13 y 44"
+        )
+        Pet.objects.create(
+            name="Toby", breed="Labrador", birthday="2020-01-01", weight=10, client=self.owner
+        )
+
+    def read(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_streams_clients_as_csv(self):
+        response = self.client.get(reverse("export", args=("clients", "csv")))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(
+            self.read(response).decode().splitlines(),
+            [
+                "id,name,phone,email,address",
+                f"{self.owner.id},Ramón Pérez,221555232,rp@mail.com,13 y 44",
+            ],
+        )
+
+    def test_streams_pets_as_gzipped_json_lines(self):
+        response = self.client.get(
+            reverse("export", args=("pets", "jsonl")), {"gzip": "1"}
+        )
+
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn("pets.jsonl.gz", response["Content-Disposition"])
+
+        rows = [json.loads(line) for line in gzip.decompress(self.read(response)).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["name"], "Toby")
+        self.assertEqual(rows[0]["birthday"], "2020-01-01")
+        self.assertEqual(rows[0]["client_id"], self.owner.id)
+
+    def test_unknown_export_returns_404(self):
+        response = self.client.get(reverse("export", args=("users", "csv")))
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get(reverse("export", args=("clients", "xml")))
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "clients.csv")
+            call_command("export_data", "clients", "--output", path, "--chunk-size", "1")
+
+            with open(path, encoding="utf-8") as exported:
+                self.assertIn("Ramón Pérez", exported.read())
+
+
+class ImportTest(TestCase):
+    def write_file(self, directory, filename, content):
+        path = os.path.join(directory, filename)
+        with open(path, "w", encoding="utf-8") as output:
+            output.write(content)
+        return path
+
+    def test_command_imports_valid_rows_and_reports_errors(self):
+        content = (
+            "name,phone,email,address\n"
+            "Ramón Pérez,221555232,rp@mail.com,13 y 44\n"
+            ",221555232,sin-nombre@mail.com,\n"
+            "Guido Carrillo,221232555,goleador@mail.com,1 y 57\n"
+            "Telefono Malo,abc,malo@mail.com,\n"
+        )
+        stderr = io.StringIO()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.write_file(directory, "clients.csv", content)
+            call_command("import_data", "clients", path, "--batch-size", "1", stderr=stderr)
+
+        self.assertEqual(
+            sorted(Client.objects.values_list("name", flat=True)),
+            ["Guido Carrillo", "Ramón Pérez"],
+        )
+        self.assertIn("Línea 3: name: Por favor ingrese un nombre", stderr.getvalue())
+        self.assertIn("Línea 5: row: El formato del teléfono es inválido.", stderr.getvalue())
+
+    def test_duplicated_emails_are_reported_per_row(self):
+        Client.objects.create(name="Ramón Pérez", phone="221555232", email="rp@mail.com")
+        rows = [
+            (2, {"name": "Otro Ramón", "phone": "221555232", "email": "RP@mail.com"}),
+            (3, {"name": "Guido", "phone": "221232555", "email": "gc@mail.com"}),
+            (4, {"name": "Guido bis", "phone": "221232555", "email": "gc@mail.com"}),
+        ]
+
+        report = import_rows("clients", rows, batch_size=10)
+
+        self.assertEqual(report.created, 1)
+        self.assertEqual([line for line, _ in report.errors], [2, 4])
+
+    def test_pets_resolve_owner_by_id_or_email(self):
+        owner = Client.objects.create(name="Ramón Pérez", phone="221555232", email="rp@mail.com")
+        rows = [
+            (1, {"name": "Toby", "breed": "Labrador", "birthday": "2020-01-01",
+                 "weight": 10, "client": "RP@mail.com"}),
+            (2, {"name": "Luna", "breed": "Caniche", "birthday": "2021-05-01",
+                 "weight": 4.5, "client": owner.id}),
+            (3, {"name": "Rex", "breed": "Ovejero", "birthday": "2019-01-01",
+                 "weight": 30, "client": "nadie@mail.com"}),
+            (4, None),
+        ]
+
+        report = import_rows("pets", rows, batch_size=10)
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual([line for line, _ in report.errors], [3, 4])
+        self.assertEqual(Pet.objects.filter(client=owner).count(), 2)
+
+        response = self.client.get(reverse("search"), {"q": "labrador perez"})
+        self.assertEqual(len(response.context["results"]), 1)
+
+    def test_upload_view_imports_json_lines(self):
+        upload = SimpleUploadedFile(
+            "providers.jsonl",
+            b'{"name": "Droguer\\u00eda Sur", "email": "sur@mail.com", "address": "Calle 1"}\n'
+            b'{"name": "Sin email", "address": "Calle 2"}\n',
+        )
+
+        response = self.client.post(
+            reverse("imports_form"), {"name": "providers", "file": upload}
+        )
+
+        self.assertContains(response, "1 registros importados, 1 con errores")
+        self.assertTrue(Provider.objects.filter(name="Droguería Sur").exists())
+
+    def test_upload_view_rejects_unknown_format(self):
+        upload = SimpleUploadedFile("clients.xlsx", b"")
+
+        response = self.client.post(reverse("imports_form"), {"name": "clients", "file": upload})
+
+        self.assertContains(response, "El archivo debe ser .csv o .jsonl")
+
+
+class BatchDeleteTest(TestCase):
+    def setUp(self):
+        self.vet = Vet.objects.create(name="Dra. Gómez", email="vet@mail.com", phone=221555)
+        medicine = Medicine.objects.create(name="Amoxicilina", description="Antibiótico", dose=3)
+        self.clients = []
+
+        for i in range(3):
+            owner = Client.objects.create(name=f"Cliente {i}", phone="221555232", email=f"c{i}@mail.com")
+            self.clients.append(owner)
+            for _ in range(2):
+                pet = Pet.save_pet(
+                    {"name": "Toby", "breed": "Labrador", "birthday": "2020-01-01", "weight": "10", "client": owner.id}
+                )[0]
+                Treatment.save_treatment(pet, {"medicines": medicine.id, "vet": self.vet.id})
+
+    def delete(self, name, ids, **kwargs):
+        return self.client.post(
+            reverse("delete_selected", args=(name,)), {"ids": ids}, follow=True, **kwargs
+        )
+
+    def test_deletes_selected_clients_with_their_pets(self):
+        kept = self.clients[2]
+        ids = [self.clients[0].id, self.clients[1].id]
+
+        response = self.delete("clients", ids)
+
+        self.assertRedirects(response, reverse("clients_repo"))
+        self.assertContains(response, "Se eliminaron 2 clientes y 4 mascotas")
+        self.assertEqual(list(Client.objects.values_list("id", flat=True)), [kept.id])
+        self.assertEqual(Pet.objects.count(), 2)
+
+        # Borrado lógico: las filas siguen, con la misma fecha de borrado, y
+        # los tratamientos y pesajes quedan hasta archivarlas.
+        self.assertEqual(
+            set(Client.all_objects.filter(pk__in=ids).values_list("deleted_at", flat=True))
+            | set(Pet.all_objects.filter(client__in=ids).values_list("deleted_at", flat=True)),
+            {Client.all_objects.get(pk=ids[0]).deleted_at},
+        )
+        self.assertEqual(WeightMeasurement.objects.count(), 6)
+        self.assertEqual(Treatment.objects.count(), 6)
+
+        # Sin señales: los contadores del inicio y el índice de búsqueda se
+        # actualizan igual.
+        stats = dict(DashboardStat.objects.values_list("metric", "count"))
+        self.assertEqual(stats["clients"], 1)
+        self.assertEqual(stats["pets_by_breed"], 2)
+        results = self.client.get(reverse("search"), {"q": "Cliente"}).context["results"]
+        self.assertEqual(
+            [(result["kind"], result["id"]) for result in results if result["kind"] == "client"],
+            [("client", kept.id)],
+        )
+        self.assertEqual(len(results), 3)
+
+    def test_query_count_does_not_grow_with_the_selection(self):
+        def count_queries(ids):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(reverse("delete_selected", args=("clients",)), {"ids": ids})
+            return len(queries)
+
+        self.assertEqual(
+            count_queries([self.clients[0].id]),
+            count_queries([self.clients[1].id, self.clients[2].id]),
+        )
+
+    @override_settings(DELETE_BATCH_SIZE=1)
+    def test_deletes_in_batches(self):
+        response = self.delete("clients", [owner.id for owner in self.clients])
+
+        self.assertContains(response, "Se eliminaron 3 clientes y 6 mascotas")
+        self.assertFalse(Client.objects.exists())
+        self.assertFalse(
+            DashboardStat.objects.filter(metric__in=["clients", "pets_by_breed"], count__gt=0).exists()
+        )
+
+    def test_deleting_providers_deletes_their_products(self):
+        provider = Provider.objects.create(name="Droguería Sur", email="sur@mail.com", address="Calle 1")
+        product = Product.objects.create(name="Alimento", type="Alimento", price=100, provider=provider)
+        StockMovement.save_movement(product.id, {"kind": "purchase", "quantity": "5"})
+
+        response = self.delete("providers", [provider.id])
+
+        self.assertContains(
+            response, "Se eliminaron 1 proveedor, 1 producto y 1 movimiento de stock"
+        )
+        self.assertFalse(Product.objects.exists())
+
+    def test_deleting_vets_keeps_their_treatments(self):
+        response = self.delete("vets", [self.vet.id])
+
+        self.assertContains(response, "Se eliminó 1 veterinario")
+        self.assertEqual(Treatment.objects.filter(vet=None).count(), 6)
+
+    def test_changes_the_repository_page(self):
+        etag = self.client.get(reverse("pets_repo"))["ETag"]
+        pet = Pet.objects.first()
+
+        self.delete("pets", [pet.id])
+
+        response = self.client.get(reverse("pets_repo"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, f'value="{pet.id}"')
+
+    def test_empty_state_spans_every_column(self):
+        Client.all_objects.all().delete()
+        Vet.objects.all().delete()
+        Medicine.objects.all().delete()
+
+        for name in ["clients_repo", "medicines_repo", "pets_repo", "products_repo", "providers_repo", "vets_repo"]:
+            html = self.client.get(reverse(name)).content.decode()
+            head = html[html.index("<thead>") : html.index("</thead>")]
+            with self.subTest(name):
+                self.assertIn(f'colspan="{len(re.findall(r"<th[ >]", head))}"', html)
+
+    def test_without_selection_shows_a_warning(self):
+        response = self.delete("clients", [])
+
+        self.assertContains(response, "No se seleccionó ningún registro")
+        self.assertEqual(Client.objects.count(), 3)
+
+    def test_ignores_ids_that_are_not_numbers(self):
+        # "²" es un dígito para isdigit() pero int() no lo acepta.
+        response = self.delete("clients", ["²", "abc"])
+
+        self.assertContains(response, "No se seleccionó ningún registro")
+        self.assertEqual(Client.objects.count(), 3)
+
+    def test_requires_post_and_a_known_list(self):
+        response = self.client.get(reverse("delete_selected", args=("clients",)))
+        self.assertEqual(response.status_code, 405)
+
+        response = self.client.post(reverse("delete_selected", args=("users",)), {"ids": [1]})
+        self.assertEqual(response.status_code, 404)
+
+
+class SoftDeleteTest(TestCase):
+    def setUp(self):
+        self.vet = Vet.objects.create(name="Dra. Gómez", email="vet@mail.com", phone=221555)
+        medicine = Medicine.objects.create(name="Amoxicilina", description="Antibiótico", dose=3)
+        self.owner = Client.objects.create(name="Ramón Pérez", phone="221555232", email="rp@mail.com")
+        self.pets = []
+        for name in ["Toby", "Luna"]:
+            pet = Pet.save_pet(
+                {"name": name, "breed": "Labrador", "birthday": "2020-01-01", "weight": "10", "client": self.owner.id}
+            )[0]
+            Treatment.save_treatment(pet, {"medicines": medicine.id, "vet": self.vet.id})
+            self.pets.append(pet)
+
+    def stored_stats(self):
+        return sorted(
+            DashboardStat.objects.filter(count__gt=0).values_list("metric", "key", "count", "total")
+        )
+
+    def delete_owner(self, days_ago=0):
+        self.client.post(reverse("clients_delete"), {"client_id": self.owner.id})
+        Client.all_objects.filter(pk=self.owner.id).update(
+            deleted_at=F("deleted_at") - timedelta(days=days_ago)
+        )
+        Pet.all_objects.filter(client=self.owner).update(
+            deleted_at=F("deleted_at") - timedelta(days=days_ago)
+        )
+
+    def archive(self, *args):
+        output = io.StringIO()
+        call_command("archive_deleted", *args, stdout=output)
+        return output.getvalue()
+
+    def restore(self, *args):
+        output = io.StringIO()
+        call_command("restore_deleted", *args, stdout=output, stderr=output)
+        return output.getvalue()
+
+    def test_delete_hides_client_and_pets_but_keeps_the_rows(self):
+        self.delete_owner()
+
+        self.assertFalse(Client.objects.exists())
+        self.assertFalse(Pet.objects.exists())
+        self.assertEqual(Client.all_objects.count(), 1)
+        self.assertEqual(Pet.all_objects.count(), 2)
+        self.assertNotContains(self.client.get(reverse("clients_repo")), "Ramón Pérez")
+
+        # El email queda libre para un cliente nuevo.
+        client, errors = Client.save_client(
+            {"name": "Ramón Pérez", "phone": "221555232", "email": "RP@mail.com", "address": "13 y 44"}
+        )
+        self.assertIsNone(errors)
+
+    def test_pets_cannot_be_given_to_a_deleted_client(self):
+        other = Client.objects.create(name="Ana Ruiz", phone="221555233", email="ar@mail.com")
+        self.delete_owner()
+
+        response = self.client.post(
+            reverse("pets_form"),
+            {"name": "Mora", "breed": "Caniche", "birthday": "2020-01-01", "weight": "5", "client": self.owner.id},
+        )
+        self.assertContains(response, "El dueño seleccionado no existe")
+        self.assertFalse(Pet.objects.exists())
+
+        pet = Pet.save_pet(
+            {"name": "Mora", "breed": "Caniche", "birthday": "2020-01-01", "weight": "5", "client": other.id}
+        )[0]
+        self.assertEqual(pet.update_pet({"client": self.owner.id}), {"client": "El dueño seleccionado no existe"})
+        self.assertEqual(pet.update_pet({"client": "x"}), {"client": "El dueño seleccionado no existe"})
+        pet.refresh_from_db()
+        self.assertEqual(pet.client_id, other.id)
+
+    def test_archive_moves_old_deleted_rows_and_their_dependents(self):
+        self.delete_owner(days_ago=31)
+        pet = Pet.save_pet(
+            {"name": "Mora", "breed": "Caniche", "birthday": "2020-01-01", "weight": "5", "client": ""}
+        )[0]
+        self.client.post(reverse("pets_delete"), {"pet_id": pet.id})
+
+        output = self.archive("--days", "30", "--batch-size", "1")
+
+        self.assertIn("7 registros archivados", output)
+        self.assertFalse(Client.all_objects.exists())
+        self.assertEqual(list(Pet.all_objects.values_list("id", flat=True)), [pet.id])
+        self.assertFalse(Treatment.objects.exists())
+        self.assertEqual(WeightMeasurement.objects.count(), 1)
+        self.assertEqual(ArchivedClient.objects.get().email, "rp@mail.com")
+        self.assertEqual(ArchivedPet.objects.count(), 2)
+        self.assertEqual(ArchivedTreatment.objects.count(), 2)
+        self.assertEqual(ArchivedWeightMeasurement.objects.count(), 2)
+
+        # Los tratamientos archivados dejan de contar en el inicio.
+        incremental = self.stored_stats()
+        self.assertEqual(incremental, [])
+        call_command("rollup_dashboard", stdout=io.StringIO())
+        self.assertEqual(self.stored_stats(), incremental)
+
+    def test_archive_keeps_client_with_active_pets(self):
+        self.delete_owner(days_ago=31)
+        active, separate = self.pets
+        Pet.all_objects.filter(pk=active.id).update(deleted_at=None)
+        Pet.all_objects.filter(pk=separate.id).update(deleted_at=F("deleted_at") - timedelta(days=1))
+
+        output = self.archive()
+
+        # Solo la mascota borrada por separado, con su tratamiento y su pesaje.
+        self.assertIn("3 registros archivados", output)
+        self.assertEqual(Client.all_objects.get().id, self.owner.id)
+        self.assertEqual(list(Pet.objects.values_list("id", flat=True)), [active.id])
+        self.assertEqual(ArchivedPet.objects.get().id, separate.id)
+
+        # Sin mascotas activas, el cliente se archiva en la corrida siguiente.
+        self.client.post(reverse("pets_delete"), {"pet_id": active.id})
+        Pet.all_objects.update(deleted_at=Client.all_objects.get().deleted_at)
+        self.assertIn("4 registros archivados", self.archive())
+        self.assertFalse(Client.all_objects.exists())
+
+    def test_restore_brings_back_archived_client_with_pets(self):
+        before = self.stored_stats()
+        pet_ids = sorted(pet.id for pet in self.pets)
+        self.delete_owner(days_ago=31)
+        self.archive()
+        # El veterinario se borra mientras el tratamiento está archivado.
+        self.vet.delete()
+
+        output = self.restore("clients", str(self.owner.id))
+
+        self.assertIn("7 registros restaurados", output)
+        self.assertEqual(Client.objects.get().id, self.owner.id)
+        self.assertEqual(sorted(Pet.objects.values_list("id", flat=True)), pet_ids)
+        self.assertEqual(WeightMeasurement.objects.count(), 2)
+        self.assertEqual(list(Treatment.objects.values_list("vet", flat=True)), [None, None])
+        self.assertFalse(ArchivedPet.objects.exists())
+        self.assertEqual(self.stored_stats(), before)
+
+        results = self.client.get(reverse("search"), {"q": "Ramón"}).context["results"]
+        self.assertEqual(len(results), 3)
+
+    def test_restore_deleted_pet_that_was_not_archived(self):
+        before = self.stored_stats()
+        pet = self.pets[0]
+        self.client.post(reverse("pets_delete"), {"pet_id": pet.id})
+        self.assertNotEqual(self.stored_stats(), before)
+
+        self.assertIn("1 mascotas", self.restore("pets", str(pet.id)))
+        self.assertTrue(Pet.objects.filter(pk=pet.id).exists())
+        self.assertEqual(self.stored_stats(), before)
+
+    def test_restore_reports_what_cannot_be_restored(self):
+        self.delete_owner()
+        Client.save_client(
+            {"name": "Otro", "phone": "221555232", "email": "rp@mail.com", "address": "13 y 44"}
+        )
+
+        with self.assertRaises(CommandError):
+            self.restore("clients", str(self.owner.id), "999")
+        with self.assertRaisesMessage(CommandError, "1 no se pudieron restaurar"):
+            self.restore("pets", str(self.pets[0].id))
+
+        self.assertEqual(Client.objects.count(), 1)
+        self.assertFalse(Pet.objects.exists())
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.owner = Client.objects.create(name="Ramón Pérez", phone="221555232", email="rp@mail.com")
+        self.pet = Pet.objects.create(
+            name="Toby", breed="Labrador", birthday="2020-01-01", weight=10, client=self.owner
+        )
+
+    def assertNotModified(self, url, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **headers)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        # Ninguna consulta a las tablas del listado: solo las versiones.
+        self.assertEqual(len(queries), 1)
+        self.assertIn("app_modelversion", queries[0]["sql"])
+
+    def test_repeat_get_is_not_modified(self):
+        url = reverse("pets_repo")
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertIn("Last-Modified", response)
+        self.assertNotModified(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertNotModified(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+
+    def test_changes_to_listed_models_change_the_etag(self):
+        url = reverse("pets_repo")
+        etag = self.client.get(url)["ETag"]
+
+        self.owner.update_client({"name": "Ramón Gómez"})
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Ramón Gómez")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_each_page_has_its_own_etag(self):
+        url = reverse("clients_repo")
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, {"page_size": 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_history_is_not_modified_until_a_treatment_is_added(self):
+        url = reverse("pets_history", args=(self.pet.id,))
+        etag = self.client.get(url)["ETag"]
+
+        self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+
+        vet = Vet.objects.create(name="Dra. Gómez", email="vet@mail.com", phone=221555)
+        medicine = Medicine.objects.create(name="Amoxicilina", description="Antibiótico", dose=3)
+        Treatment.save_treatment(self.pet, {"medicines": medicine.id, "vet": vet.id})
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Amoxicilina")
+
+    def test_bulk_imports_change_the_etag(self):
+        url = reverse("clients_repo")
+        etag = self.client.get(url)["ETag"]
+
+        import_rows(
+            "clients",
+            [(1, {"name": "Guido Carrillo", "phone": "221232555", "email": "gc@mail.com"})],
+            batch_size=10,
+        )
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class SeedDataTest(TestCase):
+    def test_seed_fills_every_model(self):
+        stdout = io.StringIO()
+        call_command(
+            "seed_data", "--clients", "3", "--pets-per-client", "2", "--vets", "2",
+            "--providers", "2", "--products-per-provider", "3", stdout=stdout,
+        )
+
+        self.assertEqual(Client.objects.count(), 3)
+        self.assertEqual(Pet.objects.count(), 6)
+        self.assertEqual(Vet.objects.count(), 2)
+        self.assertEqual(Medicine.objects.count(), 8)
+        self.assertEqual(Provider.objects.count(), 2)
+        self.assertEqual(Product.objects.count(), 6)
+        self.assertEqual(Treatment.objects.count(), 12)
+        self.assertIn("6 pets", stdout.getvalue())
+        self.assertEqual(self.client.get(reverse("home")).context["stats"]["clients"], 3)
+
+        pet = Pet.objects.select_related("client").first()
+        response = self.client.get(reverse("search"), {"q": pet.client.name})
+        self.assertGreater(len(response.context["results"]), 0)
+
+    def test_seed_can_run_twice(self):
+        call_command("seed_data", "--clients", "2", stdout=io.StringIO())
+        call_command("seed_data", "--clients", "2", stdout=io.StringIO())
+
+        self.assertEqual(Client.objects.count(), 4)
+        self.assertEqual(Vet.objects.count(), 40)
+
+
+class QueryCacheTest(TestCase):
+    def setUp(self):
+        reset_cache_stats()
+        self.owner = Client.objects.create(
+            name="Ramón Pérez", phone="221555232", email="rp@mail.com"
+        )
+
+    def test_form_dropdowns_are_served_from_cache_until_rows_change(self):
+        pet = Pet.objects.create(
+            name="Toby", breed="Labrador", birthday="2020-01-01", weight=10, client=self.owner
+        )
+        Vet.objects.create(name="Dra. Gómez", email="vet@mail.com", phone=221555)
+        url = reverse("pets_form_history", args=(pet.id,))
+
+        # La mascota y las versiones de los modelos, más cada lista si no está en cache.
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertContains(response, "Dra. Gómez")
+
+        Vet.objects.create(name="Dr. Ruiz", email="ruiz@mail.com", phone=221556)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertContains(response, "Dr. Ruiz")
+
+        self.assertEqual(
+            self.client.get(reverse("cache_stats")).json(), {"hits": 3, "misses": 3}
+        )
+
+    def test_list_page_is_invalidated_by_related_model_changes(self):
+        Pet.objects.create(
+            name="Toby", breed="Labrador", birthday="2020-01-01", weight=10, client=self.owner
+        )
+        self.client.get(reverse("pets_repo"))
+
+        # Solo la lectura de las versiones.
+        with self.assertNumQueries(1):
+            self.client.get(reverse("pets_repo"))
+
+        self.owner.update_client({"name": "Ramón Gómez"})
+
+        response = self.client.get(reverse("pets_repo"))
+        self.assertContains(response, "Ramón Gómez")
+
+    def test_pages_are_cached_per_cursor(self):
+        Client.objects.create(name="Guido Carrillo", phone="221232555", email="gc@mail.com")
+
+        first = self.client.get(reverse("clients_repo"), {"page_size": 1})
+        second = self.client.get(
+            reverse("clients_repo"), {"page_size": 1, "after": first.context["page"].next_cursor}
+        )
+
+        self.assertContains(first, "Ramón Pérez")
+        self.assertContains(second, "Guido Carrillo")
+        self.assertNotContains(second, "Ramón Pérez")
+
+
+class FragmentCacheTest(TestCase):
+    def setUp(self):
+        self.owner = Client.objects.create(
+            name="Ramón Pérez", phone="221555232", email="rp@mail.com"
+        )
+
+    def csrf_token(self, client):
+        response = client.get(reverse("clients_repo"))
+        return str(response.context["csrf_token"]), response
+
+    def test_rendered_rows_are_served_from_cache(self):
+        self.client.get(reverse("clients_repo"))
+
+        # Ni la página ni el HTML de las filas se vuelven a armar.
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("clients_repo"))
+
+        self.assertContains(response, "Ramón Pérez")
+        self.assertEqual(len(queries), 1)
+        self.assertIn("app_modelversion", queries[0]["sql"])
+
+    def test_each_browser_gets_its_own_csrf_token(self):
+        first = self.client_class(enforce_csrf_checks=True)
+        second = self.client_class(enforce_csrf_checks=True)
+
+        first_token, first_response = self.csrf_token(first)
+        second_token, second_response = self.csrf_token(second)
+
+        self.assertNotEqual(first_token, second_token)
+        self.assertContains(first_response, first_token)
+        self.assertContains(second_response, second_token)
+        self.assertNotContains(second_response, first_token)
+
+    def test_delete_form_from_cached_rows_passes_csrf_check(self):
+        self.client.get(reverse("clients_repo"))
+
+        browser = self.client_class(enforce_csrf_checks=True)
+        token, _ = self.csrf_token(browser)
+        response = browser.post(
+            reverse("clients_delete"),
+            {"client_id": self.owner.id, "csrfmiddlewaretoken": token},
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Client.objects.filter(id=self.owner.id).exists())
+
+    def test_row_changes_invalidate_the_fragment(self):
+        self.client.get(reverse("clients_repo"))
+
+        self.owner.update_client({"name": "Ramón Gómez"})
+
+        response = self.client.get(reverse("clients_repo"))
+        self.assertContains(response, "Ramón Gómez")
+        self.assertNotContains(response, "Ramón Pérez")
+
+    def test_pager_is_cached_per_page_size(self):
+        Client.objects.create(name="Guido Carrillo", phone="221232555", email="gc@mail.com")
+
+        self.client.get(reverse("clients_repo"), {"page_size": 1})
+        response = self.client.get(reverse("clients_repo"), {"page_size": "1"})
+        self.assertContains(response, "page_size=1")
+
+        response = self.client.get(reverse("clients_repo"))
+        self.assertNotContains(response, "pagination-next")
+
+
+class ReplicaViewsTest(TestCase):
+    def test_list_history_and_export_views_read_from_replica(self):
+        self.assertTrue(replica_view(views.clients_repository))
+        self.assertTrue(replica_view(views.pets_history))
+        self.assertTrue(replica_view(views.export))
+        self.assertFalse(replica_view(views.clients_form))
+        self.assertFalse(replica_view(views.clients_delete))
+
+    def test_no_sticky_cookie_without_replica(self):
+        if "replica" in settings.DATABASES:
+            self.skipTest("Hay una réplica configurada")
+
+        response = self.client.post(reverse("clients_form"), data={})
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+
+# Se corre aparte, con dos archivos SQLite como primario y réplica:
+#   DATABASE_URL=sqlite:///primary.sqlite3 DATABASE_REPLICA_URL=sqlite:///replica.sqlite3 \
+#   python manage.py test app.tests_integration.ReplicaRouterTest
+# Las dos bases de test son independientes, así que una fila creada solo en
+# una de ellas muestra de dónde leyó cada vista.
+@skipUnless("replica" in settings.DATABASES, "No hay una réplica configurada")
+class ReplicaRouterTest(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        Client.objects.using("replica").create(
+            name="En réplica", phone="221555232", email="replica@mail.com", address="13 y 44"
+        )
+        Client.objects.create(
+            name="En primario", phone="221555232", email="primario@mail.com", address="13 y 44"
+        )
+
+    def names(self, response):
+        return [client.name for client in response.context["clients"]]
+
+    def test_list_reads_from_replica(self):
+        response = self.client.get(reverse("clients_repo"))
+        self.assertEqual(self.names(response), ["En réplica"])
+
+    def test_export_streams_from_replica(self):
+        response = self.client.get(reverse("export", args=("clients", "csv")))
+        content = b"".join(response.streaming_content).decode()
+
+        self.assertIn("En réplica", content)
+        self.assertNotIn("En primario", content)
+
+    def test_forms_read_and_write_primary_then_stick(self):
+        response = self.client.post(
+            reverse("clients_form"),
+            data={
+                "name": "Juan Sebastian Veron",
+                "phone": "221555232",
+                "address": "13 y 44",
+                "email": "brujita75@hotmail.com",
+            },
+        )
+
+        self.assertTrue(Client.objects.using("default").filter(email="brujita75@hotmail.com").exists())
+        self.assertFalse(Client.objects.using("replica").filter(email="brujita75@hotmail.com").exists())
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        # El cliente de test guarda la cookie: el listado ahora lee del primario.
+        response = self.client.get(reverse("clients_repo"))
+        self.assertIn("Juan Sebastian Veron", self.names(response))
+        self.assertNotIn("En réplica", self.names(response))
+
+
+@override_settings(
+    MIDDLEWARE=[
+        "app.middleware.MetricsMiddleware",
+        *[name for name in settings.MIDDLEWARE if name != "app.middleware.MetricsMiddleware"],
+    ],
+    TEMPLATES=[{**settings.TEMPLATES[0], "BACKEND": "app.metrics.DjangoTemplates"}],
+)
+class MetricsTest(TestCase):
+    def setUp(self):
+        reset_metrics()
+        Client.objects.create(name="Ramón Pérez", phone="221555232", email="rp@mail.com")
+
+    def metric(self, name, view):
+        for line in self.client.get(reverse("metrics")).content.decode().splitlines():
+            if line.startswith(f'{name}{{view="{view}"}} '):
+                return float(line.split()[-1])
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse("clients_repo"))
+
+        timing = response["Server-Timing"]
+        self.assertIn("app;dur=", timing)
+        self.assertIn("db;dur=", timing)
+        self.assertIn('desc="2 consultas"', timing)
+        self.assertNotIn("tpl;dur=0.0", timing)
+
+    def test_metrics_are_aggregated_per_url_name(self):
+        self.client.get(reverse("clients_repo"))
+        self.client.get(reverse("clients_repo"), {"page_size": 1})
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4")
+        self.assertContains(response, 'vetsoft_request_duration_seconds{view="clients_repo",quantile="0.99"}')
+        self.assertEqual(self.metric("vetsoft_request_duration_seconds_count", "clients_repo"), 2)
+        self.assertEqual(self.metric("vetsoft_request_db_queries_sum", "clients_repo"), 4)
+
+    def test_streaming_responses_are_measured_when_finished(self):
+        response = self.client.get(reverse("export", args=("clients", "csv")))
+        content = b"".join(response.streaming_content)
+
+        self.assertEqual(self.metric("vetsoft_response_size_bytes_sum", "export"), len(content))
+        self.assertEqual(self.metric("vetsoft_request_db_queries_sum", "export"), 1)
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged(self):
+        with self.assertLogs("app.middleware", "WARNING") as logs:
+            self.client.get(reverse("clients_repo"))
+
+        self.assertIn("Request lento: GET /clientes/ (clients_repo)", logs.output[0])
+
+
+
+class MigrationsTest(TransactionTestCase):
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([("app", target)])
+        return executor.loader.project_state([("app", target)]).apps
+
+    def tearDown(self):
+        call_command("migrate", "app", verbosity=0)
+        # El flush de TransactionTestCase no conoce la tabla del índice.
+        search.clear_index()
+
+    def test_duplicate_emails_stop_the_unique_email_migration(self):
+        apps = self.migrate("0015_treatment")
+        Client = apps.get_model("app", "Client")
+        # Sin señales: los receptores de la app esperan las tablas actuales.
+        Client.objects.bulk_create([
+            Client(name="Ana", phone="221555232", email="dup@x.com"),
+            Client(name="Ana Ruiz", phone="221555233", email="DUP@x.com"),
+        ])
+
+        with self.assertRaisesMessage(RuntimeError, "Client dup@x.com: ids"):
+            self.migrate("0016_indexes")
+
+        Client.objects.filter(email="DUP@x.com").update(email="ana@x.com")
+        self.migrate("0016_indexes")
+
+    def test_normalized_names_are_filled_for_existing_rows(self):
+        apps = self.migrate("0021_soft_delete")
+        Client = apps.get_model("app", "Client")
+        Client.objects.bulk_create([Client(name="Ángel Ruiz", phone="221555232", email="angel@x.com")])
+
+        apps = self.migrate("0022_name_normalized")
+
+        self.assertEqual(
+            apps.get_model("app", "Client").objects.get().name_normalized, "angel ruiz"
+        )
+
+    def test_legacy_history_becomes_undated_treatments(self):
+        apps = self.migrate("0014_search_index")
+        Pet = apps.get_model("app", "Pet")
+        medicines = apps.get_model("app", "Medicine").objects.bulk_create([
+            apps.get_model("app", "Medicine")(name="Amoxicilina", description="Antibiótico", dose=3),
+            apps.get_model("app", "Medicine")(name="Ivermectina", description="Antiparasitario", dose=1),
+        ])
+        vet = apps.get_model("app", "Vet").objects.bulk_create([
+            apps.get_model("app", "Vet")(name="Dra. Gómez", email="vet@mail.com", phone=221555)
+        ])[0]
+        pet = Pet.objects.bulk_create([Pet(name="Toby", breed="Labrador", birthday="2020-01-01", weight=10)])[0]
+        Pet.medicines.through.objects.bulk_create(
+            Pet.medicines.through(pet_id=pet.id, medicine_id=medicine.id) for medicine in medicines
+        )
+        Pet.vets.through.objects.bulk_create([Pet.vets.through(pet_id=pet.id, vet_id=vet.id)])
+
+        call_command("migrate", "app", verbosity=0)
+
+        # Un tratamiento por vínculo, sin emparejar medicamentos y veterinarios.
+        self.assertCountEqual(
+            Treatment.objects.values_list("medicine_id", "vet_id", "dose", "applied_at"),
+            [
+                (medicines[0].id, None, 3, Treatment.LEGACY_APPLIED_AT),
+                (medicines[1].id, None, 1, Treatment.LEGACY_APPLIED_AT),
+                (None, vet.id, None, Treatment.LEGACY_APPLIED_AT),
+            ],
+        )
+        self.assertEqual(stats.dashboard()["treatments_this_month"], 0)
+        self.assertContains(self.client.get(reverse("pets_history", args=[pet.id])), "Sin fecha", count=3)
+
+    def test_search_index_is_filled_with_existing_rows(self):
+        apps = self.migrate("0013_alter_provider_address")
+        Client = apps.get_model("app", "Client")
+        owner = Client.objects.bulk_create([Client(name="Ramón Pérez", phone="221555232", email="rp@mail.com")])[0]
+        Pet = apps.get_model("app", "Pet")
+        Pet.objects.bulk_create([Pet(name="Toby", breed="Labrador", birthday="2020-01-01", weight=10, client_id=owner.id)])
+        Medicine = apps.get_model("app", "Medicine")
+        Medicine.objects.bulk_create([Medicine(name="Amoxicilina", description="Antibiótico", dose=3)])
+
+        call_command("migrate", "app", verbosity=0)
+
+        results, _ = search.search("ramon")
+        self.assertEqual(sorted(result["kind"] for result in results), ["client", "pet"])
+        self.assertEqual(search.search("antibiotico")[0][0]["title"], "Amoxicilina")
+
+    def test_dashboard_counters_are_filled_for_existing_rows(self):
+        apps = self.migrate("0018_stock")
+        Client = apps.get_model("app", "Client")
+        owner = Client.objects.bulk_create([Client(name="Ramón Pérez", phone="221555232", email="rp@mail.com")])[0]
+        Pet = apps.get_model("app", "Pet")
+        Pet.objects.bulk_create([
+            Pet(name="Toby", breed="Labrador", birthday="2020-01-01", weight=10, client_id=owner.id),
+            Pet(name="Luna", breed="Labrador", birthday="2020-01-01", weight=20, client_id=owner.id),
+        ])
+
+        call_command("migrate", "app", verbosity=0)
+
+        home = stats.dashboard()
+        self.assertEqual(home["clients"], 1)
+        self.assertEqual(home["breeds"], [{"breed": "Labrador", "count": 2, "average_weight": 15.0}])
@@ -1,10 +1,22 @@
-from django.test import TestCase
-from app.models import Client, Provider, validate_pet, validate_product,validate_medicine
+import os
+import tempfile
+from unittest import skipUnless
+
+from psycopg_pool import ConnectionPool
+
+from django.db import connection
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from app.context_processors import navbar
+from app.timeseries import lttb
+from vetsoft.database import configure_database, parse_database_url
+from app.models import Client, Product, Provider, StockMovement, validate_pet, validate_product,validate_medicine, validate_stock_movement, validate_treatment
 from datetime import date
 
 class ClientModelTest(TestCase):
     def test_can_create_and_get_client(self):
-        Client.save_client(
+        client, errors = Client.save_client(
             {
                 "name": "Juan Sebastian Veron",
                 "phone": "221555232",
@@ -14,6 +26,8 @@ class ClientModelTest(TestCase):
         )
         clients = Client.objects.all()
         self.assertEqual(len(clients), 1)
+        self.assertIsNone(errors)
+        self.assertEqual(client, clients[0])
 
         self.assertEqual(clients[0].name, "Juan Sebastian Veron")
         self.assertEqual(clients[0].phone, "221555232")
@@ -21,7 +35,7 @@ class ClientModelTest(TestCase):
         self.assertEqual(clients[0].email, "brujita75@hotmail.com")
 
     def test_can_update_client(self):
-        Client.save_client(
+        saved, _ = Client.save_client(
             {
                 "name": "Juan Sebastian Veron",
                 "phone": "221555232",
@@ -29,18 +43,18 @@ class ClientModelTest(TestCase):
                 "email": "brujita75@hotmail.com",
             }
         )
-        client = Client.objects.get(pk=1)
+        client = Client.objects.get(pk=saved.pk)
 
         self.assertEqual(client.phone, "221555232")
 
         client.update_client({"phone": "221555233"})
 
-        client_updated = Client.objects.get(pk=1)
+        client_updated = Client.objects.get(pk=saved.pk)
 
         self.assertEqual(client_updated.phone, "221555233")
 
     def test_update_client_with_error(self):
-        Client.save_client(
+        saved, _ = Client.save_client(
             {
                 "name": "Juan Sebastian Veron",
                 "phone": "221555232",
@@ -48,13 +62,13 @@ class ClientModelTest(TestCase):
                 "email": "brujita75@hotmail.com",
             }
         )
-        client = Client.objects.get(pk=1)
+        client = Client.objects.get(pk=saved.pk)
 
         self.assertEqual(client.phone, "221555232")
 
         client.update_client({"phone": ""})
 
-        client_updated = Client.objects.get(pk=1)
+        client_updated = Client.objects.get(pk=saved.pk)
 
         self.assertEqual(client_updated.phone, "221555232")
 
@@ -233,3 +247,174 @@ class ProductModelTest(TestCase):
         self.assertIn("price", errors)
         self.assertEqual(errors["price"], "El precio debe ser mayor que cero")
 
+
+class TreatmentModelTest(TestCase):
+    def test_treatment_requires_medicine_and_vet(self):
+        errors = validate_treatment({})
+
+        self.assertEqual(errors["medicines"], "Por favor seleccione un medicamento")
+        self.assertEqual(errors["vet"], "Por favor seleccione un veterinario")
+        self.assertNotIn("dose", errors)
+
+    def test_treatment_date_cannot_be_in_the_future(self):
+        errors = validate_treatment(
+            {"medicines": 1, "vet": 1, "applied_at": "2999-01-01T10:00"}
+        )
+        self.assertEqual(errors["applied_at"], "La fecha del tratamiento no puede ser futura")
+
+        errors = validate_treatment({"medicines": 1, "vet": 1, "applied_at": "ayer"})
+        self.assertEqual(errors["applied_at"], "Formato de fecha inválido")
+
+
+class StockMovementModelTest(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name="Amoxicilina", type="Antibiótico", price=100)
+
+    def test_validation(self):
+        errors = validate_stock_movement({})
+        self.assertEqual(errors["kind"], "Por favor seleccione un tipo de movimiento")
+        self.assertEqual(errors["quantity"], "Por favor ingrese una cantidad")
+
+        errors = validate_stock_movement({"kind": "sale", "quantity": "-2"})
+        self.assertEqual(errors["quantity"], "La cantidad debe ser mayor que cero")
+
+        self.assertEqual(validate_stock_movement({"kind": "adjustment", "quantity": "-2"}), {})
+
+    def test_movements_update_the_stock(self):
+        StockMovement.save_movement(self.product.id, {"kind": "purchase", "quantity": "10"})
+        movement, errors = StockMovement.save_movement(
+            self.product.id, {"kind": "sale", "quantity": "3"}
+        )
+        StockMovement.save_movement(self.product.id, {"kind": "adjustment", "quantity": "-1"})
+
+        self.assertIsNone(errors)
+        self.assertEqual(movement.quantity, -3)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 6)
+
+    def test_sale_without_stock_is_rejected(self):
+        StockMovement.save_movement(self.product.id, {"kind": "purchase", "quantity": "2"})
+
+        movement, errors = StockMovement.save_movement(
+            self.product.id, {"kind": "sale", "quantity": "3"}
+        )
+
+        self.assertFalse(movement)
+        self.assertEqual(errors["quantity"], "No hay stock suficiente")
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 2)
+        self.assertEqual(self.product.stock_movements.count(), 1)
+
+
+@skipUnless(connection.vendor == "sqlite", "Solo aplica a SQLite")
+class SqlitePragmasTest(SimpleTestCase):
+    @override_settings(
+        SQLITE_PRAGMAS={"journal_mode": "wal", "synchronous": "normal", "busy_timeout": 1234}
+    )
+    def test_pragmas_are_applied_to_new_connections(self):
+        with tempfile.TemporaryDirectory() as directory:
+            settings_dict = {**connection.settings_dict, "NAME": os.path.join(directory, "db.sqlite3")}
+            wrapper = DatabaseWrapper(settings_dict, alias="pragmas")
+
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute("PRAGMA journal_mode")
+                    self.assertEqual(cursor.fetchone()[0], "wal")
+                    cursor.execute("PRAGMA synchronous")
+                    self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+                    cursor.execute("PRAGMA busy_timeout")
+                    self.assertEqual(cursor.fetchone()[0], 1234)
+            finally:
+                wrapper.close()
+
+
+class DatabaseUrlTest(SimpleTestCase):
+    def test_parse_postgres_url(self):
+        config = parse_database_url("postgres://vet:cl%40ve@db:5432/vetsoft?sslmode=require")
+
+        self.assertEqual(config["ENGINE"], "django.db.backends.postgresql")
+        self.assertEqual(config["NAME"], "vetsoft")
+        self.assertEqual(config["USER"], "vet")
+        self.assertEqual(config["PASSWORD"], "cl@ve")
+        self.assertEqual(config["HOST"], "db")
+        self.assertEqual(config["PORT"], "5432")
+        self.assertEqual(config["OPTIONS"], {"sslmode": "require"})
+
+    def test_parse_sqlite_url(self):
+        self.assertEqual(parse_database_url("sqlite:////app/db.sqlite3")["NAME"], "/app/db.sqlite3")
+        self.assertEqual(parse_database_url("sqlite:///db.sqlite3")["NAME"], "db.sqlite3")
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            parse_database_url("mysql://localhost/vetsoft")
+
+    def test_production_profile(self):
+        sqlite = configure_database(parse_database_url("sqlite:///db.sqlite3"), "production", "/app", {})
+        self.assertEqual(sqlite["NAME"], "/app/db.sqlite3")
+        self.assertEqual(sqlite["CONN_MAX_AGE"], 600)
+        self.assertEqual(sqlite["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+
+        postgres = configure_database(
+            parse_database_url("postgres://vet@db/vetsoft"), "production", "/app", {"DB_POOL_MAX_SIZE": "4"}
+        )
+        self.assertEqual(postgres["CONN_MAX_AGE"], 0)
+        self.assertEqual(postgres["OPTIONS"]["pool"], {"min_size": 2, "max_size": 4, "timeout": 10})
+
+        default = configure_database(parse_database_url("postgres://vet@db/vetsoft"), "default", "/app", {})
+        self.assertEqual(default["CONN_MAX_AGE"], 0)
+        self.assertNotIn("pool", default["OPTIONS"])
+
+    @skipUnless(connection.vendor == "postgresql", "Solo aplica a PostgreSQL")
+    def test_production_profile_opens_a_connection_pool(self):
+        settings_dict = configure_database(
+            {**connection.settings_dict, "OPTIONS": {}}, "production", "/app", {"DB_POOL_MIN_SIZE": "1"}
+        )
+        wrapper = PostgresDatabaseWrapper(settings_dict, alias="pooled")
+
+        try:
+            with wrapper.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            self.assertIsInstance(wrapper.pool, ConnectionPool)
+            self.assertEqual(wrapper.pool.max_size, 10)
+        finally:
+            wrapper.close()
+            wrapper.close_pool()
+
+
+class NavbarTest(SimpleTestCase):
+    def active_labels(self, path):
+        links = navbar(RequestFactory().get(path))["links"]
+        return [link["label"] for link in links if link["active"]]
+
+    def test_marks_the_link_of_the_current_section(self):
+        self.assertEqual(self.active_labels("/"), ["Home"])
+        self.assertEqual(self.active_labels("/clientes/"), ["Clientes"])
+        self.assertEqual(self.active_labels("/mascotas/historial/3/nuevo"), ["Mascotas"])
+        self.assertEqual(self.active_labels("/buscar/"), [])
+        self.assertEqual(self.active_labels("/clientes"), [])
+
+    def test_links_are_shared_by_pages_of_the_same_section(self):
+        first = navbar(RequestFactory().get("/clientes/"))["links"]
+        second = navbar(RequestFactory().get("/clientes/editar/3/"))["links"]
+
+        self.assertIs(first[0], second[0])
+
+
+class LttbTest(SimpleTestCase):
+    def test_short_series_are_returned_as_is(self):
+        points = [(0, 1), (1, 2), (2, 3)]
+        self.assertEqual(lttb(points, 10), points)
+
+    def test_keeps_the_ends_and_the_peaks(self):
+        points = [(x, 10.0) for x in range(100)]
+        points[37] = (37, 50.0)
+        points[71] = (71, -20.0)
+
+        sampled = lttb(points, 10)
+
+        self.assertEqual(len(sampled), 10)
+        self.assertEqual(sampled[0], points[0])
+        self.assertEqual(sampled[-1], points[-1])
+        self.assertIn((37, 50.0), sampled)
+        self.assertIn((71, -20.0), sampled)
+        self.assertEqual(sampled, sorted(sampled))
@@ -0,0 +1,37 @@
+def lttb(points, threshold):
+    """
+    Reduce una serie `[(x, y), ...]` ordenada por x a `threshold` puntos con
+    Largest-Triangle-Three-Buckets: conserva el primero, el último y, de cada
+    tramo, el punto que mejor mantiene la forma de la curva (picos y bajadas).
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    # Los puntos del medio se reparten en threshold - 2 tramos.
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    previous = points[0]
+
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # Promedio del tramo siguiente (o el último punto, en el último tramo).
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, len(points))
+        following = points[next_start:next_end] or points[-1:]
+        average_x = sum(x for x, _ in following) / len(following)
+        average_y = sum(y for _, y in following) / len(following)
+
+        chosen = max(
+            points[start:end],
+            key=lambda point: abs(
+                (previous[0] - average_x) * (point[1] - previous[1])
+                - (previous[0] - point[0]) * (average_y - previous[1])
+            ),
+        )
+        sampled.append(chosen)
+        previous = chosen
+
+    sampled.append(points[-1])
+    return sampled
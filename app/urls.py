@@ -3,6 +3,15 @@ from . import views
 
 urlpatterns = [
     path("", view=views.home, name="home"),
+    path("buscar/", view=views.search, name="search"),
+    path("exportar/<slug:name>.<slug:format>", view=views.export, name="export"),
+    path("eliminar/<slug:name>/", view=views.delete_selected, name="delete_selected"),
+    path("importar/", view=views.imports_form, name="imports_form"),
+    path("estado/cache/", view=views.cache_stats, name="cache_stats"),
+    path("metricas/", view=views.metrics, name="metrics"),
+    path("api/clientes/", view=views.clients_autocomplete, name="clients_autocomplete"),
+    path("api/proveedores/", view=views.providers_autocomplete, name="providers_autocomplete"),
+    path("api/mascotas/<int:id>/peso/", view=views.pets_weight, name="pets_weight"),
     path("clientes/", view=views.clients_repository, name="clients_repo"),
     path("clientes/nuevo/", view=views.clients_form, name="clients_form"),
     path("clientes/editar/<int:id>/", view=views.clients_form, name="clients_edit"),
@@ -32,6 +41,7 @@ urlpatterns = [
     path("productos/nuevo/", view=views.products_form, name="products_form"),
     path ("productos/editar/<int:id>/", view=views.products_form, name="products_edit"),
     path("productos/eliminar/", view=views.products_delete, name="products_delete"),
+    path("productos/<int:id>/stock/", view=views.products_stock, name="products_stock"),
 
     ##providers
     path("proveedores/", view=views.providers_repository, name="providers_repo"),
@@ -1,14 +1,216 @@
+import hashlib
+import io
+import os
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib import messages
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, reverse, get_object_or_404
-from .models import Client, Medicine, Pet, Product, Provider, Vet
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
+from .cache import (
+    cache_stats as query_cache_stats,
+    cached,
+    cached_queryset,
+    last_modified,
+    model_versions,
+    version_key,
+)
+from .deletes import DELETES, delete_rows, describe
+from .exports import EXPORTS, FORMATS, export_stream
+from .imports import FORMATS as IMPORT_FORMATS, IMPORTS, import_rows, read_rows
+from .metrics import prometheus_text
+from .models import (
+    Client,
+    Medicine,
+    Pet,
+    Product,
+    Provider,
+    StockMovement,
+    Treatment,
+    Vet,
+    WeightMeasurement,
+)
+from .pagination import cursor_key, keyset_paginate
+from .search import search as full_text_search
+from .stats import dashboard as dashboard_stats
+from .timeseries import lttb
+
+
+def versioned_page(*models):
+    """
+    Responde 304 a un GET repetido mientras no cambie ninguno de `models`.
+    El ETag sale de sus versiones (una consulta a ModelVersion), así que la
+    vista y sus consultas solo corren si la página cambió.
+    """
+
+    def etag(request, *args, **kwargs):
+        # Con un mensaje pendiente (p. ej. después de borrar) la página se
+        # arma de nuevo aunque los datos no hayan cambiado.
+        if messages.get_messages(request):
+            return None
+        versions = ":".join(str(version) for version in model_versions(models))
+        key = f"{settings.RELEASE}:{request.get_full_path()}:{versions}"
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def modified(request, *args, **kwargs):
+        if messages.get_messages(request):
+            return None
+        return last_modified(models)
+
+    def decorator(view):
+        # no-cache: el navegador guarda la página pero la revalida siempre.
+        view = condition(etag_func=etag, last_modified_func=modified)(view)
+        return cache_control(private=True, no_cache=True)(view)
+
+    return decorator
+
+
+def repository_page(request, name, models, queryset):
+    """
+    Página del listado y la clave para cachear su HTML con {% cached_rows %}.
+    La página se consulta recién si el template la usa, así que cuando el
+    fragmento está en la cache no se lee de la base ni de la cache de consultas.
+    """
+    key = f"{name}:{cursor_key(request)}"
+    page = SimpleLazyObject(
+        lambda: cached(key, models, lambda: keyset_paginate(request, queryset))
+    )
+    return page, version_key(key, models)
 
 
 def home(request):
-    return render(request, "home.html")
+    return render(request, "home.html", {"stats": dashboard_stats()})
 
 
+def search(request):
+    query = request.GET.get("q", "").strip()
+
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+
+    results, has_next = full_text_search(query, page, settings.SEARCH_PAGE_SIZE)
+
+    return render(
+        request,
+        "search/results.html",
+        {"query": query, "results": results, "page": page, "has_next": has_next},
+    )
+
+
+def export(request, name, format):
+    if name not in EXPORTS or format not in FORMATS:
+        raise Http404("Exportación inexistente")
+
+    compress = request.GET.get("gzip") == "1"
+    filename = f"{name}.{format}.gz" if compress else f"{name}.{format}"
+
+    # Iterador sincrónico: bajo ASGI Django lo lee entero antes de enviarlo
+    # (ver gunicorn.conf.py).
+    response = StreamingHttpResponse(
+        export_stream(name, format, settings.EXPORT_CHUNK_SIZE, compress),
+        content_type="application/gzip" if compress else FORMATS[format],
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@require_POST
+def delete_selected(request, name):
+    if name not in DELETES:
+        raise Http404("Listado inexistente")
+
+    model, repository = DELETES[name]
+    ids = [int(value) for value in request.POST.getlist("ids") if value.isdecimal()]
+
+    if ids:
+        deleted = delete_rows(model, ids, settings.DELETE_BATCH_SIZE)
+        messages.success(request, describe(deleted))
+    else:
+        messages.warning(request, "No se seleccionó ningún registro")
+
+    return redirect(reverse(repository))
+
+
+def imports_form(request):
+    if request.method == "POST":
+        name = request.POST.get("name", "")
+        upload = request.FILES.get("file")
+        errors = {}
+
+        if name not in IMPORTS:
+            errors["name"] = "Por favor seleccione qué desea importar"
+
+        if upload is None:
+            errors["file"] = "Por favor seleccione un archivo"
+        else:
+            format = os.path.splitext(upload.name)[1].lstrip(".").lower()
+            if format not in IMPORT_FORMATS:
+                errors["file"] = "El archivo debe ser .csv o .jsonl"
+
+        report = None
+        if not errors:
+            stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+            try:
+                report = import_rows(
+                    name, read_rows(stream, format), settings.IMPORT_BATCH_SIZE
+                )
+            except UnicodeDecodeError:
+                errors["file"] = "El archivo debe estar codificado en UTF-8"
+
+        return render(
+            request,
+            "imports/form.html",
+            {"errors": errors, "name": name, "report": report, "imports": sorted(IMPORTS)},
+        )
+
+    return render(request, "imports/form.html", {"imports": sorted(IMPORTS)})
+
+
+def cache_stats(request):
+    return JsonResponse(query_cache_stats())
+
+
+def metrics(request):
+    return HttpResponse(prometheus_text(), content_type="text/plain; version=0.0.4")
+
+
+def autocomplete(request, model):
+    query = request.GET.get("q", "").strip()
+    results = []
+
+    if query:
+        results = list(
+            model.objects.name_prefix(query)
+            .order_by("name_normalized")
+            .values("id", "name")[: settings.AUTOCOMPLETE_LIMIT]
+        )
+
+    return JsonResponse({"results": results})
+
+
+def clients_autocomplete(request):
+    return autocomplete(request, Client)
+
+
+def providers_autocomplete(request):
+    return autocomplete(request, Provider)
+
+
+@versioned_page(Client)
 def clients_repository(request):
-    clients = Client.objects.all()
-    return render(request, "clients/repository.html", {"clients": clients})
+    clients, rows_key = repository_page(request, "clients_repo", [Client], Client.objects.all())
+    return render(
+        request,
+        "clients/repository.html",
+        {"clients": clients, "page": clients, "rows_key": rows_key},
+    )
 
 
 def clients_form(request, id=None):
@@ -21,7 +223,8 @@ def clients_form(request, id=None):
             saved, errors = Client.save_client(request.POST)
         else:
             client = get_object_or_404(Client, pk=client_id)
-            client.update_client(request.POST)
+            errors = client.update_client(request.POST)
+            saved = not errors
 
         if saved:
             return redirect(reverse("clients_repo"))
@@ -40,15 +243,22 @@ def clients_form(request, id=None):
 def clients_delete(request):
     client_id = request.POST.get("client_id")
     client = get_object_or_404(Client, pk=int(client_id))
-    client.delete()
+    # Borrado lógico, con el mismo camino que la selección múltiple.
+    deleted = delete_rows(Client, [client.id], settings.DELETE_BATCH_SIZE)
+    messages.success(request, describe(deleted))
 
     return redirect(reverse("clients_repo"))
 
 ##Medicines
 
+@versioned_page(Medicine)
 def medicines_repository(request):
-    medicines = Medicine.objects.all()
-    return render(request, "medicines/repository.html", {"medicines": medicines})
+    medicines, rows_key = repository_page(request, "medicines_repo", [Medicine], Medicine.objects.all())
+    return render(
+        request,
+        "medicines/repository.html",
+        {"medicines": medicines, "page": medicines, "rows_key": rows_key},
+    )
 
 def medicines_form(request, id=None):
     if request.method == "POST":
@@ -84,144 +294,139 @@ def medicines_delete(request):
 
 
 ##Pets
+@versioned_page(Pet, Client)
 def pets_repository(request):
-    pets = Pet.objects.all()
-    return render(request, "pets/repository.html", {"pets": pets})
-
+    pets, rows_key = repository_page(request, "pets_repo", [Pet, Client], Pet.objects.for_list())
+    return render(
+        request,
+        "pets/repository.html",
+        {"pets": pets, "page": pets, "rows_key": rows_key},
+    )
+
+@versioned_page(Pet, Treatment, Vet, Medicine)
 def pets_history(request, id):
-    pet = get_object_or_404(Pet.objects.prefetch_related("medicines", "vets"), id=id)  # Usa "Vets" en mayúscula
+    pet = get_object_or_404(Pet, id=id)
+    treatments = keyset_paginate(
+        request,
+        pet.treatments.select_related("vet", "medicine"),
+        sort_field="applied_at",
+        descending=True,
+    )
 
     context = {
         "pet": pet,
+        "treatments": treatments,
+        "page": treatments,
     }
     return render(request, "pets/history.html", context)
 
-# def pets_form(request, id=None):
-    clients = Client.objects.all()
-    if request.method == "POST":
-        pet_id = request.POST.get("id", "")
-        errors = {}
-        saved = True
 
-        if pet_id == "":
-            saved, errors = Pet.save_pet(request.POST)
-            # Obtener el ID del cliente seleccionado del formulario
-            client_id = request.POST.get("client", "")
-            # Asociar el cliente seleccionado con el animal creado
-            if client_id:
-                pet = Pet.objects.latest('id')  # Obtener el último animal creado
-                pet.client_id = client_id
-                pet.save()
+def parse_day(value):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        return None, True
 
-        else:
-            pet = get_object_or_404(Pet, pk=pet_id)
-            pet.update_pet(request.POST)
-            # Obtener el ID del cliente seleccionado del formulario
-            client_id = request.POST.get("client", "")
-            # Asociar el cliente seleccionado con el animal actualizado
-            if client_id:
-                pet.client_id = client_id
-                pet.save()
+    return day, day is None and value != ""
 
-        if saved:
-            return redirect(reverse("pets_repo"))
 
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
 
-        return render(
-            request, "pets/form.html", {"errors": errors, "pet": request.POST, "clients": clients}
-        )
 
-    pet = None
-    if id is not None:
-        pet = get_object_or_404(Pet, pk=id)
+@versioned_page(Pet, WeightMeasurement)
+def pets_weight(request, id):
+    pet = get_object_or_404(Pet.objects.only("id"), id=id)
+    start, invalid_start = parse_day(request.GET.get("start", ""))
+    end, invalid_end = parse_day(request.GET.get("end", ""))
+
+    errors = {}
+    if invalid_start:
+        errors["start"] = "Formato de fecha inválido"
+    if invalid_end:
+        errors["end"] = "Formato de fecha inválido"
+
+    try:
+        points = int(request.GET.get("points", settings.WEIGHT_CHART_POINTS))
+        points = max(3, min(points, settings.WEIGHT_CHART_MAX_POINTS))
+    except ValueError:
+        errors["points"] = "La cantidad de puntos debe ser un número entero válido"
+
+    if errors:
+        return JsonResponse({"errors": errors}, status=400)
 
-    return render(request, "pets/form.html", {"pet": pet, "clients": clients})
+    # Rangos sobre measured_at (y no sobre su fecha) para usar el índice.
+    measurements = pet.weights.order_by("measured_at")
+    if start:
+        measurements = measurements.filter(measured_at__gte=start_of_day(start))
+    if end:
+        measurements = measurements.filter(measured_at__lt=start_of_day(end + timedelta(days=1)))
+
+    series = [
+        (measured_at.timestamp(), float(weight))
+        for measured_at, weight in measurements.values_list("measured_at", "weight")
+    ]
+    sampled = lttb(series, points)
+
+    return JsonResponse(
+        {
+            "pet": pet.id,
+            "total": len(series),
+            "points": [
+                [datetime.fromtimestamp(x, timezone.get_current_timezone()).isoformat(), y]
+                for x, y in sampled
+            ],
+        }
+    )
 
 
 def pets_form(request, id=None):
-    clients = Client.objects.all()
     if request.method == "POST":
         pet_id = request.POST.get("id", "")
         errors = {}
         saved = True
 
         if pet_id == "":
+            # El dueño se guarda en el mismo INSERT que la mascota
             saved, errors = Pet.save_pet(request.POST)
-            # Si el objeto Pet se ha creado correctamente
-            if saved:
-                # Obtener el ID del cliente seleccionado del formulario
-                client_id = request.POST.get("client", "")
-                # Asociar el cliente seleccionado con el animal creado
-                if client_id:
-                    pet = Pet.objects.latest('id')  # Obtener el último animal creado
-                    pet.client_id = client_id
-                    pet.save()
         else:
             pet = get_object_or_404(Pet, pk=pet_id)
-            pet.update_pet(request.POST)
-            # Obtener el ID del cliente seleccionado del formulario
-            client_id = request.POST.get("client", "")
-            # Asociar el cliente seleccionado con el animal actualizado
-            if client_id:
-                pet.client_id = client_id
-                pet.save()
+            errors = pet.update_pet(request.POST)
+            saved = not errors
 
         if saved:
             return redirect(reverse("pets_repo"))
 
         return render(
-            request, "pets/form.html", {"errors": errors, "pet": request.POST, "clients": clients}
+            request, "pets/form.html", {"errors": errors, "pet": request.POST}
         )
 
     pet = None
     if id is not None:
-        pet = get_object_or_404(Pet, pk=id)
+        pet = get_object_or_404(Pet.objects.select_related("client"), pk=id)
 
-    return render(request, "pets/form.html", {"pet": pet, "clients": clients})
+    return render(request, "pets/form.html", {"pet": pet})
 
 
 def pets_form_history(request, id):
-    vets = Vet.objects.all()
-    medicines = Medicine.objects.all()
+    vets = cached_queryset("vet_options", Vet.objects.only("id", "name"))
+    medicines = cached_queryset("medicine_options", Medicine.objects.only("id", "name"))
     pet = get_object_or_404(Pet, id=id)
 
     if request.method == 'POST':
-        pet_id = request.POST.get("id", "")
-        errors = {}
-        saved = True
-        
-        if pet_id == "":
-            saved, errors = Pet.save_pet(request.POST)
-            medicine_id = request.POST.get("medicines", "")
-            vet_id = request.POST.get("vet", "")
-            
-            if medicine_id and vet_id:
-                pet.medicines.add(medicine_id)
-                pet.vets.add(vet_id)
-                pet.save()
-        else:
-            pet = get_object_or_404(Pet, pk=pet_id)
-            pet.update_pet(request.POST)
-            
-            medicine_id = request.POST.get("medicines", "")
-            vet_id = request.POST.get("vet", "")
-            
-            if medicine_id and vet_id:
-                pet.medicines.add(medicine_id)
-                pet.vets.add(vet_id)
-                pet.save()
-        
+        saved, errors = Treatment.save_treatment(pet, request.POST)
+
         if saved:
             return redirect(reverse("pets_history", args=(id,)))
 
-        # Si no se guarda correctamente, debe retornar algo
-        return render(request, 'pets/history.html', {
+        return render(request, 'pets/form_history.html', {
             'pet': pet,
             'vets': vets,
             'medicines': medicines,
-            'errors': errors,  # Muestra errores si hay
+            'treatment': request.POST,
+            'errors': errors,
         })
-    
+
     # Manejo para solicitudes GET
     return render(request, 'pets/form_history.html', {
         'pet': pet,
@@ -230,57 +435,75 @@ def pets_form_history(request, id):
     })
 
 
-
 def pets_delete(request):
     pet_id = request.POST.get("pet_id")
     pet = get_object_or_404(Pet, pk=int(pet_id))
-    pet.delete()
+    # Borrado lógico, con el mismo camino que la selección múltiple.
+    deleted = delete_rows(Pet, [pet.id], settings.DELETE_BATCH_SIZE)
+    messages.success(request, describe(deleted))
 
     return redirect(reverse("pets_repo"))
 
 ##Products
+@versioned_page(Product, Provider)
 def products_repository(request):
-    products = Product.objects.all()
-    return render(request, "products/repository.html", {"products": products})
+    products, rows_key = repository_page(request, "products_repo", [Product, Provider], Product.objects.for_list())
+    return render(
+        request,
+        "products/repository.html",
+        {"products": products, "page": products, "rows_key": rows_key},
+    )
 
 def products_form(request, id=None):
-    providers = Provider.objects.all()
     if request.method == "POST":
         product_id = request.POST.get("id", "")
         errors = {}
         saved = True
 
         if product_id == "":
+            # El proveedor se guarda en el mismo INSERT que el producto
             saved, errors = Product.save_product(request.POST)
-            # Obtener el ID del proveedor seleccionado del formulario
-            provider_id = request.POST.get("provider", "")
-            # Asociar el proveedor seleccionado con el producto creado
-            if provider_id:
-                product = Product.objects.latest('id')  # Obtener el último producto creado
-                product.provider_id = provider_id
-                product.save()
         else:
             product = get_object_or_404(Product, pk=product_id)
-            product.update_product(request.POST)
-            # Obtener el ID del proveedor seleccionado del formulario
-            provider_id = request.POST.get("provider", "")
-            # Asociar el proveedor seleccionado con el producto actualizado
-            if provider_id:
-                product.provider_id = provider_id
-                product.save()
-        
+            errors = product.update_product(request.POST)
+            saved = not errors
+
         if saved:
             return redirect(reverse("products_repo"))
         
         return render(
-            request, "products/form.html", {"errors": errors, "product": request.POST, "providers": providers}
+            request, "products/form.html", {"errors": errors, "product": request.POST}
         )
 
     product = None
     if id is not None:
-        product = get_object_or_404(Product, pk=id)
+        product = get_object_or_404(Product.objects.select_related("provider"), pk=id)
+
+    return render(request, "products/form.html", {"product": product})
+
+def products_stock(request, id):
+    product = get_object_or_404(Product.objects.select_related("provider"), pk=id)
+    errors = {}
+
+    if request.method == "POST":
+        saved, errors = StockMovement.save_movement(product.id, request.POST)
 
-    return render(request, "products/form.html", {"product": product, "providers": providers})
+        if saved:
+            return redirect(reverse("products_stock", args=(id,)))
+
+    movements = keyset_paginate(
+        request, product.stock_movements.all(), sort_field="created_at", descending=True
+    )
+
+    context = {
+        "product": product,
+        "movements": movements,
+        "page": movements,
+        "kinds": StockMovement.Kind.choices,
+        "movement": request.POST,
+        "errors": errors,
+    }
+    return render(request, "products/stock.html", context)
 
 def products_delete(request):
     product_id = request.POST.get("product_id")
@@ -290,9 +513,14 @@ def products_delete(request):
     return redirect(reverse("products_repo"))
     
 ##Provider
+@versioned_page(Provider)
 def providers_repository(request):
-    providers = Provider.objects.all()
-    return render(request, "providers/repository.html", {"providers": providers})
+    providers, rows_key = repository_page(request, "providers_repo", [Provider], Provider.objects.all())
+    return render(
+        request,
+        "providers/repository.html",
+        {"providers": providers, "page": providers, "rows_key": rows_key},
+    )
 
 
 def providers_form(request, id=None):
@@ -334,9 +562,14 @@ def providers_delete(request):
 
 
 ##Vets
+@versioned_page(Vet)
 def vets_repository(request):
-    vets = Vet.objects.all()
-    return render(request, "vets/repository.html", {"vets": vets})
+    vets, rows_key = repository_page(request, "vets_repo", [Vet], Vet.objects.all())
+    return render(
+        request,
+        "vets/repository.html",
+        {"vets": vets, "page": vets, "rows_key": rows_key},
+    )
 
 def vets_form(request, id=None):
     if request.method == "POST":
@@ -348,7 +581,8 @@ def vets_form(request, id=None):
             saved, errors = Vet.save_vet(request.POST)
         else:
             vet = get_object_or_404(Vet, pk=vet_id)
-            vet.update_vet(request.POST)
+            errors = vet.update_vet(request.POST)
+            saved = not errors
         if saved:
             return redirect(reverse("vets_repo"))
         
@@ -0,0 +1,43 @@
+import os
+import shutil
+import tempfile
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vetsoft.settings")
+
+    import django
+
+    django.setup()
+
+
+def create_benchmark_db(verbosity=0):
+    # Base nueva y migrada, para no tocar la real. Con SQLite se usa un archivo
+    # temporal en vez de memoria: así se puede cerrar y reabrir la conexión.
+    from django.db import connection
+
+    if connection.vendor == "sqlite":
+        directory = tempfile.mkdtemp(prefix="vetsoft-bench-")
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(directory, "bench.sqlite3")
+
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    return connection
+
+
+def destroy_benchmark_db(connection):
+    name = connection.settings_dict["NAME"]
+    connection.close()
+
+    if connection.vendor == "sqlite":
+        shutil.rmtree(os.path.dirname(name), ignore_errors=True)
+    else:
+        connection.creation.destroy_test_db(name, verbosity=0, keepdb=False)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
@@ -0,0 +1,103 @@
+"""
+Listados de clientes y mascotas con la mayoría de las filas borradas (borrado
+lógico) y después de moverlas con archive_deleted, más el tiempo de archivar.
+
+    python -m benchmarks.archive [--clients 20000] [--deleted 0.8]
+"""
+import argparse
+import json
+import time
+
+from benchmarks import create_benchmark_db, destroy_benchmark_db, percentile, setup_django
+
+DUMMY_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+def measure(client, urls, repeat):
+    results = {}
+
+    for url in urls:
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            client.get(url)
+            latencies.append(time.perf_counter() - start)
+
+        results[url] = {
+            "p50_ms": percentile(latencies, 0.5) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+        }
+    return results
+
+
+def table_sizes():
+    from app.models import Client, Pet, Treatment
+
+    return {
+        model._meta.model_name: model._base_manager.count() for model in (Client, Pet, Treatment)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=20000)
+    parser.add_argument("--pets-per-client", type=int, default=2)
+    parser.add_argument("--deleted", type=float, default=0.8, help="Fracción de clientes borrados")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.shortcuts import reverse
+    from django.test import Client as TestClient
+    from django.test.utils import override_settings
+
+    from app.archive import archive
+    from app.deletes import delete_rows
+    from app.models import Client
+    from app.seeds import seed
+
+    connection = create_benchmark_db()
+    urls = [reverse("clients_repo"), reverse("pets_repo")]
+
+    try:
+        seed(args.clients, pets_per_client=args.pets_per_client, vets=5, providers=0)
+        # Los más viejos: la primera página tiene que saltearlos.
+        ids = Client.objects.order_by("id").values_list("id", flat=True)
+        delete_rows(Client, list(ids[: int(args.clients * args.deleted)]), args.batch_size)
+
+        with override_settings(CACHES=DUMMY_CACHE, ALLOWED_HOSTS=["testserver"]):
+            client = TestClient()
+            results = {"borrados": {"filas": table_sizes(), "listados": measure(client, urls, args.repeat)}}
+
+            start = time.perf_counter()
+            moved = archive(0, args.batch_size)
+            results["archivo"] = {
+                "seconds": time.perf_counter() - start,
+                "rows": {model._meta.model_name: count for model, count in moved.items()},
+            }
+
+            results["archivados"] = {"filas": table_sizes(), "listados": measure(client, urls, args.repeat)}
+    finally:
+        destroy_benchmark_db(connection)
+
+    for name in ("borrados", "archivados"):
+        sizes = ", ".join(f"{count} {model}" for model, count in results[name]["filas"].items())
+        print(f"== {name} ({sizes})")
+        for url, stats in results[name]["listados"].items():
+            print(f"   {url:15} p50 {stats['p50_ms']:7.1f} ms  p95 {stats['p95_ms']:7.1f} ms")
+
+    print(
+        f"archive_deleted: {sum(results['archivo']['rows'].values())} filas en "
+        f"{results['archivo']['seconds']:.2f} s"
+    )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Borra clientes con sus mascotas, pesajes y tratamientos de a uno (como la
+vista de eliminar de cada fila) y en lotes con delete_rows: tiempo y consultas.
+
+    python -m benchmarks.batch_delete [--clients 2000] [--batch-size 500]
+"""
+import argparse
+import json
+import time
+
+from benchmarks import create_benchmark_db, destroy_benchmark_db, setup_django
+
+
+def one_by_one(model, ids):
+    for id in ids:
+        model.objects.get(pk=id).delete()
+
+
+def measure(connection, seed_rows, delete):
+    from app.models import Client
+
+    seed_rows()
+    ids = list(Client.objects.values_list("id", flat=True))
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        delete(Client, ids)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "clients": len(ids),
+        "seconds": elapsed,
+        "queries": len(queries),
+        "rows_per_second": len(ids) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--pets-per-client", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from app.deletes import delete_rows
+    from app.seeds import seed
+
+    connection = create_benchmark_db()
+
+    def seed_rows():
+        seed(args.clients, pets_per_client=args.pets_per_client, vets=5, providers=0)
+
+    try:
+        results = {
+            "de_a_uno": measure(connection, seed_rows, one_by_one),
+            "en_lotes": measure(
+                connection,
+                seed_rows,
+                lambda model, ids: delete_rows(model, ids, args.batch_size),
+            ),
+        }
+    finally:
+        destroy_benchmark_db(connection)
+
+    for name, stats in results.items():
+        print(
+            f"{name:10} {stats['clients']} clientes en {stats['seconds']:7.2f} s  "
+            f"{stats['rows_per_second']:8.0f} clientes/s  {stats['queries']:6} consultas"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
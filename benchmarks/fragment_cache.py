@@ -0,0 +1,87 @@
+"""
+Mide el listado de clientes con páginas grandes: sin cache, con la cache vacía
+(primer request después de un cambio) y con el HTML de las filas en la cache.
+
+    python -m benchmarks.fragment_cache [--clients 10000] [--page-size 10000]
+"""
+import argparse
+import json
+import time
+
+from benchmarks import create_benchmark_db, destroy_benchmark_db, percentile, setup_django
+
+DUMMY_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def measure(client, url, data, repeat, before=None):
+    latencies = []
+    size = 0
+
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        response = client.get(url, data)
+        latencies.append(time.perf_counter() - start)
+        size = len(response.content)
+
+    return {
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.core.cache import cache
+    from django.shortcuts import reverse
+    from django.test import Client as TestClient
+    from django.test.utils import override_settings
+
+    from app.seeds import seed
+
+    connection = create_benchmark_db()
+    results = {}
+
+    try:
+        seed(args.clients, pets_per_client=0, treatments_per_pet=0)
+        url = reverse("clients_repo")
+        data = {"page_size": args.page_size}
+        limits = {
+            "REPOSITORY_MAX_PAGE_SIZE": args.page_size,
+            "ALLOWED_HOSTS": ["testserver"],
+        }
+
+        with override_settings(CACHES=DUMMY_CACHE, **limits):
+            results["sin_cache"] = measure(TestClient(), url, data, args.repeat)
+
+        with override_settings(CACHES=LOCMEM_CACHE, **limits):
+            client = TestClient()
+            results["cache_vacia"] = measure(client, url, data, args.repeat, before=cache.clear)
+            results["fragmento_en_cache"] = measure(client, url, data, args.repeat)
+    finally:
+        destroy_benchmark_db(connection)
+
+    for name, stats in results.items():
+        print(
+            f"{name:20} p50 {stats['p50_ms']:8.1f} ms  p95 {stats['p95_ms']:8.1f} ms  "
+            f"{stats['bytes'] / 1024:.0f} KiB"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
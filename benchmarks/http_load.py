@@ -0,0 +1,355 @@
+"""
+Prueba de carga HTTP sobre las URLs principales, contra un gunicorn local con
+datos de seed_data (o contra --url si ya hay un servidor levantado). Con
+--mode se elige el tipo de worker: sync, gthread o uvicorn.
+
+    python -m benchmarks.http_load --output resultado.json [--compare base.json]
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks import percentile, setup_django
+
+DEFAULT_SCENARIOS = [
+    "clients_repo",
+    "pets_repo",
+    "pets_form",
+    "pets_history",
+    "clients_create",
+    "clients_edit",
+    "pets_create",
+]
+
+
+def scenarios(fixture):
+    """
+    Cada escenario devuelve (método, ruta, datos del POST) para el request
+    número `n` del hilo `thread`.
+    """
+    from django.urls import reverse
+
+    client = fixture["client"]
+    pet = fixture["pet"]
+
+    return {
+        "clients_repo": lambda thread, n: ("GET", reverse("clients_repo"), None),
+        "pets_repo": lambda thread, n: ("GET", reverse("pets_repo"), None),
+        "pets_form": lambda thread, n: ("GET", reverse("pets_form"), None),
+        "pets_history": lambda thread, n: ("GET", reverse("pets_history", args=(pet,)), None),
+        "clients_create": lambda thread, n: (
+            "POST",
+            reverse("clients_form"),
+            {
+                "name": f"Cliente {thread} {n}",
+                "phone": "221555232",
+                "address": "13 y 44",
+                "email": f"carga{thread}-{n}-{time.time_ns()}@mail.com",
+            },
+        ),
+        "clients_edit": lambda thread, n: (
+            "POST",
+            reverse("clients_form"),
+            {
+                "id": client["id"],
+                "name": client["name"],
+                "phone": f"221{n % 10**7:07d}",
+                "address": "13 y 44",
+                "email": client["email"],
+            },
+        ),
+        "pets_create": lambda thread, n: (
+            "POST",
+            reverse("pets_form"),
+            {
+                "name": f"Mascota {thread} {n}",
+                "breed": "Mestizo",
+                "birthday": "2020-01-01",
+                "weight": "10",
+                "client": client["id"],
+            },
+        ),
+    }
+
+
+class Session:
+    # Una conexión keep-alive por hilo, con la cookie CSRF para los POST.
+    def __init__(self, host, port):
+        self.connection = http.client.HTTPConnection(host, port, timeout=30)
+        self.csrf_token = None
+
+    def request(self, method, path, data=None):
+        headers = {}
+        body = None
+
+        if method == "POST":
+            if self.csrf_token is None:
+                self.fetch_csrf_token(path)
+            body = urlencode(data)
+            headers = {
+                "Content-Type": "application/x-www-form-urlencoded",
+                "Cookie": f"csrftoken={self.csrf_token}",
+                "X-CSRFToken": self.csrf_token,
+            }
+
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        response.read()
+        return response
+
+    def fetch_csrf_token(self, path):
+        self.connection.request("GET", path)
+        response = self.connection.getresponse()
+        response.read()
+
+        cookie = SimpleCookie()
+        for header in response.headers.get_all("Set-Cookie") or []:
+            cookie.load(header)
+        self.csrf_token = cookie["csrftoken"].value
+
+
+def run_scenario(host, port, build, concurrency, duration):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(thread):
+        session = Session(host, port)
+        own_latencies = []
+        own_errors = 0
+        n = 0
+
+        while time.perf_counter() < deadline:
+            method, path, data = build(thread, n)
+            n += 1
+            start = time.perf_counter()
+            try:
+                status = session.request(method, path, data).status
+            except (OSError, http.client.HTTPException):
+                session = Session(host, port)
+                own_errors += 1
+                continue
+
+            if status not in (200, 302):
+                own_errors += 1
+                continue
+            own_latencies.append(time.perf_counter() - start)
+
+        with lock:
+            latencies.extend(own_latencies)
+            errors.append(own_errors)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "rps": len(latencies) / duration,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"El servidor no respondió en {host}:{port}")
+
+
+def server_env(db_path, extra):
+    env = {
+        **os.environ,
+        "DB_PATH": db_path,
+        "DJANGO_ENV": "production",
+        "SECRET_KEY": "benchmark",
+        "ALLOWED_HOSTS": "127.0.0.1,localhost",
+    }
+    env.update(value.split("=", 1) for value in extra)
+    return env
+
+
+def prepare_database(env, args):
+    manage = [sys.executable, "manage.py"]
+    subprocess.run([*manage, "migrate", "--verbosity", "0"], env=env, check=True)
+    subprocess.run(
+        [
+            *manage,
+            "seed_data",
+            "--clients", str(args.clients),
+            "--pets-per-client", str(args.pets_per_client),
+            "--seed", "0",
+        ],
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def load_fixture():
+    from app.models import Client, Pet
+
+    client = Client.objects.order_by("id").values("id", "name", "email").first()
+    pet = Pet.objects.order_by("id").values_list("id", flat=True).first()
+    return {"client": client, "pet": pet}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    Marca como regresión una caída de req/s o una suba de p95 mayor que
+    `threshold` (fracción) respecto de `baseline`.
+    """
+    regressions = []
+
+    for name, current in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if not previous:
+            continue
+
+        if current["rps"] < previous["rps"] * (1 - threshold):
+            regressions.append(f"{name}: {previous['rps']:.0f} -> {current['rps']:.0f} req/s")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms"
+            )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="Servidor ya levantado; si falta se inicia gunicorn")
+    parser.add_argument("--workers", type=int, default=4, help="Workers de gunicorn")
+    parser.add_argument(
+        "--mode",
+        choices=["sync", "gthread", "uvicorn"],
+        help="Tipo de worker (GUNICORN_WORKER_CLASS); por defecto el de gunicorn.conf.py",
+    )
+    parser.add_argument(
+        "--gunicorn-arg", action="append", default=[], help="Argumento extra para gunicorn"
+    )
+    parser.add_argument(
+        "--env", action="append", default=[], help="Variable KEY=VALUE para el servidor"
+    )
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--pets-per-client", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--scenario", action="append", choices=DEFAULT_SCENARIOS)
+    parser.add_argument("--output", help="Guardar los resultados en este archivo JSON")
+    parser.add_argument("--compare", help="Resultados anteriores para detectar regresiones")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="vetsoft-bench-")
+    server = None
+
+    try:
+        if args.url:
+            parts = urlsplit(args.url)
+            host, port = parts.hostname, parts.port or 80
+            setup_django()
+        else:
+            env = server_env(os.path.join(directory, "bench.sqlite3"), args.env)
+            if args.mode:
+                env["GUNICORN_WORKER_CLASS"] = args.mode
+            prepare_database(env, args)
+
+            host, port = "127.0.0.1", free_port()
+            # La app (WSGI o ASGI) y el resto de la configuración salen de
+            # gunicorn.conf.py, igual que en el contenedor.
+            server = subprocess.Popen(
+                [
+                    sys.executable, "-m", "gunicorn",
+                    "--config", "gunicorn.conf.py",
+                    "--bind", f"{host}:{port}",
+                    "--workers", str(args.workers),
+                    *args.gunicorn_arg,
+                ],
+                env=env,
+                stderr=subprocess.DEVNULL,
+            )
+            wait_for_server(host, port)
+
+            # El proceso actual lee la misma base para elegir ids existentes.
+            os.environ.update(env)
+            setup_django()
+
+        builders = scenarios(load_fixture())
+        results = {
+            "meta": {
+                "commit": git_commit(),
+                "date": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "args": vars(args),
+            },
+            "scenarios": {},
+        }
+
+        for name in args.scenario or DEFAULT_SCENARIOS:
+            result = run_scenario(host, port, builders[name], args.concurrency, args.duration)
+            results["scenarios"][name] = result
+            print(
+                f"{name:15} {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.1f} ms  "
+                f"p95 {result['p95_ms']:7.1f} ms  p99 {result['p99_ms']:7.1f} ms  "
+                f"{result['errors']} errores"
+            )
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline:
+            regressions = compare(results, json.load(baseline), args.threshold)
+
+        for regression in regressions:
+            print(f"REGRESIÓN {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Compara los planes de consulta de las búsquedas frecuentes con y sin los
+índices de app/migrations/0016_indexes.py (los de nombre, de 0022).
+
+    python -m benchmarks.query_plans [--clients 20000] [--json resultado.json]
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks import create_benchmark_db, destroy_benchmark_db, setup_django
+
+INDEXES = [
+    "client_name_normalized_idx",
+    "client_email_unique",
+    "pet_client_name_idx",
+    "product_type_name_idx",
+    "provider_name_normalized_idx",
+    "vet_email_unique",
+]
+
+
+def seed(clients, pets_per_client, products):
+    from app.models import Client, Pet, Product, Provider, Vet
+
+    rng = random.Random(1)
+    names = ["Ramón", "Ramiro", "Lucía", "Juan", "María", "Pedro", "Sofía", "Guido"]
+    breeds = ["Labrador", "Caniche", "Ovejero", "Siamés", "Mestizo"]
+    types = ["Alimento", "Antibiótico", "Antiparasitario", "Accesorio"]
+
+    Client.objects.bulk_create(
+        Client(name=f"{rng.choice(names)} {i}", phone="221555232", email=f"c{i}@mail.com")
+        for i in range(clients)
+    )
+    client_ids = list(Client.objects.values_list("id", flat=True))
+    Pet.objects.bulk_create(
+        Pet(
+            name=f"{rng.choice(names)} {i}",
+            breed=rng.choice(breeds),
+            birthday=date(2015, 1, 1) + timedelta(days=rng.randrange(3000)),
+            weight=rng.randrange(1, 60),
+            client_id=client_ids[i % len(client_ids)],
+        )
+        for i in range(clients * pets_per_client)
+    )
+    Provider.objects.bulk_create(
+        Provider(name=f"Proveedor {i}", email=f"p{i}@mail.com", address="Calle 1")
+        for i in range(max(products // 20, 1))
+    )
+    provider_ids = list(Provider.objects.values_list("id", flat=True))
+    Product.objects.bulk_create(
+        Product(
+            name=f"Producto {i}",
+            type=rng.choice(types),
+            price=rng.randrange(100, 10000),
+            provider_id=rng.choice(provider_ids),
+        )
+        for i in range(products)
+    )
+    Vet.objects.bulk_create(
+        Vet(name=f"Vet {i}", email=f"v{i}@mail.com", phone=221555000 + i) for i in range(200)
+    )
+
+
+def queries():
+    from app.models import Client, Pet, Product, Provider, Vet
+
+    return {
+        "clients list page": Client.objects.filter(id__gt=500).order_by("id")[:26],
+        "clients autocomplete": Client.objects.name_prefix("ram")
+        .order_by("name_normalized")
+        .values("id", "name")[:20],
+        "client email lookup": Client.objects.with_email("C123@mail.com"),
+        "providers autocomplete": Provider.objects.name_prefix("prov")
+        .order_by("name_normalized")
+        .values("id", "name")[:20],
+        "pets of a client": Pet.objects.filter(client_id=42).order_by("name"),
+        "products by type": Product.objects.filter(type="Alimento").order_by("name")[:26],
+        "vet email lookup": Vet.objects.with_email("v10@mail.com"),
+    }
+
+
+def measure(queryset, repeat):
+    plan = queryset.explain()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        list(queryset.all())
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    return plan, elapsed
+
+
+def run(repeat):
+    from django.db import connection, transaction
+
+    results = {}
+
+    for label, queryset in queries().items():
+        results[label] = {"after": measure(queryset, repeat)}
+
+    # sqlite3 guarda las sentencias preparadas por conexión y un EXPLAIN ya
+    # preparado no se recalcula al borrar los índices.
+    connection.close()
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for index in INDEXES:
+                cursor.execute(f'DROP INDEX "{index}"')
+
+        for label, queryset in queries().items():
+            results[label]["before"] = measure(queryset, repeat)
+
+        transaction.set_rollback(True)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=20000)
+    parser.add_argument("--pets-per-client", type=int, default=2)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    setup_django()
+    connection = create_benchmark_db()
+    try:
+        seed(args.clients, args.pets_per_client, args.products)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        results = run(args.repeat)
+    finally:
+        destroy_benchmark_db(connection)
+
+    for label, result in results.items():
+        before_plan, before_ms = result["before"]
+        after_plan, after_ms = result["after"]
+        print(f"== {label}: {before_ms:.2f} ms -> {after_ms:.2f} ms")
+        print(f"   antes:   {before_plan.replace(chr(10), chr(10) + '            ')}")
+        print(f"   después: {after_plan.replace(chr(10), chr(10) + '            ')}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(
+                {
+                    label: {
+                        moment: {"plan": plan, "ms": ms}
+                        for moment, (plan, ms) in result.items()
+                    }
+                    for label, result in results.items()
+                },
+                output,
+                indent=2,
+                ensure_ascii=False,
+            )
+
+
+if __name__ == "__main__":
+    main()
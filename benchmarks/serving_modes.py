@@ -0,0 +1,64 @@
+"""
+Corre benchmarks.http_load con cada tipo de worker de gunicorn.conf.py y
+muestra una tabla comparativa de req/s y p95 por escenario.
+
+    python -m benchmarks.serving_modes [--modes sync gthread uvicorn] [--duration 10]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+def run_mode(mode, args, directory):
+    output = os.path.join(directory, f"{mode}.json")
+    subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.http_load",
+            "--mode", mode,
+            "--workers", str(args.workers),
+            "--concurrency", str(args.concurrency),
+            "--duration", str(args.duration),
+            "--clients", str(args.clients),
+            "--output", output,
+            *(f"--scenario={name}" for name in args.scenario or []),
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    with open(output, encoding="utf-8") as results:
+        return json.load(results)["scenarios"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modes", nargs="+", default=["sync", "gthread", "uvicorn"])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--scenario", action="append")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="vetsoft-bench-") as directory:
+        results = {mode: run_mode(mode, args, directory) for mode in args.modes}
+
+    scenarios = next(iter(results.values())).keys()
+    print(f"{'escenario':15}" + "".join(f"{mode:>24}" for mode in args.modes))
+    for name in scenarios:
+        cells = (
+            f"{results[mode][name]['rps']:8.1f} req/s {results[mode][name]['p95_ms']:6.1f} ms"
+            for mode in args.modes
+        )
+        print(f"{name:15}" + "".join(f"{cell:>24}" for cell in cells))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
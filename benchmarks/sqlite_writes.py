@@ -0,0 +1,138 @@
+"""
+Prueba de concurrencia sobre SQLite: varios procesos escriben y leen la misma
+base, como los workers de gunicorn, con cada perfil de DB_PROFILE.
+
+    python -m benchmarks.sqlite_writes [--writers 4] [--readers 4] [--duration 5]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import percentile, setup_django
+
+
+def configure(db_path, profile):
+    os.environ["DB_PATH"] = db_path
+    os.environ["DB_PROFILE"] = profile
+    setup_django()
+
+
+def request_cycle(operation):
+    # Igual que un request: con CONN_MAX_AGE=0 la conexión se abre y se cierra
+    # en cada uno, con el perfil "production" se reutiliza.
+    from django.core.signals import request_finished, request_started
+
+    request_started.send(sender=None)
+    try:
+        operation()
+    finally:
+        request_finished.send(sender=None)
+
+
+def worker(role, number, db_path, profile, duration):
+    configure(db_path, profile)
+
+    from django.db import OperationalError
+
+    from app.models import Client
+
+    counter = iter(range(sys.maxsize))
+
+    def write():
+        i = next(counter)
+        Client.save_client(
+            {
+                "name": f"Cliente {number} {i}",
+                "phone": "221555232",
+                "address": "13 y 44",
+                "email": f"w{number}-{i}@bench.com",
+            }
+        )
+
+    def read():
+        list(Client.objects.order_by("-id")[:25])
+
+    operation = write if role == "writer" else read
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            request_cycle(operation)
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+    return role, latencies, errors
+
+
+def run_profile(profile, directory, writers, readers, duration):
+    db_path = os.path.join(directory, f"{profile}.sqlite3")
+    env = {**os.environ, "DB_PATH": db_path, "DB_PROFILE": profile}
+    subprocess.run(
+        [sys.executable, "manage.py", "migrate", "--verbosity", "0"], env=env, check=True
+    )
+
+    jobs = [("writer", n) for n in range(writers)] + [("reader", n) for n in range(readers)]
+    context = multiprocessing.get_context("spawn")
+
+    with context.Pool(len(jobs)) as pool:
+        results = pool.starmap(
+            worker, [(role, n, db_path, profile, duration) for role, n in jobs]
+        )
+
+    summary = {}
+    for role in ("writer", "reader"):
+        latencies = [value for r, values, _ in results if r == role for value in values]
+        summary[role] = {
+            "ops_per_second": len(latencies) / duration,
+            "errors": sum(errors for r, _, errors in results if r == role),
+            "p50_ms": percentile(latencies, 0.5) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--profiles", nargs="+", default=["default", "production"])
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="vetsoft-bench-")
+    try:
+        results = {
+            profile: run_profile(profile, directory, args.writers, args.readers, args.duration)
+            for profile in args.profiles
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    for profile, summary in results.items():
+        print(f"== {profile}")
+        for role, stats in summary.items():
+            print(
+                f"   {role}: {stats['ops_per_second']:.0f} ops/s, "
+                f"p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, "
+                f"{stats['errors']} errores"
+            )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
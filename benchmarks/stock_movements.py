@@ -0,0 +1,126 @@
+"""
+Ventas simultáneas del mismo producto desde varios procesos, como los workers
+de gunicorn: mide movimientos por segundo y verifica que no se venda de más.
+
+    python -m benchmarks.stock_movements [--sellers 8] [--stock 2000] [--duration 5]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import percentile, setup_django
+
+
+def configure(db_path):
+    os.environ["DB_PATH"] = db_path
+    setup_django()
+
+
+def seller(db_path, product_id, duration):
+    configure(db_path)
+
+    from django.db import OperationalError
+
+    from app.models import StockMovement
+
+    latencies = []
+    rejected = 0
+    errors = 0
+    began = time.perf_counter()
+    deadline = began + duration
+
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            movement, _ = StockMovement.save_movement(product_id, {"kind": "sale", "quantity": "1"})
+        except OperationalError:
+            errors += 1
+            continue
+
+        if not movement:
+            # Sin stock: el resto de los intentos también se rechazarían.
+            rejected += 1
+            break
+        latencies.append(time.perf_counter() - start)
+
+    return latencies, rejected, errors, time.perf_counter() - began
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sellers", type=int, default=8)
+    parser.add_argument("--stock", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="vetsoft-bench-")
+    db_path = os.path.join(directory, "stock.sqlite3")
+
+    try:
+        env = {**os.environ, "DB_PATH": db_path}
+        subprocess.run(
+            [sys.executable, "manage.py", "migrate", "--verbosity", "0"], env=env, check=True
+        )
+        configure(db_path)
+
+        from django.db.models import Sum
+
+        from app.models import Product, StockMovement
+
+        product = Product.objects.create(name="Amoxicilina", type="Antibiótico", price=100)
+        StockMovement.save_movement(product.id, {"kind": "purchase", "quantity": args.stock})
+
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.sellers) as pool:
+            results = pool.starmap(
+                seller, [(db_path, product.id, args.duration)] * args.sellers
+            )
+
+        product.refresh_from_db()
+        ledger = product.stock_movements.aggregate(total=Sum("quantity"))["total"]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    latencies = [value for values, _, _, _ in results for value in values]
+    sold = len(latencies)
+    # Sin contar el arranque de los procesos.
+    elapsed = max(seconds for _, _, _, seconds in results)
+    summary = {
+        "sold": sold,
+        "rejected": sum(rejected for _, rejected, _, _ in results),
+        "errors": sum(errors for _, _, errors, _ in results),
+        "movements_per_second": sold / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "final_stock": product.stock,
+        "ledger_stock": ledger,
+        "oversold": sold > args.stock or product.stock != ledger or product.stock < 0,
+    }
+
+    print(
+        f"{summary['sold']} ventas en {elapsed:.1f} s: {summary['movements_per_second']:.0f} "
+        f"movimientos/s, p50 {summary['p50_ms']:.1f} ms, p95 {summary['p95_ms']:.1f} ms"
+    )
+    print(
+        f"stock final {summary['final_stock']} (historial {summary['ledger_stock']}), "
+        f"{summary['rejected']} rechazadas por falta de stock, {summary['errors']} errores"
+    )
+    print("VENDIDO DE MÁS" if summary["oversold"] else "Sin ventas de más")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(summary, output, indent=2)
+
+    if summary["oversold"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
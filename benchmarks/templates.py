@@ -0,0 +1,113 @@
+"""
+Mide el costo por request de renderizar una página: templates sin cachear y
+navbar copiado en cada request, contra el loader cacheado de producción y el
+navbar precalculado.
+
+    python -m benchmarks.templates [--iterations 2000] [--template home.html]
+"""
+import argparse
+import json
+import time
+
+from benchmarks import percentile, setup_django
+
+CONTEXT_PROCESSORS = [
+    "django.template.context_processors.debug",
+    "django.template.context_processors.request",
+    "django.contrib.auth.context_processors.auth",
+    "django.contrib.messages.context_processors.messages",
+]
+LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
+
+def copying_navbar(request):
+    # El context processor anterior: copia todos los links en cada request.
+    from app.context_processors import links
+
+    def add_active(link):
+        copy = link.copy()
+
+        if copy["href"] == "/":
+            copy["active"] = request.path == "/"
+        else:
+            copy["active"] = request.path.startswith(copy.get("href", ""))
+
+        return copy
+
+    return {"links": map(add_active, links)}
+
+
+def templates_setting(loaders, navbar):
+    return [
+        {
+            "BACKEND": "django.template.backends.django.DjangoTemplates",
+            "DIRS": [],
+            "OPTIONS": {
+                "context_processors": [*CONTEXT_PROCESSORS, navbar],
+                "loaders": loaders,
+            },
+        }
+    ]
+
+
+def measure(template, paths, iterations):
+    from django.template.loader import render_to_string
+    from django.test import RequestFactory
+
+    requests = [RequestFactory().get(path) for path in paths]
+    latencies = []
+
+    for i in range(iterations):
+        request = requests[i % len(requests)]
+        start = time.perf_counter()
+        render_to_string(template, request=request)
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        "p50_us": percentile(latencies, 0.5) * 10**6,
+        "p95_us": percentile(latencies, 0.95) * 10**6,
+        "mean_us": sum(latencies) / len(latencies) * 10**6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--template", default="home.html")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.test.utils import override_settings
+
+    paths = ["/", "/clientes/", "/mascotas/historial/1", "/productos/nuevo/"]
+    configs = {
+        "antes": templates_setting(LOADERS, "benchmarks.templates.copying_navbar"),
+        "despues": templates_setting(
+            [("django.template.loaders.cached.Loader", LOADERS)],
+            "app.context_processors.navbar",
+        ),
+    }
+
+    results = {}
+    for name, templates in configs.items():
+        with override_settings(TEMPLATES=templates):
+            results[name] = measure(args.template, paths, args.iterations)
+
+    for name, stats in results.items():
+        print(
+            f"{name:8} p50 {stats['p50_us']:8.1f} µs  p95 {stats['p95_us']:8.1f} µs  "
+            f"media {stats['mean_us']:8.1f} µs"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
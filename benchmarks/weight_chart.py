@@ -0,0 +1,77 @@
+"""
+Mide el endpoint del gráfico de peso para una mascota con años de pesajes
+semanales: tamaño de la respuesta y tiempo, con y sin reducir la serie.
+
+    python -m benchmarks.weight_chart [--weeks 520] [--points 200]
+"""
+import argparse
+import json
+import time
+
+from benchmarks import create_benchmark_db, destroy_benchmark_db, percentile, setup_django
+
+
+def measure(client, url, data, repeat):
+    latencies = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, data)
+        latencies.append(time.perf_counter() - start)
+
+    payload = response.json()
+    return {
+        "points": len(payload["points"]),
+        "bytes": len(response.content),
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--weeks", type=int, default=520)
+    parser.add_argument("--points", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.shortcuts import reverse
+    from django.test import Client as TestClient
+    from django.test.utils import override_settings
+
+    from app.models import Pet
+    from app.seeds import seed
+
+    connection = create_benchmark_db()
+
+    try:
+        seed(1, pets_per_client=1, weights_per_pet=args.weeks, treatments_per_pet=0)
+        url = reverse("pets_weight", args=(Pet.objects.get().id,))
+
+        with override_settings(
+            ALLOWED_HOSTS=["testserver"], WEIGHT_CHART_MAX_POINTS=args.weeks
+        ):
+            client = TestClient()
+            results = {
+                "serie_completa": measure(client, url, {"points": args.weeks}, args.repeat),
+                "reducida": measure(client, url, {"points": args.points}, args.repeat),
+            }
+    finally:
+        destroy_benchmark_db(connection)
+
+    for name, stats in results.items():
+        print(
+            f"{name:15} {stats['points']:5} puntos  {stats['bytes'] / 1024:6.1f} KiB  "
+            f"p50 {stats['p50_ms']:6.2f} ms  p95 {stats['p95_ms']:6.2f} ms"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+#!/bin/sh
+set -e
+
+# Las migraciones corren al arrancar el contenedor, contra la base real, y no
+# al construir la imagen.
+if [ "${MIGRATE_ON_START:-true}" = "true" ]; then
+    python manage.py migrate --noinput
+fi
+
+exec "$@"
@@ -156,7 +156,9 @@ class ClientsRepoTestCase(PlaywrightTestCase):
 
         # verificamos que el envio del formulario fue exitoso
         with self.page.expect_response(is_delete_response) as response_info:
-            self.page.get_by_role("button", name="Eliminar").click()
+            self.page.get_by_role(
+                "form", name="Formulario de eliminación de cliente"
+            ).get_by_role("button", name="Eliminar").click()
 
         response = response_info.value
         self.assertTrue(response.status < 400)
@@ -544,7 +546,9 @@ class ProvidersRepoTestCase(PlaywrightTestCase):
 
         # Verificar que el envío del formulario fue exitoso
         with self.page.expect_response(is_delete_response) as response_info:
-            self.page.get_by_role("button", name="Eliminar").click()
+            self.page.get_by_role(
+                "form", name="Formulario de eliminación de proveedor"
+            ).get_by_role("button", name="Eliminar").click()
 
         response = response_info.value
         self.assertTrue(response.status < 400)
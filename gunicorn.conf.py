@@ -0,0 +1,64 @@
+"""
+Configuración de gunicorn para producción; se lee sola al correr `gunicorn`
+desde la raíz del proyecto. Todo se puede cambiar con variables de entorno:
+
+    GUNICORN_WORKER_CLASS  sync, gthread (por defecto) o uvicorn (ASGI)
+    WEB_CONCURRENCY        cantidad de workers
+    GUNICORN_THREADS       hilos por worker con gthread
+
+Las exportaciones (/exportar/) solo se envían de a partes con sync o gthread.
+Con uvicorn, Django junta en una lista el iterador sincrónico de cada
+StreamingHttpResponse antes de enviarlo, así que el archivo entero queda en
+memoria.
+"""
+import multiprocessing
+import os
+
+WORKER_CLASSES = {
+    "sync": ("sync", "vetsoft.wsgi:application"),
+    "gthread": ("gthread", "vetsoft.wsgi:application"),
+    # Sin streaming de las exportaciones (ver arriba).
+    "uvicorn": ("uvicorn.workers.UvicornWorker", "vetsoft.asgi:application"),
+}
+
+
+def env_int(name, default):
+    # Una variable vacía (como en env-example) usa el valor por defecto.
+    return int(os.environ.get(name) or default)
+
+
+mode = os.environ.get("GUNICORN_WORKER_CLASS") or "gthread"
+if mode not in WORKER_CLASSES:
+    raise ValueError(f"GUNICORN_WORKER_CLASS inválido: {mode!r}")
+
+worker_class, wsgi_app = WORKER_CLASSES[mode]
+cpus = multiprocessing.cpu_count()
+
+# Los workers sync atienden un request por vez: hacen falta más procesos.
+# Con hilos o con uvicorn alcanza con uno por CPU, más uno.
+workers = env_int("WEB_CONCURRENCY", 2 * cpus + 1 if mode == "sync" else cpus + 1)
+threads = env_int("GUNICORN_THREADS", 4) if mode == "gthread" else 1
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+
+# La app se importa una vez en el proceso principal y los workers la heredan.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Reiniciar cada worker después de tantos requests acota las pérdidas de
+# memoria; el jitter evita que todos se reinicien a la vez.
+max_requests = env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = env_int("GUNICORN_MAX_REQUESTS_JITTER", 100)
+
+timeout = env_int("GUNICORN_TIMEOUT", 60)
+graceful_timeout = env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = env_int("GUNICORN_KEEPALIVE", 5)
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG") or None
+
+
+def post_fork(server, worker):
+    # Con preload_app, una conexión abierta en el proceso principal no se
+    # puede compartir entre workers: cada uno abre la suya.
+    from django.db import connections
+
+    connections.close_all()